@@ -138,7 +138,8 @@ class LibraryActions:
         uploaded_datasets = []
         for file in files:
             name = os.path.basename(file)
-            uploaded_datasets.append(self._make_library_uploaded_dataset(trans, params, name, file, 'server_dir', library_bunch))
+            uploaded_datasets.append(self._library_uploaded_dataset(trans, params, name, file, 'server_dir', library_bunch))
+        upload_common.new_library_uploads(trans, 'api', uploaded_datasets, library_bunch)
         return uploaded_datasets, 200, None
 
     def _get_server_dir_files(self, params, full_dir, import_dir_desc):
@@ -185,7 +186,8 @@ class LibraryActions:
         if _response_code:
             return (uploaded_datasets, _response_code, _message)
         for (path, name, folder) in files_and_folders:
-            uploaded_datasets.append(self._make_library_uploaded_dataset(trans, params, name, path, 'path_paste', library_bunch, folder))
+            uploaded_datasets.append(self._library_uploaded_dataset(trans, params, name, path, 'path_paste', library_bunch, folder))
+        upload_common.new_library_uploads(trans, 'api', uploaded_datasets, library_bunch)
         return uploaded_datasets, 200, None
 
     def _get_path_files_and_folders(self, params, preserve_dirs):
@@ -232,6 +234,15 @@ class LibraryActions:
         return None
 
     def _make_library_uploaded_dataset(self, trans, params, name, path, type, library_bunch, in_folder=None):
+        uploaded_dataset = self._library_uploaded_dataset(trans, params, name, path, type, library_bunch, in_folder)
+        uploaded_dataset.data = upload_common.new_upload(trans, 'api', uploaded_dataset, library_bunch)
+        if uploaded_dataset.link_data_only == 'link_to_files':
+            uploaded_dataset.data.link_to(path)
+            trans.sa_session.add_all((uploaded_dataset.data, uploaded_dataset.data.dataset))
+            trans.sa_session.flush()
+        return uploaded_dataset
+
+    def _library_uploaded_dataset(self, trans, params, name, path, type, library_bunch, in_folder=None):
         link_data_only = params.get('link_data_only', 'copy_files')
         uuid_str = params.get('uuid', None)
         file_type = params.get('file_type', None)
@@ -258,13 +269,8 @@ class LibraryActions:
         uploaded_dataset.purge_source = getattr(trans.app.config, 'ftp_upload_purge', True)
         if in_folder:
             uploaded_dataset.in_folder = in_folder
-        uploaded_dataset.data = upload_common.new_upload(trans, 'api', uploaded_dataset, library_bunch)
         uploaded_dataset.link_data_only = link_data_only
         uploaded_dataset.uuid = uuid_str
-        if link_data_only == 'link_to_files':
-            uploaded_dataset.data.link_to(path)
-            trans.sa_session.add_all((uploaded_dataset.data, uploaded_dataset.data.dataset))
-            trans.sa_session.flush()
         return uploaded_dataset
 
     def _create_folder(self, trans, parent_id, library_id, **kwd):
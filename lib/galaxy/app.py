@@ -37,6 +37,7 @@ from galaxy.tools.cache import (
 )
 from galaxy.tools.data_manager.manager import DataManagers
 from galaxy.tools.error_reports import ErrorReports
+from galaxy.tools.parameters.dynamic_options import DynamicOptionsCache
 from galaxy.tools.special_tools import load_lib_tools
 from galaxy.tours import ToursRegistry
 from galaxy.util import (
@@ -44,6 +45,7 @@ from galaxy.util import (
     heartbeat,
     StructuredExecutionTimer,
 )
+from galaxy.util.template import CompiledTemplateCache
 from galaxy.visualization.data_providers.registry import DataProviderRegistry
 from galaxy.visualization.genomes import Genomes
 from galaxy.visualization.plugins.registry import VisualizationsRegistry
@@ -136,6 +138,15 @@ class UniverseApplication(config.ConfiguresGalaxyMixin):
         # Setup a Tool Cache
         self.tool_cache = ToolCache()
         self.tool_shed_repository_cache = ToolShedRepositoryCache(self)
+        # Cache compiled Cheetah templates of tools (command lines, config files, ...)
+        self.compiled_template_cache = None
+        if self.config.tool_template_cache_size > 0:
+            self.compiled_template_cache = CompiledTemplateCache(maxsize=self.config.tool_template_cache_size,
+                                                                 cache_dir=self.config.tool_template_cache_dir)
+        # Cache options of select parameters computed from data tables, files and datasets
+        self.dynamic_options_cache = None
+        if self.config.dynamic_options_cache_size > 0:
+            self.dynamic_options_cache = DynamicOptionsCache(maxsize=self.config.dynamic_options_cache_size)
         # Watch various config files for immediate reload
         self.watchers = ConfigWatchers(self)
         self._configure_tool_config_files()
@@ -1008,6 +1008,7 @@ def init_models_from_config(config, map_install_models=False, object_store=None,
         slow_query_log_threshold=config.slow_query_log_threshold,
         thread_local_log=config.thread_local_log,
         log_query_counts=config.database_log_query_counts,
+        metadata_spill_threshold=getattr(config, 'metadata_spill_threshold', 0),
     )
     return model
 
@@ -1056,12 +1057,13 @@ class ConfiguresGalaxyMixin:
     def _configure_genome_builds(self, data_table_name="__dbkeys__", load_old_style=True):
         self.genome_builds = GenomeBuilds(self, data_table_name=data_table_name, load_old_style=load_old_style)
 
-    def wait_for_toolbox_reload(self, old_toolbox):
+    def wait_for_toolbox_reload(self, old_reload_count):
         timer = ExecutionTimer()
         log.debug('Waiting for toolbox reload')
-        # Wait till toolbox reload has been triggered (or more than 60 seconds have passed)
+        # Wait till toolbox reload has been triggered (or more than 60 seconds have passed).
+        # The toolbox may be updated in place, so compare reload counts rather than toolboxes.
         while timer.elapsed < 60:
-            if self.toolbox.has_reloaded(old_toolbox):
+            if self.toolbox._reload_count != old_reload_count:
                 log.debug('Finished waiting for toolbox reload %s', timer)
                 break
             time.sleep(0.1)
@@ -1118,7 +1120,12 @@ class ConfiguresGalaxyMixin:
         self.container_finder = containers.ContainerFinder(app_info, mulled_resolution_cache=mulled_resolution_cache)
         self._set_enabled_container_types()
         index_help = getattr(self.config, "index_tool_help", True)
-        self.toolbox_search = galaxy.tools.search.ToolBoxSearch(self.toolbox, index_dir=self.config.tool_search_index_dir, index_help=index_help)
+        if self.config.tool_search_engine == 'memory':
+            import galaxy.tools.search.memory
+            toolbox_search_class = galaxy.tools.search.memory.InMemoryToolBoxSearch
+        else:
+            toolbox_search_class = galaxy.tools.search.ToolBoxSearch
+        self.toolbox_search = toolbox_search_class(self.toolbox, index_dir=self.config.tool_search_index_dir, index_help=index_help)
 
     def reindex_tool_search(self):
         # Call this when tools are added or removed.
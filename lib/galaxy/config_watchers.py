@@ -27,14 +27,19 @@ class ConfigWatchers:
 
         def reload_toolbox():
             save_integrated_tool_panel = False
+            kwargs = {}
             try:
                 # Run and wait for toolbox reload on the process that watches the config files.
                 # The toolbox reload will update the integrated_tool_panel_file
-                self.app.queue_worker.send_local_control_task('reload_toolbox', get_response=True),
+                change_set = self.app.queue_worker.send_local_control_task('reload_toolbox', get_response=True, kwargs={'incremental': True})
+                if isinstance(change_set, dict):
+                    # Let the other processes apply the same changes to their toolboxes
+                    kwargs['change_set'] = change_set
             except Exception:
                 save_integrated_tool_panel = True
                 log.exception("Exception occured while reloading toolbox")
-            self.app.queue_worker.send_control_task('reload_toolbox', noop_self=True, kwargs={'save_integrated_tool_panel': save_integrated_tool_panel}),
+            kwargs['save_integrated_tool_panel'] = save_integrated_tool_panel
+            self.app.queue_worker.send_control_task('reload_toolbox', noop_self=True, kwargs=kwargs),
 
         self.tool_config_watcher = get_tool_conf_watcher(
             reload_callback=reload_toolbox,
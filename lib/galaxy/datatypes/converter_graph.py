@@ -0,0 +1,119 @@
+"""
+Graph of the datatype converters of a datatypes registry.
+"""
+from collections import (
+    deque,
+    OrderedDict,
+)
+
+
+class ConverterGraph:
+    """Index the converters of a registry by source extension along with the shortest conversion paths.
+
+    The converters applicable to an extension - its own and those of the
+    datatypes its datatype class subclasses - and the shortest conversion
+    paths from it to every reachable extension are computed on first use and
+    kept until converters or datatypes change. Reachability is then answered
+    in constant time and conversion paths in the time of their length.
+
+    Converters with dependencies on other conversions are only used as the
+    single step of a conversion, never within multi-step conversion paths.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._converters = {}
+        self._paths = {}
+
+    def converters(self, ext):
+        """Return an ordered mapping of target extension to converter tool for ``ext``."""
+        converters = self._converters.get(ext)
+        if converters is None:
+            converters = OrderedDict()
+            datatype_converters = self.registry.datatype_converters
+            source_datatype = type(self.registry.get_datatype_by_extension(ext))
+            for converter_ext, converters_dict in datatype_converters.items():
+                converter_datatype = type(self.registry.get_datatype_by_extension(converter_ext))
+                if issubclass(source_datatype, converter_datatype):
+                    converters.update(converters_dict)
+            # Ensure ext-level converters are present
+            if ext in datatype_converters:
+                converters.update(datatype_converters[ext])
+            self._converters[ext] = converters
+        return converters
+
+    def conversion_targets(self, ext, max_steps=1):
+        """Return extensions ``ext`` converts to in at most ``max_steps`` steps, nearest first."""
+        if max_steps == 1:
+            return list(self.converters(ext))
+        return [target for target, (_, steps) in self._paths_from(ext).items() if steps <= max_steps]
+
+    def can_convert(self, source_ext, target_ext, max_steps=1):
+        """Return whether ``source_ext`` converts to ``target_ext`` in at most ``max_steps`` steps."""
+        if max_steps == 1:
+            return target_ext in self.converters(source_ext)
+        path = self._paths_from(source_ext).get(target_ext)
+        return path is not None and path[1] <= max_steps
+
+    def conversion_path(self, source_ext, target_ext, max_steps=1):
+        """Return the extensions of the steps of the shortest conversion of ``source_ext`` to ``target_ext``.
+
+        The last step is ``target_ext``. Return None if ``target_ext`` is not
+        reachable in at most ``max_steps`` steps.
+        """
+        if not self.can_convert(source_ext, target_ext, max_steps=max_steps):
+            return None
+        if target_ext in self.converters(source_ext):
+            return [target_ext]
+        paths = self._paths_from(source_ext)
+        path = []
+        ext = target_ext
+        while ext != source_ext:
+            path.append(ext)
+            ext = paths[ext][0]
+        path.reverse()
+        return path
+
+    def converters_changed(self, ext):
+        """Update the graph after converters with source extension ``ext`` were added or removed."""
+        changed_datatype = type(self.registry.get_datatype_by_extension(ext))
+        changed = {ext}
+        for source_ext in list(self._converters):
+            if issubclass(type(self.registry.get_datatype_by_extension(source_ext)), changed_datatype):
+                changed.add(source_ext)
+        for source_ext in changed:
+            self._converters.pop(source_ext, None)
+        # Only paths from or through extensions with changed converters are affected.
+        for source_ext, paths in list(self._paths.items()):
+            if source_ext in changed or not changed.isdisjoint(paths):
+                self._paths.pop(source_ext, None)
+
+    def reset(self):
+        """Forget everything computed, e.g. after datatypes changed."""
+        self._converters = {}
+        self._paths = {}
+
+    def _paths_from(self, source_ext):
+        """Breadth-first search of the extensions reachable from ``source_ext``.
+
+        Return an ordered mapping of reachable extension to the previous
+        extension on the shortest path to it and the number of steps.
+        """
+        paths = self._paths.get(source_ext)
+        if paths is None:
+            paths = OrderedDict()
+            converter_deps = self.registry.converter_deps
+            queue = deque([(source_ext, 0)])
+            while queue:
+                ext, steps = queue.popleft()
+                for target_ext in self.converters(ext):
+                    if target_ext == source_ext or target_ext in paths:
+                        continue
+                    has_deps = target_ext in converter_deps.get(ext, {})
+                    if has_deps and steps > 0:
+                        continue
+                    paths[target_ext] = (ext, steps + 1)
+                    if not has_deps:
+                        queue.append((target_ext, steps + 1))
+            self._paths[source_ext] = paths
+        return paths
@@ -1084,6 +1084,10 @@ def get_file_peek(file_name, is_multi_byte=False, WIDTH=256, LINE_COUNT=5, skipc
     """
     Returns the first LINE_COUNT lines wrapped to WIDTH.
 
+    If line_wrap is False, lines are truncated to WIDTH instead. Peeking stops at
+    lines longer than DEFAULT_MAX_PEEK_SIZE, so that never more than about
+    LINE_COUNT * DEFAULT_MAX_PEEK_SIZE characters are read.
+
     :param is_multi_byte: deprecated
     :type  is_multi_byte: bool
 
@@ -1107,8 +1111,9 @@ def get_file_peek(file_name, is_multi_byte=False, WIDTH=256, LINE_COUNT=5, skipc
     count = 0
 
     last_line_break = False
+    truncated = False
     with compression_utils.get_fileobj(file_name, "U") as temp:
-        while count < LINE_COUNT:
+        while count < LINE_COUNT and not truncated:
             try:
                 line = temp.readline(WIDTH)
             except UnicodeDecodeError:
@@ -1120,11 +1125,17 @@ def get_file_peek(file_name, is_multi_byte=False, WIDTH=256, LINE_COUNT=5, skipc
                 line = line[:-1]
                 last_line_break = True
             elif not line_wrap:
+                # skip the rest of the line
+                skipped = 0
                 while True:
-                    i = temp.read(1)
-                    if i == '\n':
+                    rest = temp.readline(2 ** 16)
+                    skipped += len(rest)
+                    if rest.endswith('\n'):
                         last_line_break = True
-                    if not i or i == '\n':
+                    if not rest or last_line_break:
+                        break
+                    if skipped > DEFAULT_MAX_PEEK_SIZE:
+                        truncated = True
                         break
             skip_line = False
             for skipchar in skipchars:
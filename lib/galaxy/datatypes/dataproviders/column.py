@@ -2,17 +2,21 @@
 Providers that provide lists of lists generally where each line of a source
 is further subdivided into multiple data (e.g. columns from a line).
 """
+import array
 import logging
 import re
+from itertools import zip_longest
 from urllib.parse import unquote_plus
 
 from . import line
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 _TODO = """
 move ColumnarDataProvider parsers to more sensible location
-
-TransposedColumnarDataProvider: provides each column as a single array
-    - see existing visualizations/dataprovider/basic.ColumnDataProvider
 """
 
 log = logging.getLogger(__name__)
@@ -354,3 +358,154 @@ class DictDataProvider(ColumnarDataProvider):
         for column_values in parent_gen:
             map = dict(zip(self.column_names, column_values))
             yield map
+
+
+# ----------------------------------------------------------------------------- column oriented batches
+class ColumnarBatchDataProvider(ColumnarDataProvider):
+    """
+    Data provider that provides the columns from the lines of its source in
+    column oriented batches: each datum is a list containing, for each selected
+    column, the values of that column in (at most) `batch_size` rows.
+
+    Rows are selected exactly as with ColumnarDataProvider: `filters`, `offset`
+    and `limit` apply to rows, not batches. When no `filters` are given, values
+    are parsed a whole column of a batch at a time.
+
+    Depending on `array_type`, the columns of a batch are:
+        - 'list': lists of values (the default, these serialize to JSON)
+        - 'array': `array.array`s for 'int' and 'float' columns, lists otherwise
+        - 'numpy': numpy arrays for 'int' and 'float' columns, lists otherwise
+            (uses 'array' when numpy is not installed)
+
+    Numeric columns with any missing or unparsable value (provided as `None`) are
+    left as lists.
+    """
+    DEFAULT_BATCH_SIZE = 1000
+    ARRAY_TYPES = ('list', 'array', 'numpy')
+    # array.array typecodes (also understood by numpy as dtypes) of the typed columns
+    ARRAY_TYPECODES = {
+        'int'   : 'q',
+        'float' : 'd',
+    }
+    settings = {
+        'batch_size'    : 'int',
+        'array_type'    : 'str',
+    }
+
+    def __init__(self, source, batch_size=DEFAULT_BATCH_SIZE, array_type='list', **kwargs):
+        """
+        :param batch_size: the maximum number of rows in each batch.
+            Optional: defaults to 1000.
+        :type batch_size: int
+
+        :param array_type: one of 'list', 'array', or 'numpy' (see above).
+            Optional: defaults to 'list'.
+        :type array_type: str
+
+        .. note:: all ColumnarDataProvider kwargs (indeces, column_types, filters,
+            limit, offset, etc.) are also applicable here.
+        """
+        super().__init__(source, **kwargs)
+        self.batch_size = max(batch_size or self.DEFAULT_BATCH_SIZE, 1)
+        if array_type not in self.ARRAY_TYPES:
+            log.warning('Unknown array_type "%s" for %s, using lists', array_type, self.__class__.__name__)
+            array_type = 'list'
+        if array_type == 'numpy' and numpy is None:
+            array_type = 'array'
+        self.array_type = array_type
+
+    def __iter__(self):
+        rows = []
+        for columns in super().__iter__():
+            rows.append(columns)
+            if len(rows) >= self.batch_size:
+                yield self.batch_from_rows(rows)
+                rows = []
+        if rows:
+            yield self.batch_from_rows(rows)
+
+    def parse_columns_from_line(self, line):
+        """
+        Returns a list of the desired, unparsed columns when there are no column
+        filters (values are then parsed in `batch_from_rows`).
+        """
+        if self.column_filters:
+            return super().parse_columns_from_line(line)
+        all_columns = line.split(self.deliminator)
+        column_count = len(all_columns)
+        if not self.selected_column_indeces:
+            return all_columns
+        return [all_columns[index] if -column_count <= index < column_count else None
+                for index in self.selected_column_indeces]
+
+    def batch_from_rows(self, rows):
+        """
+        Transpose a list of rows into a list of (parsed) columns, padding
+        shorter rows with `None`.
+        """
+        batch = []
+        for parser_index, values in enumerate(zip_longest(*rows)):
+            column_type = self.get_column_type(parser_index)
+            if not self.column_filters:
+                values = self.parse_column_values(values, column_type)
+            batch.append(self.column_to_array(list(values), column_type))
+        return batch
+
+    def parse_column_values(self, values, column_type):
+        """
+        Parse a sequence of values of the same column type, giving the same
+        results as calling `parse_value` for each.
+        """
+        parser = self.parsers.get(column_type) if column_type != 'str' else None
+        if parser is None:
+            return values
+        if None not in values:
+            try:
+                return list(map(parser, values))
+            except ValueError:
+                pass
+        # some values are missing or unparsable: parse them one by one
+        return [None if value is None else self.parse_value(value, column_type) for value in values]
+
+    def column_to_array(self, values, column_type):
+        """
+        Return the given list of parsed values as an array, according to
+        `array_type` and the column type.
+        """
+        typecode = self.ARRAY_TYPECODES.get(column_type)
+        if self.array_type == 'list' or typecode is None or not self.parsers or None in values:
+            return values
+        try:
+            if self.array_type == 'numpy':
+                return numpy.array(values, dtype=typecode)
+            return array.array(typecode, values)
+        except (OverflowError, TypeError):
+            # e.g. a custom parser not providing numbers, or integers that don't fit in 64 bits
+            return values
+
+
+class DictBatchDataProvider(ColumnarBatchDataProvider):
+    """
+    Data provider that zips column_names and the columns of each batch
+    from ColumnarBatchDataProvider into a dictionary.
+
+    .. note:: The subclass constructors are passed kwargs - so their
+        params (batch_size, limit, offset, etc.) are also applicable here.
+    """
+    settings = {
+        'column_names'  : 'list:str',
+    }
+
+    def __init__(self, source, column_names=None, **kwargs):
+        """
+        :param column_names: an ordered list of strings that will be used as the keys
+            for each column in the returned dictionaries.
+        :type column_names: list of strings
+        """
+        super().__init__(source, **kwargs)
+        self.column_names = column_names or []
+
+    def __iter__(self):
+        parent_gen = super().__iter__()
+        for columns in parent_gen:
+            yield dict(zip(self.column_names, columns))
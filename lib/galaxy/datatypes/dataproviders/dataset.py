@@ -13,7 +13,10 @@ from bx import (
     wiggle as bx_wig
 )
 
-from galaxy.util import sqlite
+from galaxy.util import (
+    compression_utils,
+    sqlite
+)
 from . import (
     base,
     column,
@@ -52,8 +55,12 @@ class DatasetDataProvider(base.DataProvider):
         self.dataset = dataset
         # this dataset file is obviously the source
         # TODO: this might be a good place to interface with the object_store...
-        mode = 'rb' if dataset.datatype.is_binary else 'r'
-        super().__init__(open(dataset.file_name, mode))
+        if dataset.datatype.is_binary:
+            source = open(dataset.file_name, 'rb')
+        else:
+            # compressed text is provided decompressed, gzip/BGZF sources seek without decompressing from the start
+            source = compression_utils.get_seekable_fileobj(dataset.file_name)
+        super().__init__(source)
 
     # TODO: this is a bit of a mess
     @classmethod
@@ -71,6 +78,45 @@ class DatasetDataProvider(base.DataProvider):
         params['column_names'] = dataset.metadata.column_names or getattr(dataset.datatype, 'column_names', None)
         return params
 
+    def get_columnar_settings_from_metadata(self, kwargs):
+        """
+        Return the kwargs for a columnar provider, using the metadata column_types
+        when none are given.
+        """
+        if not kwargs.get('column_types', None):
+            indeces = kwargs.get('indeces', None)
+            kwargs['column_types'] = self.get_metadata_column_types(indeces=indeces)
+        return kwargs
+
+    def get_dict_settings_from_metadata(self, kwargs):
+        """
+        Return the kwargs for a dict provider, using the metadata column_names
+        and column_types when none are given.
+
+        .. seealso:: DatasetDictDataProvider
+        """
+        # TODO: getting too complicated - simplify at some lvl, somehow
+        # if no column_types given, get column_types from indeces (or all if indeces == None)
+        indeces = kwargs.get('indeces', None)
+        column_names = kwargs.get('column_names', None)
+
+        if not indeces and column_names:
+            # pull columns by name
+            indeces = kwargs['indeces'] = self.get_indeces_by_column_names(column_names)
+
+        elif indeces and not column_names:
+            # pull using indeces, name with meta
+            column_names = kwargs['column_names'] = self.get_metadata_column_names(indeces=indeces)
+
+        elif not indeces and not column_names:
+            # pull all indeces and name using metadata
+            column_names = kwargs['column_names'] = self.get_metadata_column_names(indeces=indeces)
+
+        # if no column_types given, use metadata column_types
+        if not kwargs.get('column_types', None):
+            kwargs['column_types'] = self.get_metadata_column_types(indeces=indeces)
+        return kwargs
+
     def get_metadata_column_types(self, indeces=None):
         """
         Return the list of `column_types` for this dataset or `None` if unavailable.
@@ -198,9 +244,7 @@ class DatasetColumnarDataProvider(column.ColumnarDataProvider):
         any metadata available.
         """
         dataset_source = DatasetDataProvider(dataset)
-        if not kwargs.get('column_types', None):
-            indeces = kwargs.get('indeces', None)
-            kwargs['column_types'] = dataset_source.get_metadata_column_types(indeces=indeces)
+        kwargs = dataset_source.get_columnar_settings_from_metadata(kwargs)
         super().__init__(dataset_source, **kwargs)
 
 
@@ -231,28 +275,37 @@ class DatasetDictDataProvider(column.DictDataProvider):
         +=================+-------------------------------+-----------------------+
         """
         dataset_source = DatasetDataProvider(dataset)
+        kwargs = dataset_source.get_dict_settings_from_metadata(kwargs)
+        super().__init__(dataset_source, **kwargs)
 
-        # TODO: getting too complicated - simplify at some lvl, somehow
-        # if no column_types given, get column_types from indeces (or all if indeces == None)
-        indeces = kwargs.get('indeces', None)
-        column_names = kwargs.get('column_names', None)
 
-        if not indeces and column_names:
-            # pull columns by name
-            indeces = kwargs['indeces'] = dataset_source.get_indeces_by_column_names(column_names)
+class DatasetColumnarBatchDataProvider(column.ColumnarBatchDataProvider):
+    """
+    Data provider that uses a DatasetDataProvider as its source and the
+    dataset's metadata to build settings for the ColumnarBatchDataProvider it's
+    inherited from.
 
-        elif indeces and not column_names:
-            # pull using indeces, name with meta
-            column_names = kwargs['column_names'] = dataset_source.get_metadata_column_names(indeces=indeces)
+    .. seealso:: DatasetColumnarDataProvider
+    """
 
-        elif not indeces and not column_names:
-            # pull all indeces and name using metadata
-            column_names = kwargs['column_names'] = dataset_source.get_metadata_column_names(indeces=indeces)
+    def __init__(self, dataset, **kwargs):
+        dataset_source = DatasetDataProvider(dataset)
+        kwargs = dataset_source.get_columnar_settings_from_metadata(kwargs)
+        super().__init__(dataset_source, **kwargs)
 
-        # if no column_types given, use metadata column_types
-        if not kwargs.get('column_types', None):
-            kwargs['column_types'] = dataset_source.get_metadata_column_types(indeces=indeces)
 
+class DatasetDictBatchDataProvider(column.DictBatchDataProvider):
+    """
+    Data provider that uses a DatasetDataProvider as its source and the
+    dataset's metadata to build settings for the DictBatchDataProvider it's
+    inherited from.
+
+    .. seealso:: DatasetDictDataProvider
+    """
+
+    def __init__(self, dataset, **kwargs):
+        dataset_source = DatasetDataProvider(dataset)
+        kwargs = dataset_source.get_dict_settings_from_metadata(kwargs)
         super().__init__(dataset_source, **kwargs)
 
 
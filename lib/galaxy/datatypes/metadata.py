@@ -21,6 +21,7 @@ from galaxy.model.metadata import (
     PythonObjectParameter,
     RangeParameter,
     SelectParameter,
+    SpillableParameter,
     Statement,
 )
 
@@ -40,5 +41,6 @@ __all__ = (
     "DictParameter",
     "PythonObjectParameter",
     "FileParameter",
+    "SpillableParameter",
     "MetadataTempFile",
 )
@@ -6,6 +6,7 @@ import imp
 import logging
 import os
 from collections import OrderedDict
+from functools import partial
 from string import Template
 
 import yaml
@@ -26,20 +27,122 @@ from . import (
     tracks,
     xml
 )
-from .display_applications.application import DisplayApplication
+from .converter_graph import ConverterGraph
+
+
+def _import_module(full_path, datatype_module, datatype_class_name):
+    open_file_obj, file_name, description = imp.find_module(datatype_module, [full_path])
+    imported_module = imp.load_module(datatype_class_name, open_file_obj, file_name, description)
+    return imported_module
 
 
 class ConfigurationError(Exception):
     pass
 
 
+class DatatypesByExtension(dict):
+    """
+    Map extensions to datatype instances, where the loading of some datatypes may be deferred.
+
+    Deferred datatypes are loaded (and their modules imported) the first time they are looked up
+    or when the values of the mapping are iterated, membership tests and key iteration never
+    trigger loading.
+    """
+
+    def __init__(self, *args, **kwds):
+        super().__init__(*args, **kwds)
+        self._deferred = {}
+
+    def defer(self, extension, load):
+        """Register the callable ``load`` that will populate ``extension`` on first access."""
+        self._deferred[extension] = load
+        # Reserve the key, so the order of extensions is the order of the configuration.
+        super().__setitem__(extension, None)
+
+    def is_deferred(self, extension):
+        return extension in self._deferred
+
+    def is_loaded(self, extension):
+        """Whether a datatype was loaded for ``extension``, without triggering a deferred load."""
+        return super().get(extension) is not None
+
+    def load_deferred(self):
+        for extension in list(self._deferred):
+            self._load(extension)
+
+    def _load(self, extension):
+        load = self._deferred.pop(extension, None)
+        if load is not None:
+            # The load of a datatype registers its auto compressed variants as well.
+            load()
+            if super().__getitem__(extension) is None:
+                # Loading failed (and was logged), drop the reserved key.
+                super().__delitem__(extension)
+
+    def __getitem__(self, extension):
+        if extension in self._deferred:
+            self._load(extension)
+        return super().__getitem__(extension)
+
+    def __setitem__(self, extension, datatype):
+        self._deferred.pop(extension, None)
+        super().__setitem__(extension, datatype)
+
+    def __delitem__(self, extension):
+        self._deferred.pop(extension, None)
+        super().__delitem__(extension)
+
+    def get(self, extension, default=None):
+        try:
+            return self[extension]
+        except KeyError:
+            return default
+
+    def pop(self, extension, *args):
+        if extension in self._deferred:
+            self._load(extension)
+        return super().pop(extension, *args)
+
+    def popitem(self):
+        if self:
+            self._load(next(reversed(self.keys())))
+        return super().popitem()
+
+    def setdefault(self, extension, default=None):
+        if extension in self:
+            return self[extension]
+        self[extension] = default
+        return default
+
+    def update(self, *args, **kwds):
+        for extension, datatype in dict(*args, **kwds).items():
+            self[extension] = datatype
+
+    def clear(self):
+        self._deferred.clear()
+        super().clear()
+
+    def copy(self):
+        # Deferred loads populate this mapping, so a copy can't defer them.
+        self.load_deferred()
+        return dict(super().items())
+
+    def values(self):
+        self.load_deferred()
+        return super().values()
+
+    def items(self):
+        self.load_deferred()
+        return super().items()
+
+
 class Registry:
 
     def __init__(self, config=None):
         self.log = logging.getLogger(__name__)
         self.log.addHandler(logging.NullHandler())
         self.config = config
-        self.datatypes_by_extension = {}
+        self.datatypes_by_extension = DatatypesByExtension()
         self.mimetypes_by_extension = {}
         self.datatype_converters = OrderedDict()
         # Converters defined in local datatypes_conf.xml
@@ -50,7 +153,9 @@ class Registry:
         self.converter_deps = {}
         self.available_tracks = []
         self.set_external_metadata_tool = None
-        self.sniff_order = []
+        self._sniff_order = []
+        # Sniffers of registries loaded lazily are only loaded on first access to sniff_order.
+        self._deferred_sniffer_loads = []
         self.upload_file_formats = []
         # Datatype elements defined in local datatypes_conf.xml that contain display applications.
         self.display_app_containers = []
@@ -76,26 +181,24 @@ class Registry:
         self._registry_xml_string = None
         self._edam_formats_mapping = None
         self._edam_data_mapping = None
-        self._converters_by_datatype = {}
+        self.converter_graph = ConverterGraph(self)
         # Build sites
         self.build_sites = {}
         self.display_sites = {}
         self.legacy_build_sites = {}
 
-    def load_datatypes(self, root_dir=None, config=None, deactivate=False, override=True, use_converters=True, use_display_applications=True, use_build_sites=True):
+    def load_datatypes(self, root_dir=None, config=None, deactivate=False, override=True, use_converters=True, use_display_applications=True, use_build_sites=True, lazy=False):
         """
         Parse a datatypes XML file located at root_dir/config (if processing the Galaxy distributed config) or contained within
         an installed Tool Shed repository.  If deactivate is True, an installed Tool Shed repository that includes custom datatypes
         is being deactivated or uninstalled, so appropriate loaded datatypes will be removed from the registry.  The value of
         override will be False when a Tool Shed repository is being installed.  Since installation is occurring after the datatypes
         registry has been initialized at server startup, its contents cannot be overridden by newly introduced conflicting data types.
+        If lazy is True, datatype modules are only imported when a datatype is first looked up and sniffers are only loaded when
+        sniff_order is first accessed.  This is meant for short lived processes (e.g. metadata jobs) that look up few datatypes
+        by extension, the mimetypes, upload formats, tracks and converters of a datatype are only registered once it is loaded.
         """
 
-        def __import_module(full_path, datatype_module, datatype_class_name):
-            open_file_obj, file_name, description = imp.find_module(datatype_module, [full_path])
-            imported_module = imp.load_module(datatype_class_name, open_file_obj, file_name, description)
-            return imported_module
-
         if root_dir and config:
             # If handling_proprietary_datatypes is determined as True below, we'll have an elem that looks something like this:
             # <datatype display_in_upload="true"
@@ -147,8 +250,6 @@ class Registry:
             if proprietary_converter_path is not None or proprietary_display_path is not None and not handling_proprietary_datatypes:
                 handling_proprietary_datatypes = True
             for elem in registration.findall('datatype'):
-                # Keep a status of the process steps to enable stopping the process of handling the datatype if necessary.
-                ok = True
                 extension = self.get_extension(elem)
                 dtype = elem.get('type', None)
                 type_extension = elem.get('type_extension', None)
@@ -213,158 +314,15 @@ class Registry:
                             if override or extension not in self.datatypes_by_extension:
                                 can_process_datatype = True
                     if can_process_datatype:
-                        if dtype is not None:
-                            try:
-                                fields = dtype.split(':')
-                                datatype_module = fields[0]
-                                datatype_class_name = fields[1]
-                            except Exception:
-                                self.log.exception('Error parsing datatype definition for dtype %s', str(dtype))
-                                ok = False
-                            if ok:
-                                datatype_class = None
-                                if proprietary_path and proprietary_datatype_module and datatype_class_name:
-                                    # TODO: previously comments suggested this needs to be locked because it modifies
-                                    # the sys.path, probably true but the previous lock wasn't doing that.
-                                    try:
-                                        imported_module = __import_module(proprietary_path,
-                                                                          proprietary_datatype_module,
-                                                                          datatype_class_name)
-                                        if imported_module not in self.imported_modules:
-                                            self.imported_modules.append(imported_module)
-                                        if hasattr(imported_module, datatype_class_name):
-                                            datatype_class = getattr(imported_module, datatype_class_name)
-                                    except Exception as e:
-                                        full_path = os.path.join(proprietary_path, proprietary_datatype_module)
-                                        self.log.debug("Exception importing proprietary code file %s: %s", full_path, galaxy.util.unicodify(e))
-                                # Either the above exception was thrown because the proprietary_datatype_module is not derived from a class
-                                # in the repository, or we are loading Galaxy's datatypes. In either case we'll look in the registry.
-                                if datatype_class is None:
-                                    try:
-                                        # The datatype class name must be contained in one of the datatype modules in the Galaxy distribution.
-                                        fields = datatype_module.split('.')[1:]
-                                        module = __import__(datatype_module)
-                                        for mod in fields:
-                                            module = getattr(module, mod)
-                                        datatype_class = getattr(module, datatype_class_name)
-                                        self.log.debug('Retrieved datatype module {}:{} from the datatype registry for extension {}.'.format(str(datatype_module), datatype_class_name, extension))
-                                    except Exception:
-                                        self.log.exception('Error importing datatype module %s', str(datatype_module))
-                                        ok = False
-                        elif type_extension is not None:
-                            try:
-                                datatype_class = self.datatypes_by_extension[type_extension].__class__
-                                self.log.debug('Retrieved datatype module {} from type_extension {} for extension {}.'.format(str(datatype_class.__name__), type_extension, extension))
-                            except Exception:
-                                self.log.exception('Error determining datatype_class for type_extension %s', str(type_extension))
-                                ok = False
-                        if ok:
-                            if not deactivate:
-                                # A new tool shed repository that contains custom datatypes is being installed, and since installation is
-                                # occurring after the datatypes registry has been initialized at server startup, its contents cannot be
-                                # overridden by new introduced conflicting data types unless the value of override is True.
-                                if extension in self.datatypes_by_extension:
-                                    # Because of the way that the value of can_process_datatype was set above, we know that the value of
-                                    # override is True.
-                                    self.log.debug("Overriding conflicting datatype with extension '%s', using datatype from %s." %
-                                                   (str(extension), str(config)))
-                                if make_subclass:
-                                    datatype_class = type(datatype_class_name, (datatype_class, ), {})
-                                    if edam_format:
-                                        datatype_class.edam_format = edam_format
-                                    if edam_data:
-                                        datatype_class.edam_data = edam_data
-                                datatype_class.is_subclass = make_subclass
-                                description = elem.get("description", None)
-                                description_url = elem.get("description_url", None)
-                                datatype_instance = datatype_class()
-                                self.datatypes_by_extension[extension] = datatype_instance
-                                if mimetype is None:
-                                    # Use default mimetype per datatype specification.
-                                    mimetype = self.datatypes_by_extension[extension].get_mime()
-                                self.mimetypes_by_extension[extension] = mimetype
-                                if datatype_class.track_type:
-                                    self.available_tracks.append(extension)
-                                if display_in_upload and extension not in self.upload_file_formats:
-                                    self.upload_file_formats.append(extension)
-                                # Max file size cut off for setting optional metadata.
-                                self.datatypes_by_extension[extension].max_optional_metadata_filesize = elem.get('max_optional_metadata_filesize', None)
-                                for converter in elem.findall('converter'):
-                                    # Build the list of datatype converters which will later be loaded into the calling app's toolbox.
-                                    converter_config = converter.get('file', None)
-                                    target_datatype = converter.get('target_datatype', None)
-                                    depends_on = converter.get('depends_on', None)
-                                    if depends_on is not None and target_datatype is not None:
-                                        if extension not in self.converter_deps:
-                                            self.converter_deps[extension] = {}
-                                        self.converter_deps[extension][target_datatype] = depends_on.split(',')
-                                    if converter_config and target_datatype:
-                                        if proprietary_converter_path:
-                                            self.proprietary_converters.append((converter_config, extension, target_datatype))
-                                        else:
-                                            self.converters.append((converter_config, extension, target_datatype))
-                                # Add composite files.
-                                for composite_file in elem.findall('composite_file'):
-                                    name = composite_file.get('name', None)
-                                    if name is None:
-                                        self.log.warning("You must provide a name for your composite_file (%s)." % composite_file)
-                                    optional = composite_file.get('optional', False)
-                                    mimetype = composite_file.get('mimetype', None)
-                                    self.datatypes_by_extension[extension].add_composite_file(name, optional=optional, mimetype=mimetype)
-                                for display_app in elem.findall('display'):
-                                    if proprietary_display_path:
-                                        if elem not in self.proprietary_display_app_containers:
-                                            self.proprietary_display_app_containers.append(elem)
-                                    else:
-                                        if elem not in self.display_app_containers:
-                                            self.display_app_containers.append(elem)
-                                datatype_info_dict = {
-                                    "display_in_upload": display_in_upload,
-                                    "extension": extension,
-                                    "description": description,
-                                    "description_url": description_url,
-                                }
-                                composite_files = datatype_instance.composite_files
-                                if composite_files:
-                                    datatype_info_dict['composite_files'] = [_.dict() for _ in composite_files.values()]
-                                self.datatype_info_dicts.append(datatype_info_dict)
-
-                                for auto_compressed_type in auto_compressed_types:
-                                    compressed_extension = f"{extension}.{auto_compressed_type}"
-                                    upper_compressed_type = auto_compressed_type[0].upper() + auto_compressed_type[1:]
-                                    auto_compressed_type_name = datatype_class_name + upper_compressed_type
-                                    attributes = {}
-                                    if auto_compressed_type == "gz":
-                                        dynamic_parent = binary.GzDynamicCompressedArchive
-                                    elif auto_compressed_type == "bz2":
-                                        dynamic_parent = binary.Bz2DynamicCompressedArchive
-                                    else:
-                                        raise Exception("Unknown auto compression type [%s]" % auto_compressed_type)
-                                    attributes["file_ext"] = compressed_extension
-                                    attributes["uncompressed_datatype_instance"] = datatype_instance
-                                    compressed_datatype_class = type(auto_compressed_type_name, (datatype_class, dynamic_parent, ), attributes)
-                                    if edam_format:
-                                        compressed_datatype_class.edam_format = edam_format
-                                    if edam_data:
-                                        compressed_datatype_class.edam_data = edam_data
-                                    compressed_datatype_instance = compressed_datatype_class()
-                                    self.datatypes_by_extension[compressed_extension] = compressed_datatype_instance
-                                    if display_in_upload and compressed_extension not in self.upload_file_formats:
-                                        self.upload_file_formats.append(compressed_extension)
-                                    self.datatype_info_dicts.append({
-                                        "display_in_upload": display_in_upload,
-                                        "extension": compressed_extension,
-                                        "description": description,
-                                        "description_url": description_url,
-                                    })
-                                    self.converters.append(("%s_to_uncompressed.xml" % auto_compressed_type, compressed_extension, extension))
-                                    if datatype_class not in compressed_sniffers:
-                                        compressed_sniffers[datatype_class] = []
-                                    if sniff_compressed_types:
-                                        compressed_sniffers[datatype_class].append(compressed_datatype_instance)
-                                # Processing the new datatype elem is now complete, so make sure the element defining it is retained by appending
-                                # the new datatype to the in-memory list of datatype elems to enable persistence.
-                                self.datatype_elems.append(elem)
+                        if lazy:
+                            # Only remember how to load the datatype (and its auto compressed variants), the
+                            # datatype module is imported when one of these extensions is first looked up.
+                            load_datatype = partial(self._load_datatype, elem, config, compressed_sniffers, proprietary_converter_path, proprietary_display_path, retain_elem=False)
+                            for deferred_extension in [extension] + [f"{extension}.{t}" for t in auto_compressed_types]:
+                                self.datatypes_by_extension.defer(deferred_extension, load_datatype)
+                            self.datatype_elems.append(elem)
+                        else:
+                            self._load_datatype(elem, config, compressed_sniffers, proprietary_converter_path, proprietary_display_path)
                     else:
                         if extension is not None:
                             if dtype is not None or type_extension is not None:
@@ -375,30 +333,226 @@ class Registry:
                                         self.log.debug(f"Ignoring conflicting datatype with extension '{extension}' from {config}.")
             # Load datatype sniffers from the config - we'll do this even if one or more datatypes were not properly processed in the config
             # since sniffers are not tightly coupled with datatypes.
-            self.load_datatype_sniffers(root,
-                                        deactivate=deactivate,
-                                        handling_proprietary_datatypes=handling_proprietary_datatypes,
-                                        override=override,
-                                        compressed_sniffers=compressed_sniffers)
+            load_sniffers = partial(self.load_datatype_sniffers,
+                                    root,
+                                    deactivate=deactivate,
+                                    handling_proprietary_datatypes=handling_proprietary_datatypes,
+                                    override=override,
+                                    compressed_sniffers=compressed_sniffers)
+            if lazy:
+                self._deferred_sniffer_loads.append(load_sniffers)
+            else:
+                load_sniffers()
             self.upload_file_formats.sort()
             # Load build sites
             if use_build_sites:
                 self._load_build_sites(root)
         self.set_default_values()
+        self.converter_graph.reset()
+        if lazy:
+            self._deferred_sniffer_loads.append(self._append_to_sniff_order)
+        else:
+            self._append_to_sniff_order()
+
+    def _append_to_sniff_order(self):
+        sniff_order_classes = {type(_) for _ in self.sniff_order}
+        for datatype in self.datatypes_by_extension.values():
+            # Add a datatype only if it is not already in sniff_order, it
+            # has a sniff() method and was not defined with subclass="true".
+            # Do not add dynamic compressed types - these were carefully added or not
+            # to the sniff order in the proper position above.
+            if type(datatype) not in sniff_order_classes and \
+                    hasattr(datatype, 'sniff') and not datatype.is_subclass and \
+                    not hasattr(datatype, "uncompressed_datatype_instance"):
+                self.sniff_order.append(datatype)
+
+    @property
+    def sniff_order(self):
+        if self._deferred_sniffer_loads:
+            deferred_sniffer_loads, self._deferred_sniffer_loads = self._deferred_sniffer_loads, []
+            # Sniffers of auto compressed datatypes are registered when their datatype is loaded.
+            self.datatypes_by_extension.load_deferred()
+            for load in deferred_sniffer_loads:
+                load()
+        return self._sniff_order
 
-        def append_to_sniff_order():
-            sniff_order_classes = {type(_) for _ in self.sniff_order}
-            for datatype in self.datatypes_by_extension.values():
-                # Add a datatype only if it is not already in sniff_order, it
-                # has a sniff() method and was not defined with subclass="true".
-                # Do not add dynamic compressed types - these were carefully added or not
-                # to the sniff order in the proper position above.
-                if type(datatype) not in sniff_order_classes and \
-                        hasattr(datatype, 'sniff') and not datatype.is_subclass and \
-                        not hasattr(datatype, "uncompressed_datatype_instance"):
-                    self.sniff_order.append(datatype)
+    @sniff_order.setter
+    def sniff_order(self, sniff_order):
+        self._sniff_order = sniff_order
+
+    def _load_datatype(self, elem, config, compressed_sniffers, proprietary_converter_path, proprietary_display_path, retain_elem=True):
+        """
+        Load the datatype defined by a datatype elem of a datatypes XML file - along with its converters, composite files,
+        display application containers and auto compressed variants - into the registry.
+        """
+        # Keep a status of the process steps to enable stopping the process of handling the datatype if necessary.
+        ok = True
+        extension = self.get_extension(elem)
+        dtype = elem.get('type', None)
+        type_extension = elem.get('type_extension', None)
+        auto_compressed_types = galaxy.util.listify(elem.get('auto_compressed_types', ''))
+        sniff_compressed_types = galaxy.util.string_as_bool_or_none(elem.get("sniff_compressed_types", "None"))
+        mimetype = elem.get('mimetype', None)
+        display_in_upload = galaxy.util.string_as_bool(elem.get('display_in_upload', False))
+        make_subclass = galaxy.util.string_as_bool(elem.get('subclass', False))
+        edam_format = elem.get('edam_format', None)
+        edam_data = elem.get('edam_data', None)
+        proprietary_path = elem.get('proprietary_path', None)
+        proprietary_datatype_module = elem.get('proprietary_datatype_module', None)
+        if dtype is not None:
+            try:
+                fields = dtype.split(':')
+                datatype_module = fields[0]
+                datatype_class_name = fields[1]
+            except Exception:
+                self.log.exception('Error parsing datatype definition for dtype %s', str(dtype))
+                ok = False
+            if ok:
+                datatype_class = None
+                if proprietary_path and proprietary_datatype_module and datatype_class_name:
+                    # TODO: previously comments suggested this needs to be locked because it modifies
+                    # the sys.path, probably true but the previous lock wasn't doing that.
+                    try:
+                        imported_module = _import_module(proprietary_path,
+                                                         proprietary_datatype_module,
+                                                         datatype_class_name)
+                        if imported_module not in self.imported_modules:
+                            self.imported_modules.append(imported_module)
+                        if hasattr(imported_module, datatype_class_name):
+                            datatype_class = getattr(imported_module, datatype_class_name)
+                    except Exception as e:
+                        full_path = os.path.join(proprietary_path, proprietary_datatype_module)
+                        self.log.debug("Exception importing proprietary code file %s: %s", full_path, galaxy.util.unicodify(e))
+                # Either the above exception was thrown because the proprietary_datatype_module is not derived from a class
+                # in the repository, or we are loading Galaxy's datatypes. In either case we'll look in the registry.
+                if datatype_class is None:
+                    try:
+                        # The datatype class name must be contained in one of the datatype modules in the Galaxy distribution.
+                        fields = datatype_module.split('.')[1:]
+                        module = __import__(datatype_module)
+                        for mod in fields:
+                            module = getattr(module, mod)
+                        datatype_class = getattr(module, datatype_class_name)
+                        self.log.debug('Retrieved datatype module {}:{} from the datatype registry for extension {}.'.format(str(datatype_module), datatype_class_name, extension))
+                    except Exception:
+                        self.log.exception('Error importing datatype module %s', str(datatype_module))
+                        ok = False
+        elif type_extension is not None:
+            try:
+                datatype_class = self.datatypes_by_extension[type_extension].__class__
+                datatype_class_name = datatype_class.__name__
+                self.log.debug('Retrieved datatype module {} from type_extension {} for extension {}.'.format(str(datatype_class.__name__), type_extension, extension))
+            except Exception:
+                self.log.exception('Error determining datatype_class for type_extension %s', str(type_extension))
+                ok = False
+        if not ok:
+            return
+        # A new tool shed repository that contains custom datatypes is being installed, and since installation is
+        # occurring after the datatypes registry has been initialized at server startup, its contents cannot be
+        # overridden by new introduced conflicting data types unless the value of override is True.
+        if self.datatypes_by_extension.is_loaded(extension):
+            # Because of the way that the value of can_process_datatype was set in load_datatypes, we know that the value
+            # of override is True.
+            self.log.debug("Overriding conflicting datatype with extension '%s', using datatype from %s." %
+                           (str(extension), str(config)))
+        if make_subclass:
+            datatype_class = type(datatype_class_name, (datatype_class, ), {})
+            if edam_format:
+                datatype_class.edam_format = edam_format
+            if edam_data:
+                datatype_class.edam_data = edam_data
+        datatype_class.is_subclass = make_subclass
+        description = elem.get("description", None)
+        description_url = elem.get("description_url", None)
+        datatype_instance = datatype_class()
+        self.datatypes_by_extension[extension] = datatype_instance
+        if mimetype is None:
+            # Use default mimetype per datatype specification.
+            mimetype = self.datatypes_by_extension[extension].get_mime()
+        self.mimetypes_by_extension[extension] = mimetype
+        if datatype_class.track_type:
+            self.available_tracks.append(extension)
+        if display_in_upload and extension not in self.upload_file_formats:
+            self.upload_file_formats.append(extension)
+        # Max file size cut off for setting optional metadata.
+        self.datatypes_by_extension[extension].max_optional_metadata_filesize = elem.get('max_optional_metadata_filesize', None)
+        for converter in elem.findall('converter'):
+            # Build the list of datatype converters which will later be loaded into the calling app's toolbox.
+            converter_config = converter.get('file', None)
+            target_datatype = converter.get('target_datatype', None)
+            depends_on = converter.get('depends_on', None)
+            if depends_on is not None and target_datatype is not None:
+                if extension not in self.converter_deps:
+                    self.converter_deps[extension] = {}
+                self.converter_deps[extension][target_datatype] = depends_on.split(',')
+            if converter_config and target_datatype:
+                if proprietary_converter_path:
+                    self.proprietary_converters.append((converter_config, extension, target_datatype))
+                else:
+                    self.converters.append((converter_config, extension, target_datatype))
+        # Add composite files.
+        for composite_file in elem.findall('composite_file'):
+            name = composite_file.get('name', None)
+            if name is None:
+                self.log.warning("You must provide a name for your composite_file (%s)." % composite_file)
+            optional = composite_file.get('optional', False)
+            mimetype = composite_file.get('mimetype', None)
+            self.datatypes_by_extension[extension].add_composite_file(name, optional=optional, mimetype=mimetype)
+        for display_app in elem.findall('display'):
+            if proprietary_display_path:
+                if elem not in self.proprietary_display_app_containers:
+                    self.proprietary_display_app_containers.append(elem)
+            else:
+                if elem not in self.display_app_containers:
+                    self.display_app_containers.append(elem)
+        datatype_info_dict = {
+            "display_in_upload": display_in_upload,
+            "extension": extension,
+            "description": description,
+            "description_url": description_url,
+        }
+        composite_files = datatype_instance.composite_files
+        if composite_files:
+            datatype_info_dict['composite_files'] = [_.dict() for _ in composite_files.values()]
+        self.datatype_info_dicts.append(datatype_info_dict)
 
-        append_to_sniff_order()
+        for auto_compressed_type in auto_compressed_types:
+            compressed_extension = f"{extension}.{auto_compressed_type}"
+            upper_compressed_type = auto_compressed_type[0].upper() + auto_compressed_type[1:]
+            auto_compressed_type_name = datatype_class_name + upper_compressed_type
+            attributes = {}
+            if auto_compressed_type == "gz":
+                dynamic_parent = binary.GzDynamicCompressedArchive
+            elif auto_compressed_type == "bz2":
+                dynamic_parent = binary.Bz2DynamicCompressedArchive
+            else:
+                raise Exception("Unknown auto compression type [%s]" % auto_compressed_type)
+            attributes["file_ext"] = compressed_extension
+            attributes["uncompressed_datatype_instance"] = datatype_instance
+            compressed_datatype_class = type(auto_compressed_type_name, (datatype_class, dynamic_parent, ), attributes)
+            if edam_format:
+                compressed_datatype_class.edam_format = edam_format
+            if edam_data:
+                compressed_datatype_class.edam_data = edam_data
+            compressed_datatype_instance = compressed_datatype_class()
+            self.datatypes_by_extension[compressed_extension] = compressed_datatype_instance
+            if display_in_upload and compressed_extension not in self.upload_file_formats:
+                self.upload_file_formats.append(compressed_extension)
+            self.datatype_info_dicts.append({
+                "display_in_upload": display_in_upload,
+                "extension": compressed_extension,
+                "description": description,
+                "description_url": description_url,
+            })
+            self.converters.append(("%s_to_uncompressed.xml" % auto_compressed_type, compressed_extension, extension))
+            if datatype_class not in compressed_sniffers:
+                compressed_sniffers[datatype_class] = []
+            if sniff_compressed_types:
+                compressed_sniffers[datatype_class].append(compressed_datatype_instance)
+        if retain_elem:
+            # Processing the new datatype elem is now complete, so make sure the element defining it is retained by appending
+            # the new datatype to the in-memory list of datatype elems to enable persistence.
+            self.datatype_elems.append(elem)
 
     def _load_build_sites(self, root):
 
@@ -634,12 +788,14 @@ class Registry:
                     if source_datatype in self.datatype_converters:
                         if target_datatype in self.datatype_converters[source_datatype]:
                             del self.datatype_converters[source_datatype][target_datatype]
+                            self.converter_graph.converters_changed(source_datatype)
                     self.log.debug("Deactivated converter: %s", converter.id)
                 else:
                     toolbox.register_tool(converter)
                     if source_datatype not in self.datatype_converters:
                         self.datatype_converters[source_datatype] = OrderedDict()
                     self.datatype_converters[source_datatype][target_datatype] = converter
+                    self.converter_graph.converters_changed(source_datatype)
                     if not hasattr(toolbox.app, 'tool_cache') or converter.id in toolbox.app.tool_cache._new_tool_ids:
                         self.log.debug("Loaded converter: %s", converter.id)
             except Exception:
@@ -660,6 +816,9 @@ class Registry:
         else:
             # Load display applications defined by local datatypes_conf.xml.
             datatype_elems = self.display_app_containers
+        # Imported here since display applications pull in Cheetah, which processes that
+        # never render them (e.g. metadata jobs) should not pay for.
+        from .display_applications.application import DisplayApplication
         for elem in datatype_elems:
             extension = self.get_extension(elem)
             for display_app in elem.findall('display'):
@@ -755,7 +914,7 @@ class Registry:
     def set_default_values(self):
         # Default values.
         if not self.datatypes_by_extension:
-            self.datatypes_by_extension = {
+            self.datatypes_by_extension = DatatypesByExtension({
                 'ab1'           : binary.Ab1(),
                 'axt'           : sequence.Axt(),
                 'bam'           : binary.Bam(),
@@ -789,7 +948,7 @@ class Registry:
                 'txt'           : data.Text(),
                 'wig'           : interval.Wiggle(),
                 'xml'           : xml.GenericXml(),
-            }
+            })
             self.mimetypes_by_extension = {
                 'ab1'           : 'application/octet-stream',
                 'axt'           : 'text/plain',
@@ -830,7 +989,7 @@ class Registry:
             self.mimetypes_by_extension['data'] = 'application/octet-stream'
         # Default values - the order in which we attempt to determine data types is critical
         # because some formats are much more flexibly defined than others.
-        if len(self.sniff_order) < 1:
+        if len(self._sniff_order) < 1 and not self._deferred_sniffer_loads:
             self.sniff_order = [
                 binary.Bam(),
                 binary.Sff(),
@@ -862,18 +1021,16 @@ class Registry:
 
     def get_converters_by_datatype(self, ext):
         """Returns available converters by source type"""
-        if ext not in self._converters_by_datatype:
-            converters = OrderedDict()
-            source_datatype = type(self.get_datatype_by_extension(ext))
-            for ext2, converters_dict in self.datatype_converters.items():
-                converter_datatype = type(self.get_datatype_by_extension(ext2))
-                if issubclass(source_datatype, converter_datatype):
-                    converters.update(converters_dict)
-            # Ensure ext-level converters are present
-            if ext in self.datatype_converters.keys():
-                converters.update(self.datatype_converters[ext])
-            self._converters_by_datatype[ext] = converters
-        return self._converters_by_datatype[ext]
+        return self.converter_graph.converters(ext)
+
+    @property
+    def implicit_conversion_max_steps(self):
+        """Maximum number of converters run in sequence to convert a dataset implicitly."""
+        return getattr(self.config, "implicit_conversion_max_steps", 1) or 1
+
+    def get_conversion_path(self, source_ext, target_ext):
+        """Returns the extensions of the steps of the shortest implicit conversion, ending with target_ext, or None"""
+        return self.converter_graph.conversion_path(source_ext, target_ext, max_steps=self.implicit_conversion_max_steps)
 
     def get_converter_by_target_type(self, source_ext, target_ext):
         """Returns a converter based on source and target datatypes"""
@@ -891,10 +1048,11 @@ class Registry:
             ext = dataset_or_ext
             dataset = None
 
-        for convert_ext in self.get_converters_by_datatype(ext):
+        # Direct conversions first, then conversions in more steps if allowed.
+        for convert_ext in self.converter_graph.conversion_targets(ext, max_steps=self.implicit_conversion_max_steps):
             convert_ext_datatype = self.get_datatype_by_extension(convert_ext)
             if convert_ext_datatype is None:
-                self.log.warning(f"Datatype class not found for extension '{convert_ext}', which is used as target for conversion from datatype '{dataset.ext}'")
+                self.log.warning(f"Datatype class not found for extension '{convert_ext}', which is used as target for conversion from datatype '{ext}'")
             elif convert_ext_datatype.matches_any(accepted_formats):
                 converted_dataset = dataset and dataset.get_converted_files_by_type(convert_ext)
                 if converted_dataset:
@@ -46,7 +46,7 @@ def sniff_with_cls(cls, fname):
         return False
 
 
-def stream_url_to_file(path, file_sources=None):
+def stream_url_to_file(path, file_sources=None, timeout=None):
     prefix = "url_paste"
     if file_sources and file_sources.looks_like_uri(path):
         file_source_path = file_sources.get_file_source_path(path)
@@ -54,7 +54,10 @@ def stream_url_to_file(path, file_sources=None):
         file_source_path.file_source.realize_to(file_source_path.path, temp_name)
         return temp_name
     else:
-        page = urllib.request.urlopen(path)  # page will be .close()ed in stream_to_file
+        if timeout is not None:
+            page = urllib.request.urlopen(path, timeout=timeout)  # page will be .close()ed in stream_to_file
+        else:
+            page = urllib.request.urlopen(path)  # page will be .close()ed in stream_to_file
         temp_name = stream_to_file(page, prefix=prefix, source_encoding=util.get_charset_from_http_headers(page.headers))
         return temp_name
 
@@ -66,12 +66,13 @@ class TabularData(data.Text):
             return False
 
     def get_chunk(self, trans, dataset, offset=0, ck_size=None):
-        with compression_utils.get_fileobj(dataset.file_name) as f:
+        # Offsets are uncompressed byte offsets, chunks always end on a newline so they decode cleanly.
+        with compression_utils.get_seekable_fileobj(dataset.file_name, 'rb') as f:
             f.seek(offset)
             ck_data = f.read(ck_size or trans.app.config.display_chunk_size)
-            if ck_data and ck_data[-1] != '\n':
+            if ck_data and ck_data[-1:] != b'\n':
                 cursor = f.read(1)
-                while cursor and cursor != '\n':
+                while cursor and cursor != b'\n':
                     ck_data += cursor
                     cursor = f.read(1)
             last_read = f.tell()
@@ -252,6 +253,34 @@ class TabularData(data.Text):
         delimiter = dataset.metadata.delimiter
         return dataproviders.dataset.DatasetDictDataProvider(dataset, deliminator=delimiter, **settings)
 
+    @dataproviders.decorators.dataprovider_factory('column-batch', dataproviders.column.ColumnarBatchDataProvider.settings)
+    def column_batch_dataprovider(self, dataset, **settings):
+        """Uses column settings that are passed in, provides column oriented batches"""
+        dataset_source = dataproviders.dataset.DatasetDataProvider(dataset)
+        delimiter = dataset.metadata.delimiter
+        return dataproviders.column.ColumnarBatchDataProvider(dataset_source, deliminator=delimiter, **settings)
+
+    @dataproviders.decorators.dataprovider_factory('dataset-column-batch',
+                                                   dataproviders.column.ColumnarBatchDataProvider.settings)
+    def dataset_column_batch_dataprovider(self, dataset, **settings):
+        """Attempts to get column settings from dataset.metadata, provides column oriented batches"""
+        delimiter = dataset.metadata.delimiter
+        return dataproviders.dataset.DatasetColumnarBatchDataProvider(dataset, deliminator=delimiter, **settings)
+
+    @dataproviders.decorators.dataprovider_factory('dict-batch', dataproviders.column.DictBatchDataProvider.settings)
+    def dict_batch_dataprovider(self, dataset, **settings):
+        """Uses column settings that are passed in, provides column oriented batches"""
+        dataset_source = dataproviders.dataset.DatasetDataProvider(dataset)
+        delimiter = dataset.metadata.delimiter
+        return dataproviders.column.DictBatchDataProvider(dataset_source, deliminator=delimiter, **settings)
+
+    @dataproviders.decorators.dataprovider_factory('dataset-dict-batch',
+                                                   dataproviders.column.DictBatchDataProvider.settings)
+    def dataset_dict_batch_dataprovider(self, dataset, **settings):
+        """Attempts to get column settings from dataset.metadata, provides column oriented batches"""
+        delimiter = dataset.metadata.delimiter
+        return dataproviders.dataset.DatasetDictBatchDataProvider(dataset, deliminator=delimiter, **settings)
+
 
 @dataproviders.decorators.has_dataproviders
 class Tabular(TabularData):
@@ -602,6 +631,28 @@ class Sam(Tabular):
         settings['comment_char'] = '@'
         return super().dataset_dict_dataprovider(dataset, **settings)
 
+    @dataproviders.decorators.dataprovider_factory('column-batch', dataproviders.column.ColumnarBatchDataProvider.settings)
+    def column_batch_dataprovider(self, dataset, **settings):
+        settings['comment_char'] = '@'
+        return super().column_batch_dataprovider(dataset, **settings)
+
+    @dataproviders.decorators.dataprovider_factory('dataset-column-batch',
+                                                   dataproviders.column.ColumnarBatchDataProvider.settings)
+    def dataset_column_batch_dataprovider(self, dataset, **settings):
+        settings['comment_char'] = '@'
+        return super().dataset_column_batch_dataprovider(dataset, **settings)
+
+    @dataproviders.decorators.dataprovider_factory('dict-batch', dataproviders.column.DictBatchDataProvider.settings)
+    def dict_batch_dataprovider(self, dataset, **settings):
+        settings['comment_char'] = '@'
+        return super().dict_batch_dataprovider(dataset, **settings)
+
+    @dataproviders.decorators.dataprovider_factory('dataset-dict-batch',
+                                                   dataproviders.column.DictBatchDataProvider.settings)
+    def dataset_dict_batch_dataprovider(self, dataset, **settings):
+        settings['comment_char'] = '@'
+        return super().dataset_dict_batch_dataprovider(dataset, **settings)
+
     @dataproviders.decorators.dataprovider_factory('header', dataproviders.line.RegexLineDataProvider.settings)
     def header_dataprovider(self, dataset, **settings):
         dataset_source = dataproviders.dataset.DatasetDataProvider(dataset)
@@ -730,7 +781,7 @@ class BaseVcf(Tabular):
     MetadataElement(name="columns", default=10, desc="Number of columns", readonly=True, visible=False)
     MetadataElement(name="column_types", default=['str', 'int', 'str', 'str', 'str', 'int', 'str', 'list', 'str', 'str'], param=metadata.ColumnTypesParameter, desc="Column types", readonly=True, visible=False)
     MetadataElement(name="viz_filter_cols", desc="Score column for visualization", default=[5], param=metadata.ColumnParameter, optional=True, multiple=True, visible=False)
-    MetadataElement(name="sample_names", default=[], desc="Sample names", readonly=True, visible=False, optional=True, no_value=[])
+    MetadataElement(name="sample_names", default=[], desc="Sample names", param=metadata.SpillableParameter, readonly=True, visible=False, optional=True, no_value=[])
 
     def _sniff(self, fname_or_file_prefix):
         # Because this sniffer is run on compressed files that might be BGZF (due to the VcfGz subclass), we should
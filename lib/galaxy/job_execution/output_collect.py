@@ -72,6 +72,12 @@ class PermissionProvider:
         if permissions is not UNSET:
             self._security_agent.set_all_dataset_permissions(primary_data.dataset, permissions, new=True, flush=False)
 
+    def set_default_hda_permissions_in_bulk(self, datasets):
+        """Set the default permissions of flushed datasets with a single bulk insert."""
+        permissions = self.permissions
+        if permissions is not UNSET:
+            self._security_agent.set_new_dataset_permissions_in_bulk([(primary_data.dataset, permissions) for primary_data in datasets])
+
     def copy_dataset_permissions(self, init_from, primary_data):
         self._security_agent.copy_dataset_permissions(init_from.dataset, primary_data.dataset)
 
@@ -195,6 +201,14 @@ class JobContext(ModelPersistenceContext, BaseJobContext):
         from galaxy.work.context import WorkRequestContext
         return WorkRequestContext(self.app, user=self.user)
 
+    @property
+    def defer_peeks(self):
+        return self.app.config.defer_dataset_peeks
+
+    @property
+    def discovered_outputs_workers(self):
+        return getattr(self.app.config, "discovered_outputs_workers", 1) or 1
+
     @property
     def user(self):
         if self.job:
@@ -310,6 +324,10 @@ class SessionlessJobContext(SessionlessModelPersistenceContext, BaseJobContext):
         self.input_dbkey = input_dbkey
         self.final_job_state = final_job_state
 
+    @property
+    def defer_peeks(self):
+        return self.metadata_params.get("defer_peeks", False)
+
     def output_collection_def(self, name):
         tool_as_dict = self.metadata_params["tool"]
         output_collection_defs = tool_as_dict["output_collections"]
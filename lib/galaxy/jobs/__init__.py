@@ -1550,12 +1550,15 @@ class JobWrapper(HasResourceParameters):
             else:
                 self.external_output_metadata.load_metadata(dataset, output_name, self.sa_session, working_directory=self.working_directory, remote_metadata_directory=remote_metadata_directory)
             line_count = context.get('line_count', None)
-            try:
-                # Certain datatype's set_peek methods contain a line_count argument
-                dataset.set_peek(line_count=line_count)
-            except TypeError:
-                # ... and others don't
-                dataset.set_peek()
+            if line_count is None and self.app.config.defer_dataset_peeks:
+                dataset.defer_peek()
+            else:
+                try:
+                    # Certain datatype's set_peek methods contain a line_count argument
+                    dataset.set_peek(line_count=line_count)
+                except TypeError:
+                    # ... and others don't
+                    dataset.set_peek()
         else:
             # Handle purged datasets.
             dataset.blurb = "empty"
@@ -2098,6 +2101,8 @@ class JobWrapper(HasResourceParameters):
                                                                         job=job,
                                                                         max_metadata_value_size=self.app.config.max_metadata_value_size,
                                                                         validate_outputs=self.validate_outputs,
+                                                                        parallelize=self.app.config.parallelize_metadata,
+                                                                        defer_peeks=self.app.config.defer_dataset_peeks,
                                                                         **kwds)
         if resolve_metadata_dependencies:
             metadata_tool = self.app.toolbox.get_tool("__SET_METADATA__")
@@ -465,8 +465,8 @@ class _UnflattenedMetadataDatasetAssociationSerializer(base.ModelSerializer,
             'copied_from_history_dataset_association_id'        : self.serialize_id,
             'copied_from_library_dataset_dataset_association_id': self.serialize_id,
             'info'          : lambda i, k, **c: i.info.strip() if isinstance(i.info, str) else i.info,
-            'blurb'         : lambda i, k, **c: i.blurb,
-            'peek'          : lambda i, k, **c: i.display_peek() if i.peek and i.peek != 'no peek' else None,
+            'blurb'         : self.serialize_blurb,
+            'peek'          : self.serialize_peek,
 
             'meta_files'    : self.serialize_meta_files,
             'metadata'      : self.serialize_metadata,
@@ -503,6 +503,22 @@ class _UnflattenedMetadataDatasetAssociationSerializer(base.ModelSerializer,
             return lambda i, k, **c: serializer(i.dataset, key or k, **c)
         raise TypeError('kwarg serializer or key needed')
 
+    def serialize_blurb(self, dataset_assoc, key, **context):
+        self._set_deferred_peek(dataset_assoc)
+        return dataset_assoc.blurb
+
+    def serialize_peek(self, dataset_assoc, key, **context):
+        self._set_deferred_peek(dataset_assoc)
+        peek = dataset_assoc.peek
+        return dataset_assoc.display_peek() if peek and peek != 'no peek' else None
+
+    def _set_deferred_peek(self, dataset_assoc):
+        # deferred peeks (and blurbs) are set on first request and stored so they are only computed once
+        if dataset_assoc.ensure_peek():
+            sa_session = self.app.model.context
+            sa_session.add(dataset_assoc)
+            sa_session.flush()
+
     def serialize_meta_files(self, dataset_assoc, key, **context):
         """
         Cycle through meta files and return them as a list of dictionaries.
@@ -262,6 +262,7 @@ class ReadyForExportMarkdownDirectiveHandler(GalaxyInternalMarkdownDirectiveHand
         self.extend_history_dataset_rendering_data(hda, "name", hda.name, "")
 
     def handle_dataset_peek(self, line, hda):
+        hda.ensure_peek()
         self.extend_history_dataset_rendering_data(hda, "peek", hda.peek, "*No Dataset Peek Available*")
 
     def handle_dataset_info(self, line, hda):
@@ -384,6 +385,7 @@ class ToBasicMarkdownDirectiveHandler(GalaxyInternalMarkdownDirectiveHandler):
         return rval
 
     def handle_dataset_peek(self, line, hda):
+        hda.ensure_peek()
         if hda.peek:
             content = self.markdown_formatting_helpers.literal_via_fence(hda.peek)
         else:
@@ -51,12 +51,19 @@ class MetadataCollectionStrategy(metaclass=abc.ABCMeta):
                                 config_file=None, datatypes_config=None,
                                 job_metadata=None, provided_metadata_style=None, compute_tmp_dir=None,
                                 include_command=True, max_metadata_value_size=0,
+                                validate_outputs=False,
                                 object_store_conf=None, tool=None, job=None,
-                                kwds=None):
+                                kwds=None, parallelize=False, defer_peeks=False):
         """Setup files needed for external metadata collection.
 
         If include_command is True, return full Python command to externally compute metadata
         otherwise just the arguments to galaxy_ext.metadata.set_metadata required to build.
+
+        If parallelize is True, strategies that support it will set metadata on
+        outputs in parallel worker processes bounded by the job's ``GALAXY_SLOTS``.
+
+        If defer_peeks is True, strategies that set peeks (``extended``) defer them
+        until they are first requested.
         """
 
     @abc.abstractmethod
@@ -112,7 +119,7 @@ class PortableDirectoryMetadataGenerator(MetadataCollectionStrategy):
                                 include_command=True, max_metadata_value_size=0,
                                 validate_outputs=False,
                                 object_store_conf=None, tool=None, job=None,
-                                kwds=None):
+                                kwds=None, parallelize=False, defer_peeks=False):
         assert job_metadata, "setup_external_metadata must be supplied with job_metadata path"
         kwds = kwds or {}
         tmp_dir = _init_tmp_dir(tmp_dir)
@@ -154,6 +161,8 @@ class PortableDirectoryMetadataGenerator(MetadataCollectionStrategy):
             "provided_metadata_style": provided_metadata_style,
             "datatypes_config": datatypes_config,
             "max_metadata_value_size": max_metadata_value_size,
+            "parallelize": parallelize,
+            "defer_peeks": defer_peeks,
             "outputs": outputs,
         }
 
@@ -292,7 +301,7 @@ class JobExternalOutputMetadataWrapper(MetadataCollectionStrategy):
                                 include_command=True, max_metadata_value_size=0,
                                 validate_outputs=False,
                                 object_store_conf=None, tool=None, job=None,
-                                kwds=None):
+                                kwds=None, parallelize=False, defer_peeks=False):
         kwds = kwds or {}
         tmp_dir = _init_tmp_dir(tmp_dir)
         _assert_datatypes_config(datatypes_config)
@@ -12,6 +12,7 @@ constructed automatically).
 """
 import json
 import logging
+import multiprocessing
 import os
 import pickle
 import sys
@@ -31,6 +32,10 @@ from galaxy.util import (
 logging.basicConfig()
 log = logging.getLogger(__name__)
 
+# Set in the parent process right before forking metadata workers, so that
+# per-output closures are inherited by the workers instead of being pickled.
+_parallel_task = None
+
 
 def set_validated_state(dataset_instance):
     from galaxy.datatypes.data import validate
@@ -77,6 +82,39 @@ def set_meta_with_tool_provided(dataset_instance, file_dict, set_meta_kwds, data
                 dataset_instance.metadata.remove_key(k)
 
 
+def _run_parallel_task(args):
+    return _parallel_task(*args)
+
+
+def map_in_worker_processes(func, args_list, max_workers):
+    """Call ``func(*args)`` for each entry of ``args_list`` and return results in order.
+
+    If ``max_workers`` allows it the calls are distributed over a pool of forked
+    worker processes, otherwise they are executed serially in this process.
+    """
+    global _parallel_task
+    workers = min(max_workers, len(args_list))
+    if workers <= 1:
+        return [func(*args) for args in args_list]
+    log.debug("Distributing %d metadata tasks over %d worker processes", len(args_list), workers)
+    _parallel_task = func
+    try:
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            return pool.map(_run_parallel_task, args_list, chunksize=1)
+    finally:
+        _parallel_task = None
+
+
+def get_metadata_workers(metadata_params):
+    if not metadata_params.get("parallelize", False):
+        return 1
+    try:
+        return max(int(os.environ.get("GALAXY_SLOTS", 1)), 1)
+    except ValueError:
+        log.warning("Invalid GALAXY_SLOTS value [%s], setting metadata serially", os.environ["GALAXY_SLOTS"])
+        return 1
+
+
 def set_metadata():
     if len(sys.argv) == 1:
         set_metadata_portable()
@@ -110,6 +148,9 @@ def set_metadata_portable():
 
     object_store_conf_path = os.path.join("metadata", "object_store_conf.json")
     extended_metadata_collection = os.path.exists(object_store_conf_path)
+    # Extended metadata collection serializes all outputs through a single
+    # model export store, so only the directory strategy is parallelized.
+    max_workers = 1 if extended_metadata_collection else get_metadata_workers(metadata_params)
 
     object_store = None
     job_context = None
@@ -175,7 +216,8 @@ def set_metadata_portable():
         import_model_store = store.imported_store_for_metadata('metadata/outputs_new', object_store=object_store)
         export_store = store.DirectoryModelExportStore('metadata/outputs_populated', serialize_dataset_objects=True, for_edit=True, strip_metadata_files=False)
 
-    for output_name, output_dict in outputs.items():
+    def set_metadata_for_output(output_name, output_dict):
+        nonlocal set_meta_kwds
         if extended_metadata_collection:
             dataset_instance_id = output_dict["id"]
             dataset = import_model_store.sa_session.query(galaxy.model.HistoryDatasetAssociation).find(dataset_instance_id)
@@ -255,12 +297,15 @@ def set_metadata_portable():
                     # else:
                     #     self.external_output_metadata.load_metadata(dataset, output_name, self.sa_session, working_directory=self.working_directory, remote_metadata_directory=remote_metadata_directory)
                     line_count = context.get('line_count', None)
-                    try:
-                        # Certain datatype's set_peek methods contain a line_count argument
-                        dataset.set_peek(line_count=line_count)
-                    except TypeError:
-                        # ... and others don't
-                        dataset.set_peek()
+                    if line_count is None and metadata_params.get("defer_peeks", False):
+                        dataset.defer_peek()
+                    else:
+                        try:
+                            # Certain datatype's set_peek methods contain a line_count argument
+                            dataset.set_peek(line_count=line_count)
+                        except TypeError:
+                            # ... and others don't
+                            dataset.set_peek()
 
                 from galaxy.jobs import TOOL_PROVIDED_JOB_METADATA_KEYS
                 for context_key in TOOL_PROVIDED_JOB_METADATA_KEYS:
@@ -277,6 +322,18 @@ def set_metadata_portable():
         except Exception:
             json.dump((False, traceback.format_exc()), open(filename_results_code, 'wt+'))  # setting metadata has failed somehow
 
+    set_meta_kwds = {}
+    if max_workers > 1:
+        map_in_worker_processes(set_metadata_for_output, list(outputs.items()), max_workers)
+        if outputs:
+            # Metadata for datasets discovered in galaxy.json is set with the keywords
+            # of the last output, as happens when outputs are processed serially.
+            filename_kwds = os.path.join("metadata/metadata_kwds_%s" % list(outputs)[-1])
+            set_meta_kwds = stringify_dictionary_keys(json.load(open(filename_kwds)))
+    else:
+        for output_name, output_dict in outputs.items():
+            set_metadata_for_output(output_name, output_dict)
+
     if extended_metadata_collection:
         # discover extra outputs...
         from galaxy.job_execution.output_collect import collect_dynamic_outputs, collect_primary_datasets, SessionlessJobContext
@@ -308,7 +365,7 @@ def set_metadata_portable():
 
     if export_store:
         export_store._finalize()
-    write_job_metadata(tool_job_working_directory, job_metadata, set_meta, tool_provided_metadata)
+    write_job_metadata(tool_job_working_directory, job_metadata, set_meta, tool_provided_metadata, max_workers=max_workers)
 
 
 def set_metadata_legacy():
@@ -381,7 +438,7 @@ def validate_and_load_datatypes_config(datatypes_config):
         sys.exit(1)
     import galaxy.datatypes.registry
     datatypes_registry = galaxy.datatypes.registry.Registry()
-    datatypes_registry.load_datatypes(root_dir=galaxy_root, config=datatypes_config, use_build_sites=False, use_converters=False, use_display_applications=False)
+    datatypes_registry.load_datatypes(root_dir=galaxy_root, config=datatypes_config, use_build_sites=False, use_converters=False, use_display_applications=False, lazy=True)
     galaxy.model.set_datatypes_registry(datatypes_registry)
     return datatypes_registry
 
@@ -390,8 +447,9 @@ def load_job_metadata(job_metadata, provided_metadata_style):
     return parse_tool_provided_metadata(job_metadata, provided_metadata_style=provided_metadata_style)
 
 
-def write_job_metadata(tool_job_working_directory, job_metadata, set_meta, tool_provided_metadata):
-    for i, file_dict in enumerate(tool_provided_metadata.get_new_datasets_for_metadata_collection(), start=1):
+def write_job_metadata(tool_job_working_directory, job_metadata, set_meta, tool_provided_metadata, max_workers=1):
+
+    def metadata_for_new_dataset(i, file_dict):
         filename = file_dict["filename"]
         new_dataset_filename = os.path.join(tool_job_working_directory, "working", filename)
         new_dataset = galaxy.model.Dataset(id=-i, external_filename=new_dataset_filename)
@@ -401,7 +459,13 @@ def write_job_metadata(tool_job_working_directory, job_metadata, set_meta, tool_
         new_dataset.state = new_dataset.states.OK
         new_dataset_instance = galaxy.model.HistoryDatasetAssociation(id=-i, dataset=new_dataset, extension=file_dict.get('ext', 'data'))
         set_meta(new_dataset_instance, file_dict)
-        file_dict['metadata'] = json.loads(new_dataset_instance.metadata.to_JSON_dict())  # storing metadata in external form, need to turn back into dict, then later jsonify
+        return new_dataset_instance.metadata.to_JSON_dict()
+
+    new_datasets = list(tool_provided_metadata.get_new_datasets_for_metadata_collection())
+    args_list = [(i, file_dict) for i, file_dict in enumerate(new_datasets, start=1)]
+    # Results are merged back in the order of the datasets in galaxy.json, regardless of which worker computed them.
+    for file_dict, metadata_json in zip(new_datasets, map_in_worker_processes(metadata_for_new_dataset, args_list, max_workers)):
+        file_dict['metadata'] = json.loads(metadata_json)  # storing metadata in external form, need to turn back into dict, then later jsonify
 
     tool_provided_metadata.rewrite()
     clear_mappers()
@@ -1813,9 +1813,11 @@ class History(HasTags, Dictifiable, UsesAnnotations, HasName, RepresentById):
         """
         optimize = len(datasets) > 1 and parent_id is None and set_hid
         if optimize:
-            self.__add_datasets_optimized(datasets, genome_build=genome_build)
             if quota and self.user:
+                # Computed before hids are reserved, which commits and expires the datasets.
                 disk_usage = sum([d.get_total_size() for d in datasets if is_hda(d)])
+            self.__add_datasets_optimized(datasets, genome_build=genome_build)
+            if quota and self.user:
                 self.user.adjust_total_disk_usage(disk_usage)
             sa_session.add_all(datasets)
             if flush:
@@ -2596,12 +2598,13 @@ class DatasetInstance:
     def __init__(self, id=None, hid=None, name=None, info=None, blurb=None, peek=None, tool_version=None, extension=None,
                  dbkey=None, metadata=None, history=None, dataset=None, deleted=False, designation=None,
                  parent_id=None, validated_state='unknown', validated_state_message=None, visible=True, create_dataset=False, sa_session=None,
-                 extended_metadata=None, flush=True):
+                 extended_metadata=None, flush=True, peek_deferred=False):
         self.name = name or "Unnamed dataset"
         self.id = id
         self.info = info
         self.blurb = blurb
         self.peek = peek
+        self.peek_deferred = peek_deferred
         self.tool_version = tool_version
         self.extension = extension
         self.designation = designation
@@ -2787,7 +2790,34 @@ class DatasetInstance:
             return 'data'
 
     def set_peek(self, **kwd):
-        return self.datatype.set_peek(self, **kwd)
+        rval = self.datatype.set_peek(self, **kwd)
+        self.peek_deferred = False
+        return rval
+
+    def defer_peek(self):
+        """
+        Postpone setting the peek and blurb of this dataset until ensure_peek() is
+        called, e.g. when a serializer needs the peek.
+        """
+        self.peek = None
+        self.peek_deferred = True
+
+    def ensure_peek(self):
+        """
+        Set the peek and blurb of this dataset if they were deferred.
+
+        Returns True if the peek was set, the new values only need to be flushed
+        to be cached.
+        """
+        if not self.peek_deferred:
+            return False
+        try:
+            self.set_peek()
+        except Exception:
+            # keep the peek deferred, it will be tried again on the next request
+            log.exception("Failed to set deferred peek of dataset instance %s", self.id)
+            return False
+        return True
 
     def init_meta(self, copy_from=None):
         return self.datatype.init_meta(self, copy_from=copy_from)
@@ -2837,12 +2867,18 @@ class DatasetInstance:
         """
         # See if we can convert the dataset
         if target_ext not in self.get_converter_types():
-            raise NoConverterException(f"Conversion from '{self.extension}' to '{target_ext}' not possible")
+            conversion_path = _get_datatypes_registry().get_conversion_path(self.extension, target_ext)
+            if conversion_path is None:
+                raise NoConverterException(f"Conversion from '{self.extension}' to '{target_ext}' not possible")
+            return self._get_converted_dataset_in_steps(trans, conversion_path, target_context=target_context, history=history)
         # See if converted dataset already exists, either in metadata in conversions.
         converted_dataset = self.get_metadata_dataset(target_ext)
         if converted_dataset:
             return converted_dataset
         converted_dataset = self.get_converted_files_by_type(target_ext)
+        if converted_dataset:
+            return converted_dataset
+        converted_dataset = self._get_shared_converted_dataset(trans, target_ext, history=history)
         if converted_dataset:
             return converted_dataset
         deps = {}
@@ -2879,6 +2915,91 @@ class DatasetInstance:
         session.flush()
         return new_dataset
 
+    def _get_shared_converted_dataset(self, trans, target_ext, history=None):
+        """
+        Reuse a conversion to ``target_ext`` of any other HDA or LDDA sharing this
+        dataset's underlying dataset, made by the current version of the converter
+        and accessible to the current user, by copying it into the history and
+        remembering the copy as a conversion of this dataset.
+        """
+        history = history or trans.history
+        if history is None or self.dataset_id is None:
+            return None
+        converter = _get_datatypes_registry().get_converter_by_target_type(self.extension, target_ext)
+        if converter is None:
+            return None
+        sa_session = trans.sa_session
+        icda = ImplicitlyConvertedDatasetAssociation.table
+        hda = HistoryDatasetAssociation.table
+        sharing_hda_ids = select([hda.c.id]).where(hda.c.dataset_id == self.dataset_id)
+        sharing_ldda_ids = select([LibraryDatasetDatasetAssociation.table.c.id]).where(
+            LibraryDatasetDatasetAssociation.table.c.dataset_id == self.dataset_id)
+        candidates = sa_session.query(HistoryDatasetAssociation).join(
+            icda, icda.c.hda_id == hda.c.id
+        ).join(
+            Dataset, Dataset.table.c.id == hda.c.dataset_id
+        ).filter(
+            and_(
+                icda.c.type == target_ext,
+                icda.c.deleted != true(),
+                or_(icda.c.hda_parent_id.in_(sharing_hda_ids), icda.c.ldda_parent_id.in_(sharing_ldda_ids)),
+                hda.c.deleted != true(),
+                hda.c.purged != true(),
+                not_(Dataset.table.c.state.in_([Dataset.states.ERROR, Dataset.states.DISCARDED, Dataset.states.PAUSED])),
+            )
+        ).order_by(hda.c.id.desc()).limit(10)
+        user_roles = None
+        for candidate in candidates:
+            creating_job = candidate.creating_job
+            if creating_job is None or creating_job.tool_id != converter.id or creating_job.tool_version != converter.version:
+                continue
+            if user_roles is None:
+                user_roles = trans.get_current_user_roles()
+            if not trans.app.security_agent.can_access_dataset(user_roles, candidate.dataset):
+                continue
+            converted_dataset = candidate.copy(copy_hid=False, flush=False)
+            converted_dataset.visible = False
+            history.add_dataset(converted_dataset, set_hid=False)
+            assoc = ImplicitlyConvertedDatasetAssociation(parent=self, file_type=target_ext, dataset=converted_dataset, metadata_safe=False)
+            sa_session.add(converted_dataset)
+            sa_session.add(assoc)
+            sa_session.flush()
+            return converted_dataset
+        return None
+
+    def _get_converted_dataset_in_steps(self, trans, conversion_path, target_context=None, history=None):
+        """
+        Convert the dataset in multiple steps, every step converting the result of the
+        previous one, and remember the final result as a conversion of this dataset.
+
+        The final result keeps a single parent: the association recording it as a
+        conversion of the last intermediate dataset is moved to this dataset.
+        """
+        target_ext = conversion_path[-1]
+        converted_dataset = self.get_converted_files_by_type(target_ext)
+        if converted_dataset:
+            return converted_dataset
+        step_dataset = converted_dataset = self
+        for step_ext in conversion_path:
+            step_dataset, converted_dataset = converted_dataset, converted_dataset.get_converted_dataset(trans, step_ext, target_context=target_context, history=history)
+            if converted_dataset is None:
+                # a dependency of the step's converter is still being converted
+                return None
+        for assoc in converted_dataset.implicitly_converted_parent_datasets:
+            if not assoc.deleted and assoc.type == target_ext and step_dataset in (assoc.parent_hda, assoc.parent_ldda):
+                assoc.parent_hda = assoc.parent_ldda = None
+                if isinstance(self, HistoryDatasetAssociation):
+                    assoc.parent_hda = self
+                else:
+                    assoc.parent_ldda = self
+                break
+        else:
+            assoc = ImplicitlyConvertedDatasetAssociation(parent=self, file_type=target_ext, dataset=converted_dataset, metadata_safe=False)
+        session = trans.sa_session
+        session.add(assoc)
+        session.flush()
+        return converted_dataset
+
     def copy_attributes(self, new_dataset):
         """
         Copies attributes to a new datasets, used for implicit conversions
@@ -3079,6 +3200,7 @@ class DatasetInstance:
             info=unicodify(self.info),
             blurb=self.blurb,
             peek=self.peek,
+            peek_deferred=self.peek_deferred,
             extension=self.extension,
             metadata=metadata,
             designation=self.designation,
@@ -3165,6 +3287,7 @@ class HistoryDatasetAssociation(DatasetInstance, HasTags, Dictifiable, UsesAnnot
                                         info=self.info,
                                         blurb=self.blurb,
                                         peek=self.peek,
+                                        peek_deferred=self.peek_deferred,
                                         tool_version=self.tool_version,
                                         extension=self.extension,
                                         dbkey=self.dbkey,
@@ -3226,6 +3349,7 @@ class HistoryDatasetAssociation(DatasetInstance, HasTags, Dictifiable, UsesAnnot
                                                 info=self.info,
                                                 blurb=self.blurb,
                                                 peek=self.peek,
+                                                peek_deferred=self.peek_deferred,
                                                 tool_version=self.tool_version,
                                                 extension=self.extension,
                                                 dbkey=self.dbkey,
@@ -3343,6 +3467,7 @@ class HistoryDatasetAssociation(DatasetInstance, HasTags, Dictifiable, UsesAnnot
         # other model classes.
         original_rval = super().to_dict(view=view)
         hda = self
+        hda.ensure_peek()
         rval = dict(id=hda.id,
                     hda_ldda='hda',
                     uuid=(lambda uuid: str(uuid) if uuid else None)(hda.dataset.uuid),
@@ -3657,6 +3782,7 @@ class LibraryDataset(RepresentById):
         # display in other objects, we can't use the simpler method used by
         # other model classes.
         ldda = self.library_dataset_dataset_association
+        ldda.ensure_peek()
         rval = dict(id=self.id,
                     ldda_id=ldda.id,
                     parent_library_id=self.folder.parent_library.id,
@@ -3715,6 +3841,7 @@ class LibraryDatasetDatasetAssociation(DatasetInstance, HasName, RepresentById):
                                         info=self.info,
                                         blurb=self.blurb,
                                         peek=self.peek,
+                                        peek_deferred=self.peek_deferred,
                                         tool_version=self.tool_version,
                                         extension=self.extension,
                                         dbkey=self.dbkey,
@@ -3745,6 +3872,7 @@ class LibraryDatasetDatasetAssociation(DatasetInstance, HasName, RepresentById):
                                                 info=self.info,
                                                 blurb=self.blurb,
                                                 peek=self.peek,
+                                                peek_deferred=self.peek_deferred,
                                                 tool_version=self.tool_version,
                                                 extension=self.extension,
                                                 dbkey=self.dbkey,
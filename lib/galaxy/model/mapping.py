@@ -230,6 +230,7 @@ model.HistoryDatasetAssociation.table = Table(
     Column("info", TrimmedString(255)),
     Column("blurb", TrimmedString(255)),
     Column("peek", TEXT, key="_peek"),
+    Column("peek_deferred", Boolean, default=False),
     Column("tool_version", TEXT),
     Column("extension", TrimmedString(64)),
     Column("metadata", MetadataType(), key="_metadata"),
@@ -508,6 +509,7 @@ model.LibraryDatasetDatasetAssociation.table = Table(
     Column("info", TrimmedString(255)),
     Column("blurb", TrimmedString(255)),
     Column("peek", TEXT, key="_peek"),
+    Column("peek_deferred", Boolean, default=False),
     Column("tool_version", TEXT),
     Column("extension", TrimmedString(64)),
     Column("metadata", MetadataType(), key="_metadata"),
@@ -2852,7 +2854,7 @@ model.WorkflowInvocation.update = _workflow_invocation_update
 
 def init(file_path, url, engine_options=None, create_tables=False, map_install_models=False,
         database_query_profiling_proxy=False, object_store=None, trace_logger=None, use_pbkdf2=True,
-        slow_query_log_threshold=0, thread_local_log=None, log_query_counts=False):
+        slow_query_log_threshold=0, thread_local_log=None, log_query_counts=False, metadata_spill_threshold=0):
     """Connect mappings to the database"""
     if engine_options is None:
         engine_options = {}
@@ -2862,6 +2864,8 @@ def init(file_path, url, engine_options=None, create_tables=False, map_install_m
     model.Dataset.object_store = object_store
     # Use PBKDF2 password hashing?
     model.User.use_pbkdf2 = use_pbkdf2
+    # Store large metadata values in metadata files?
+    model.metadata.SpillableParameter.spill_threshold = metadata_spill_threshold
     # Load the appropriate db module
     engine = build_engine(url, engine_options, database_query_profiling_proxy, trace_logger, slow_query_log_threshold, thread_local_log=thread_local_log, log_query_counts=log_query_counts)
 
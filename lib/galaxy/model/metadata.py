@@ -29,6 +29,7 @@ from galaxy.util.object_wrapper import sanitize_lists_to_string
 log = logging.getLogger(__name__)
 
 STATEMENTS = "__galaxy_statements__"  # this is the name of the property in a Datatype class where new metadata spec element Statements are stored
+SPILLED_METADATA_FILE_KEY = "__spilled_metadata_file__"  # key of the MetadataFile id stored in place of a spilled metadata value
 
 
 class Statement:
@@ -118,7 +119,10 @@ class MetadataCollection:
             return self.set_parent(value)
         else:
             if name in self.spec:
-                self.parent._metadata[name] = self.spec[name].unwrap(value)
+                value = self.spec[name].unwrap(value)
+                if isinstance(self.spec[name].param, SpillableParameter):
+                    value = self.spec[name].param.spill(value, self.parent)
+                self.parent._metadata[name] = value
             else:
                 self.parent._metadata[name] = value
 
@@ -602,6 +606,71 @@ class FileParameter(MetadataParameter):
             return MetadataTempFile(**kwds)
 
 
+class SpillableParameter(MetadataParameter):
+    """
+    Metadata parameter for values that can become very large, like the
+    reference names of alignments. Values whose JSON representation is larger
+    than ``spill_threshold`` bytes are stored in a MetadataFile, only the id of
+    which is kept with the metadata of the dataset, and loaded when accessed.
+    """
+    # Overwritten from the metadata_spill_threshold option, 0 keeps all values with the dataset
+    spill_threshold = 0
+
+    @classmethod
+    def is_spilled(cls, value):
+        return isinstance(value, dict) and SPILLED_METADATA_FILE_KEY in value
+
+    def wrap(self, value, session):
+        if not self.is_spilled(value):
+            return value
+        mf = session.query(galaxy.model.MetadataFile).get(value[SPILLED_METADATA_FILE_KEY]) if session else None
+        if mf is None:
+            return copy.deepcopy(self.spec.no_value)
+        if not hasattr(mf, "_spilled_value"):
+            with open(mf.file_name) as fh:
+                mf._spilled_value = json.load(fh)
+        return mf._spilled_value
+
+    def make_copy(self, value, target_context=None, source_context=None):
+        value = self.wrap(value, object_session(target_context.parent))
+        return self.spill(copy.deepcopy(value), target_context.parent)
+
+    def from_external_value(self, value, parent):
+        return self.spill(value, parent)
+
+    def spill(self, value, parent):
+        """
+        Return the value to store with the metadata of ``parent``, writing
+        ``value`` to a MetadataFile if it is too large.
+        """
+        if not self.spill_threshold or self.is_spilled(value):
+            return value
+        sa_session = object_session(parent)
+        if sa_session is None or not getattr(parent.dataset, "object_store", None):
+            return value
+        serialized = json.dumps(value)
+        if len(serialized) <= self.spill_threshold:
+            return value
+        mf = None
+        current_value = parent._metadata.get(self.spec.name)
+        if self.is_spilled(current_value):
+            mf = sa_session.query(galaxy.model.MetadataFile).get(current_value[SPILLED_METADATA_FILE_KEY])
+        if mf is None:
+            mf = galaxy.model.MetadataFile(name=self.spec.name, dataset=parent)
+            sa_session.add(mf)
+            sa_session.flush()  # flush to assign id
+        with tempfile.NamedTemporaryFile(mode="w", prefix="metadata_spilled_", delete=False) as fh:
+            fh.write(serialized)
+        parent.dataset.object_store.update_from_file(mf,
+                                                     file_name=fh.name,
+                                                     extra_dir='_metadata_files',
+                                                     extra_dir_at_root=True,
+                                                     alt_name=os.path.basename(mf.file_name))
+        os.unlink(fh.name)
+        mf._spilled_value = value
+        return {SPILLED_METADATA_FILE_KEY: mf.id}
+
+
 # This class is used when a database file connection is not available
 class MetadataTempFile:
     tmp_dir = 'database/tmp'  # this should be overwritten as necessary in calling scripts
@@ -664,5 +733,6 @@ __all__ = (
     "DictParameter",
     "PythonObjectParameter",
     "FileParameter",
+    "SpillableParameter",
     "MetadataTempFile",
 )
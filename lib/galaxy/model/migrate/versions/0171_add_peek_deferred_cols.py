@@ -0,0 +1,32 @@
+"""
+Migration script to add a 'peek_deferred' column to the 'history_dataset_association'
+and 'library_dataset_dataset_association' tables.
+"""
+
+import logging
+
+from sqlalchemy import Boolean, Column, MetaData
+
+from galaxy.model.migrate.versions.util import add_column, drop_column
+
+log = logging.getLogger(__name__)
+metadata = MetaData()
+
+TABLES = ['history_dataset_association', 'library_dataset_dataset_association']
+
+
+def upgrade(migrate_engine):
+    print(__doc__)
+    metadata.bind = migrate_engine
+    metadata.reflect()
+
+    for table in TABLES:
+        add_column(Column("peek_deferred", Boolean, default=False), table, metadata)
+
+
+def downgrade(migrate_engine):
+    metadata.bind = migrate_engine
+    metadata.reflect()
+
+    for table in TABLES:
+        drop_column('peek_deferred', table, metadata)
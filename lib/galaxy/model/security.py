@@ -1,9 +1,11 @@
 import logging
 import socket
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from sqlalchemy import and_, false, not_, or_
-from sqlalchemy.orm import eagerload_all
+from sqlalchemy.orm import eagerload_all, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 
 import galaxy.model
 from galaxy.security import Action, get_permitted_actions, RBACAgent
@@ -813,16 +815,7 @@ class GalaxyRBACAgent(RBACAgent):
         Permission looks like: { Action : [ Role, Role ] }
         """
         # Make sure that DATASET_MANAGE_PERMISSIONS is associated with at least 1 role
-        has_dataset_manage_permissions = False
-        for action, roles in permissions.items():
-            if isinstance(action, Action):
-                if action == self.permitted_actions.DATASET_MANAGE_PERMISSIONS and roles:
-                    has_dataset_manage_permissions = True
-                    break
-            elif action == self.permitted_actions.DATASET_MANAGE_PERMISSIONS.action and roles:
-                has_dataset_manage_permissions = True
-                break
-        if not has_dataset_manage_permissions:
+        if not self._has_dataset_manage_permissions(permissions):
             return "At least 1 role must be associated with manage permissions on this dataset."
         flush_needed = False
         # Delete all of the current permissions on the dataset
@@ -846,6 +839,82 @@ class GalaxyRBACAgent(RBACAgent):
             self.sa_session.flush()
         return ""
 
+    def set_new_dataset_permissions_in_bulk(self, dataset_permissions):
+        """
+        Set the permissions of many new datasets using a single bulk insert.
+
+        ``dataset_permissions`` is a list of (dataset, permissions) pairs, where
+        permissions look like { Action : [ Role, Role ] }. The datasets need to
+        have been flushed. Like in `set_all_dataset_permissions` permissions
+        without a role that may manage the dataset permissions are skipped.
+        """
+        rows = []
+        for dataset, permissions in dataset_permissions:
+            if not self._has_dataset_manage_permissions(permissions):
+                continue
+            for action, roles in permissions.items():
+                if isinstance(action, Action):
+                    action = action.action
+                for role in roles:
+                    role_id = galaxy.model.cached_id(role) if hasattr(role, "id") else role
+                    rows.append(dict(action=action, dataset_id=galaxy.model.cached_id(dataset), role_id=role_id))
+        if rows:
+            # A core insert, unlike bulk_insert_mappings, does not expire the objects of the session
+            self.sa_session.execute(self.model.DatasetPermissions.table.insert(), rows)
+
+    def set_new_library_item_permissions_in_bulk(self, library_items, permissions):
+        """
+        Set the same permissions on many new library datasets or library dataset
+        dataset associations using a single bulk insert.
+
+        Permissions look like { Action : [ Role, Role ] }. The library items
+        need to have been flushed.
+        """
+        rows = defaultdict(list)
+        for library_item in library_items:
+            if isinstance(library_item, self.model.LibraryDataset):
+                permission_class, item_column = self.model.LibraryDatasetPermissions, 'library_dataset_id'
+            elif isinstance(library_item, self.model.LibraryDatasetDatasetAssociation):
+                permission_class, item_column = self.model.LibraryDatasetDatasetAssociationPermissions, 'library_dataset_dataset_association_id'
+            else:
+                raise Exception('Invalid class (%s) specified for library_item' % library_item.__class__.__name__)
+            for action, roles in permissions.items():
+                if isinstance(action, Action):
+                    action = action.action
+                for role in roles:
+                    role_id = galaxy.model.cached_id(role) if hasattr(role, "id") else role
+                    rows[permission_class].append({'action': action, item_column: galaxy.model.cached_id(library_item), 'role_id': role_id})
+        for permission_class, permission_rows in rows.items():
+            self.sa_session.execute(permission_class.table.insert(), permission_rows)
+
+    def _has_dataset_manage_permissions(self, permissions):
+        for action, roles in permissions.items():
+            if isinstance(action, Action):
+                if action == self.permitted_actions.DATASET_MANAGE_PERMISSIONS and roles:
+                    return True
+            elif action == self.permitted_actions.DATASET_MANAGE_PERMISSIONS.action and roles:
+                return True
+        return False
+
+    def prefetch_dataset_permissions(self, datasets, chunk_size=1000):
+        """
+        Load the permissions of ``datasets`` with one query per ``chunk_size`` datasets.
+
+        Checking access to and deriving permissions from many datasets otherwise
+        loads the permissions of every dataset separately.
+        """
+        datasets_by_id = {dataset.id: dataset for dataset in datasets if dataset.id is not None and 'actions' not in dataset.__dict__}
+        dataset_ids = list(datasets_by_id)
+        for i in range(0, len(dataset_ids), chunk_size):
+            chunk = dataset_ids[i:i + chunk_size]
+            actions = defaultdict(list)
+            query = self.sa_session.query(self.model.DatasetPermissions).options(joinedload('role')).filter(
+                self.model.DatasetPermissions.table.c.dataset_id.in_(chunk))
+            for dataset_permission in query:
+                actions[dataset_permission.dataset_id].append(dataset_permission)
+            for dataset_id in chunk:
+                set_committed_value(datasets_by_id[dataset_id], 'actions', actions[dataset_id])
+
     def set_dataset_permission(self, dataset, permission={}):
         """
         Set a specific permission on a dataset, leaving all other current permissions on the dataset alone.
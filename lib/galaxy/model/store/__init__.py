@@ -224,6 +224,7 @@ class ModelImportStore(metaclass=abc.ABCMeta):
                     "info",
                     "blurb",
                     "peek",
+                    "peek_deferred",
                     "designation",
                     "visible",
                     "metadata",
@@ -254,6 +255,7 @@ class ModelImportStore(metaclass=abc.ABCMeta):
                                                                        info=dataset_attrs['info'],
                                                                        blurb=dataset_attrs['blurb'],
                                                                        peek=dataset_attrs['peek'],
+                                                                       peek_deferred=dataset_attrs.get('peek_deferred', False),
                                                                        designation=dataset_attrs['designation'],
                                                                        visible=dataset_attrs['visible'],
                                                                        deleted=dataset_attrs.get('deleted', False),
@@ -270,6 +272,7 @@ class ModelImportStore(metaclass=abc.ABCMeta):
                                                                               info=dataset_attrs['info'],
                                                                               blurb=dataset_attrs['blurb'],
                                                                               peek=dataset_attrs['peek'],
+                                                                              peek_deferred=dataset_attrs.get('peek_deferred', False),
                                                                               designation=dataset_attrs['designation'],
                                                                               visible=dataset_attrs['visible'],
                                                                               deleted=dataset_attrs.get('deleted', False),
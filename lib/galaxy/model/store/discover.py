@@ -12,7 +12,13 @@ from collections import (
     namedtuple,
     OrderedDict
 )
+from concurrent.futures import ThreadPoolExecutor
 
+from sqlalchemy.orm import (
+    joinedload,
+    undefer,
+)
+from sqlalchemy.orm.attributes import set_committed_value
 
 import galaxy.model
 from galaxy import util
@@ -37,6 +43,9 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
     required for datasets and other potential model objects.
     """
 
+    # Number of collection elements persisted with a single flush.
+    discovered_elements_batch_size = 1000
+
     def create_dataset(
         self,
         ext,
@@ -58,6 +67,7 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
         hashes=None,
         created_from_basename=None,
         final_job_state='ok',
+        set_default_permissions=True,
     ):
         tag_list = tag_list or []
         sources = sources or []
@@ -95,7 +105,7 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
                 if init_from:
                     self.permission_provider.copy_dataset_permissions(init_from, primary_data)
                     primary_data.state = init_from.state
-                else:
+                elif set_default_permissions:
                     self.permission_provider.set_default_hda_permissions(primary_data)
             else:
                 ld = galaxy.model.LibraryDataset(folder=library_folder, name=name)
@@ -173,42 +183,50 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
             primary_data.info = info
 
         if filename:
-            self.set_datasets_metadata(datasets=[primary_data], datasets_attributes=[dataset_attributes])
+            self.set_datasets_metadata(datasets=[primary_data], datasets_attributes=[dataset_attributes], defer_peeks=self.defer_peeks)
 
         return primary_data
 
     @staticmethod
-    def set_datasets_metadata(datasets, datasets_attributes=None):
+    def set_datasets_metadata(datasets, datasets_attributes=None, defer_peeks=False):
         datasets_attributes = datasets_attributes or [{} for _ in datasets]
         for primary_data, dataset_attributes in zip(datasets, datasets_attributes):
-            # add tool/metadata provided information
-            if dataset_attributes:
-                # TODO: discover_files should produce a match that encorporates this -
-                # would simplify ToolProvidedMetadata interface and eliminate this
-                # crap path.
-                dataset_att_by_name = dict(ext='extension')
-                for att_set in ['name', 'info', 'ext', 'dbkey']:
-                    dataset_att_name = dataset_att_by_name.get(att_set, att_set)
-                    setattr(primary_data, dataset_att_name, dataset_attributes.get(att_set, getattr(primary_data, dataset_att_name)))
-
-            try:
-                metadata_dict = dataset_attributes.get('metadata', None)
-                if metadata_dict:
-                    if "dbkey" in dataset_attributes:
-                        metadata_dict["dbkey"] = dataset_attributes["dbkey"]
-                    # branch tested with tool_provided_metadata_3 / tool_provided_metadata_10
-                    primary_data.metadata.from_JSON_dict(json_dict=metadata_dict)
-                else:
-                    primary_data.set_meta()
-            except Exception:
-                if primary_data.state == galaxy.model.HistoryDatasetAssociation.states.OK:
-                    primary_data.state = galaxy.model.HistoryDatasetAssociation.states.FAILED_METADATA
-                log.exception("Exception occured while setting metdata")
-
-            try:
-                primary_data.set_peek()
-            except Exception:
-                log.exception("Exception occured while setting dataset peek")
+            ModelPersistenceContext.set_dataset_metadata(primary_data, dataset_attributes, defer_peeks=defer_peeks)
+
+    @staticmethod
+    def set_dataset_metadata(primary_data, dataset_attributes=None, defer_peeks=False):
+        dataset_attributes = dataset_attributes or {}
+        # add tool/metadata provided information
+        if dataset_attributes:
+            # TODO: discover_files should produce a match that encorporates this -
+            # would simplify ToolProvidedMetadata interface and eliminate this
+            # crap path.
+            dataset_att_by_name = dict(ext='extension')
+            for att_set in ['name', 'info', 'ext', 'dbkey']:
+                dataset_att_name = dataset_att_by_name.get(att_set, att_set)
+                setattr(primary_data, dataset_att_name, dataset_attributes.get(att_set, getattr(primary_data, dataset_att_name)))
+
+        try:
+            metadata_dict = dataset_attributes.get('metadata', None)
+            if metadata_dict:
+                if "dbkey" in dataset_attributes:
+                    metadata_dict["dbkey"] = dataset_attributes["dbkey"]
+                # branch tested with tool_provided_metadata_3 / tool_provided_metadata_10
+                primary_data.metadata.from_JSON_dict(json_dict=metadata_dict)
+            else:
+                primary_data.set_meta()
+        except Exception:
+            if primary_data.state == galaxy.model.HistoryDatasetAssociation.states.OK:
+                primary_data.state = galaxy.model.HistoryDatasetAssociation.states.FAILED_METADATA
+            log.exception("Exception occured while setting metdata")
+
+        if defer_peeks:
+            primary_data.defer_peek()
+            return
+        try:
+            primary_data.set_peek()
+        except Exception:
+            log.exception("Exception occured while setting dataset peek")
 
     def populate_collection_elements(self, collection, root_collection_builder, filenames, name=None, metadata_source_name=None, final_job_state='ok'):
         # TODO: allow configurable sorting.
@@ -219,8 +237,22 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
         if name is None:
             name = "unnamed output"
 
+        # Elements are persisted in batches: datasets, tags and job associations of a batch are
+        # built in memory and written with a single flush, default permissions with a bulk insert.
+        discovered_files = list(filenames.items())
+        batch_size = self.discovered_elements_batch_size
+        for i in range(0, len(discovered_files), batch_size):
+            self._populate_collection_elements_batch(
+                root_collection_builder,
+                discovered_files[i:i + batch_size],
+                name=name,
+                metadata_source_name=metadata_source_name,
+                final_job_state=final_job_state,
+            )
+
+    def _populate_collection_elements_batch(self, root_collection_builder, discovered_files, name, metadata_source_name, final_job_state):
         element_datasets = {'element_identifiers': [], 'datasets': [], 'tag_lists': [], 'paths': [], 'extra_files': []}
-        for filename, discovered_file in filenames.items():
+        for filename, discovered_file in discovered_files:
             create_dataset_timer = ExecutionTimer()
             fields_match = discovered_file.match
             if not fields_match:
@@ -256,6 +288,7 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
                 hashes=hashes,
                 created_from_basename=created_from_basename,
                 final_job_state=final_job_state,
+                set_default_permissions=False,
             )
             log.debug(
                 "(%s) Created dynamic collection dataset for path [%s] with element identifier [%s] for output [%s] %s",
@@ -284,16 +317,74 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
             self.add_output_dataset_association(association_name, dataset)
 
         self.flush()
-        self.update_object_store_with_datasets(datasets=element_datasets['datasets'], paths=element_datasets['paths'], extra_files=element_datasets['extra_files'])
+        self.load_new_datasets(element_datasets['datasets'])
+        self.permission_provider.set_default_hda_permissions_in_bulk(element_datasets['datasets'])
+        persist_datasets_timer = ExecutionTimer()
+        self.persist_datasets_contents(element_datasets['datasets'], element_datasets['paths'], element_datasets['extra_files'])
+        log.debug(
+            "(%s) Persisted contents and metadata of %d dynamic collection datasets for output [%s] %s",
+            self.job_id(),
+            len(element_datasets['datasets']),
+            name,
+            persist_datasets_timer,
+        )
         add_datasets_timer = ExecutionTimer()
         self.add_datasets_to_history(element_datasets['datasets'])
+        # Reserving hids commits the session, the next flush needs the attributes to version the datasets.
+        self.load_new_datasets(element_datasets['datasets'])
         log.debug(
             "(%s) Add dynamic collection datasets to history for output [%s] %s",
             self.job_id(),
             name,
             add_datasets_timer,
         )
-        self.set_datasets_metadata(datasets=element_datasets['datasets'])
+
+    def persist_datasets_contents(self, datasets, paths, extra_files):
+        """Move discovered files into the object store and set the metadata of their datasets.
+
+        With more than one worker the files are copied into the object store by a thread
+        pool. The database session and the objects it owns are not thread-safe, so workers
+        only read attributes of the datasets loaded beforehand (see ``load_new_datasets``)
+        and never modify them: object store locations are created before and sizes,
+        metadata and peeks are set after the copies, on the calling thread.
+        """
+        workers = min(self.discovered_outputs_workers, len(datasets))
+        if workers > 1:
+            for dataset in datasets:
+                # May assign the object store id of the dataset.
+                self.object_store.create(dataset.dataset)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # consume the results to raise exceptions of workers
+                list(executor.map(self._copy_dataset_files, datasets, paths, extra_files))
+        else:
+            for dataset, path, extra_file in zip(datasets, paths, extra_files):
+                self._copy_dataset_files(dataset, path, extra_file)
+        defer_peeks = self.defer_peeks
+        for dataset, extra_file in zip(datasets, extra_files):
+            _set_dataset_size(dataset, extra_file)
+            self.set_dataset_metadata(dataset, defer_peeks=defer_peeks)
+
+    def load_new_datasets(self, datasets):
+        """Load the attributes of datasets created by this context after they have been flushed.
+
+        Galaxy's session expires all objects when flushing, the attributes of every
+        dataset would otherwise be loaded with separate queries while persisting its
+        contents.
+        """
+        sa_session = self.sa_session
+        if sa_session is None:
+            return
+        hdas_by_id = {galaxy.model.cached_id(hda): hda for hda in datasets if isinstance(hda, galaxy.model.HistoryDatasetAssociation)}
+        hda_ids = list(hdas_by_id)
+        HistoryDatasetAssociation = galaxy.model.HistoryDatasetAssociation
+        for i in range(0, len(hda_ids), 1000):
+            query = sa_session.query(HistoryDatasetAssociation).options(joinedload('dataset'), undefer('_metadata')).filter(
+                HistoryDatasetAssociation.table.c.id.in_(hda_ids[i:i + 1000]))
+            query.all()
+        for hda in hdas_by_id.values():
+            # These datasets have just been created, there are no conversions to clear when setting metadata.
+            set_committed_value(hda, 'implicitly_converted_datasets', [])
+            set_committed_value(hda, 'implicitly_converted_parent_datasets', [])
 
     def add_tags_to_datasets(self, datasets, tag_lists):
         if any(tag_lists):
@@ -307,12 +398,23 @@ class ModelPersistenceContext(metaclass=abc.ABCMeta):
 
     def update_object_store_with_datasets(self, datasets, paths, extra_files):
         for dataset, path, extra_file in zip(datasets, paths, extra_files):
-            self.object_store.update_from_file(dataset.dataset, file_name=path, create=True)
-            if extra_file:
-                persist_extra_files(self.object_store, extra_files, dataset)
-                dataset.set_size()
-            else:
-                dataset.set_size(no_extra_files=True)
+            self._copy_dataset_files(dataset, path, extra_file)
+            _set_dataset_size(dataset, extra_file)
+
+    def _copy_dataset_files(self, dataset, path, extra_file):
+        self.object_store.update_from_file(dataset.dataset, file_name=path, create=True)
+        if extra_file:
+            persist_extra_files(self.object_store, extra_file, dataset)
+
+    @property
+    def defer_peeks(self):
+        """Return True if peeks of discovered datasets should be deferred until first requested."""
+        return False
+
+    @property
+    def discovered_outputs_workers(self):
+        """Return the number of threads used to persist the contents of discovered datasets."""
+        return 1
 
     @abc.abstractproperty
     def tag_handler(self):
@@ -360,6 +462,10 @@ class PermissionProvider(metaclass=abc.ABCMeta):
     def set_default_hda_permissions(self, primary_data):
         return
 
+    def set_default_hda_permissions_in_bulk(self, datasets):
+        for primary_data in datasets:
+            self.set_default_hda_permissions(primary_data)
+
     @abc.abstractmethod
     def copy_dataset_permissions(self, init_from, primary_data):
         """Copy dataset permissions from supplied input dataset."""
@@ -457,6 +563,13 @@ class SessionlessModelPersistenceContext(ModelPersistenceContext):
         """No-op, no job context to persist this association for."""
 
 
+def _set_dataset_size(dataset, extra_file):
+    if extra_file:
+        dataset.set_size()
+    else:
+        dataset.set_size(no_extra_files=True)
+
+
 def persist_extra_files(object_store, src_extra_files_path, primary_data):
     if src_extra_files_path and os.path.exists(src_extra_files_path):
         primary_data.dataset.create_extra_files_path()
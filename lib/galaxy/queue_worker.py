@@ -33,6 +33,8 @@ from galaxy.config import reload_config_options
 logging.getLogger('kombu').setLevel(logging.WARNING)
 log = logging.getLogger(__name__)
 
+RELOAD_TOOLBOX_MESSAGE = "Toolbox reload (${reload_type}, ${change_set})"
+
 
 def send_local_control_task(app, task, get_response=False, kwargs=None):
     """
@@ -162,16 +164,41 @@ def reload_tool(app, **kwargs):
         log.error("Reload tool invoked without tool id.")
 
 
-def reload_toolbox(app, save_integrated_tool_panel=True, **kwargs):
-    reload_timer = util.ExecutionTimer()
+def reload_toolbox(app, save_integrated_tool_panel=True, incremental=False, change_set=None, **kwargs):
+    """
+    Reload the toolbox.
+
+    If ``incremental`` is set or a ``change_set`` (as computed by the process
+    watching the tool config files) is given, the changes to the tool config
+    files are applied to the current toolbox in place and the toolbox is only
+    rebuilt if that is not possible. Returns the change set, so it can be passed
+    on to other processes.
+    """
+    from galaxy.tools.toolbox.changes import ToolConfChangeSet
+    reload_timer = app.execution_timer_factory.get_timer(
+        'internals.galaxy.queue_worker.reload_toolbox', RELOAD_TOOLBOX_MESSAGE
+    )
     log.debug("Executing toolbox reload on '%s'", app.config.server_name)
     reload_count = app.toolbox._reload_count
     if hasattr(app, 'tool_cache'):
         app.tool_cache.cleanup()
-    _get_new_toolbox(app, save_integrated_tool_panel)
+    reload_type = 'full'
+    if change_set is not None:
+        change_set = ToolConfChangeSet.from_dict(change_set)
+    elif incremental:
+        change_set = app.toolbox.tool_conf_change_set(app.config.tool_configs)
+    if change_set and hasattr(app, 'tool_shed_repository_cache'):
+        app.tool_shed_repository_cache.rebuild()
+    if change_set is not None and app.toolbox.apply_change_set(change_set, save_integrated_tool_panel=save_integrated_tool_panel):
+        reload_type = 'incremental'
+        app.toolbox.persist_cache()
+    else:
+        _get_new_toolbox(app, save_integrated_tool_panel)
     app.toolbox._reload_count = reload_count + 1
     send_local_control_task(app, 'rebuild_toolbox_search_index')
-    log.debug("Toolbox reload %s", reload_timer)
+    log.debug(reload_timer.to_str(reload_type=reload_type, change_set=change_set if change_set is not None else 'no change set'))
+    if change_set is not None:
+        return change_set.to_dict()
 
 
 def _get_new_toolbox(app, save_integrated_tool_panel=True):
@@ -243,6 +270,8 @@ def reload_tool_data_tables(app, **kwargs):
     table_names = path or table_name or 'all tables'
     log.debug("Executing tool data table reload for %s", table_names)
     table_names = app.tool_data_tables.reload_tables(table_names=table_name, path=path)
+    if getattr(app, 'dynamic_options_cache', None):
+        app.dynamic_options_cache.invalidate_data_tables(table_names)
     log.debug("Finished data table reload for %s", table_names)
 
 
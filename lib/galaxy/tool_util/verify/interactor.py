@@ -1,3 +1,4 @@
+import hashlib
 import io
 import os
 import re
@@ -5,6 +6,7 @@ import shutil
 import sys
 import tarfile
 import tempfile
+import threading
 import time
 from collections import OrderedDict
 from json import dumps
@@ -37,6 +39,12 @@ VERBOSE_ERRORS = util.asbool(os.environ.get("GALAXY_TEST_VERBOSE_ERRORS", False)
 UPLOAD_ASYNC = util.asbool(os.environ.get("GALAXY_TEST_UPLOAD_ASYNC", True))
 ERROR_MESSAGE_DATASET_SEP = "--------------------------------------"
 DEFAULT_TOOL_TEST_WAIT = int(os.environ.get("GALAXY_TEST_DEFAULT_WAIT", 86400))
+# Job states are polled quickly at first and then less and less often, so that
+# short jobs are noticed early and long or queued jobs do not hammer the API.
+DEFAULT_POLLING_BACKOFF = float(os.environ.get("GALAXY_TEST_POLLING_BACKOFF", 0.25))
+DEFAULT_MAX_POLLING_DELTA = float(os.environ.get("GALAXY_TEST_MAX_POLLING_DELTA", 5))
+
+JOB_QUEUED_STATES = ['new', 'upload', 'waiting', 'queued', 'resubmitted', 'paused']
 
 DEFAULT_FTYPE = 'auto'
 # This following default dbkey was traditionally hg17 before Galaxy 18.05,
@@ -91,6 +99,20 @@ def stage_data_in_history(galaxy_interactor, tool_id, all_test_data, history=Non
             upload_wait()
 
 
+def _upload_cache_key(tool_input, files):
+    """Key test data uploads on their parameters and the digest of file contents."""
+    key = hashlib.sha256(dumps(tool_input, sort_keys=True).encode())
+    for file_key in sorted(files):
+        file_content = files[file_key]
+        if hasattr(file_content, "read"):
+            # Local test data of Galaxy versions without test data downloads
+            file_content = file_content.read()
+            files[file_key] = file_content
+        key.update(file_key.encode())
+        key.update(hashlib.sha256(file_content).digest())
+    return key.hexdigest()
+
+
 class GalaxyInteractorApi:
 
     def __init__(self, **kwds):
@@ -102,7 +124,21 @@ class GalaxyInteractorApi:
         self.keep_outputs_dir = kwds["keep_outputs_dir"]
         self._target_galaxy_version = None
 
-        self.uploads = {}
+        # Tests may run concurrently in separate threads, every thread maps
+        # the test data it staged to the datasets to use as tool inputs.
+        self._uploads = threading.local()
+        # If enabled, test data is uploaded only once - keyed on its content
+        # and upload parameters - and the datasets are reused across tests.
+        self.upload_cache = {} if kwds.get("cache_uploads", False) else None
+        self._upload_cache_locks = {}
+        self._upload_cache_lock = threading.Lock()
+        self._job_state_times = {}
+
+    @property
+    def uploads(self):
+        if not hasattr(self._uploads, "datasets"):
+            self._uploads.datasets = {}
+        return self._uploads.datasets
 
     @property
     def target_galaxy_version(self):
@@ -262,7 +298,17 @@ class GalaxyInteractorApi:
 
     def wait_for(self, func, what='tool test run', **kwd):
         walltime_exceeded = int(kwd.get("maxseconds", DEFAULT_TOOL_TEST_WAIT))
-        wait_on(func, what, walltime_exceeded)
+        polling_backoff = kwd.get("polling_backoff", DEFAULT_POLLING_BACKOFF)
+        max_delta = kwd.get("max_delta", DEFAULT_MAX_POLLING_DELTA)
+        wait_on(func, what, walltime_exceeded, polling_backoff=polling_backoff, max_delta=max_delta)
+
+    def job_state_times(self, job_id):
+        """Return when a job was first seen running and finished while waiting on it.
+
+        Times are recorded while polling the job state, keys are absent for
+        transitions not observed yet.
+        """
+        return dict(self._job_state_times.get(job_id, {}))
 
     def get_job_stdio(self, job_id):
         job_stdio = self.__get_job_stdio(job_id).json()
@@ -361,18 +407,31 @@ class GalaxyInteractorApi:
                 files = {
                     "files_0|file_data": file_content
                 }
+        if self.upload_cache is None:
+            hid, job_id = self.__submit_upload(history_id, tool_input, files, name)
+        else:
+            cache_key = _upload_cache_key(tool_input, files)
+            with self._upload_cache_lock:
+                key_lock = self._upload_cache_locks.setdefault(cache_key, threading.Lock())
+            # Concurrent tests staging the same data wait for a single upload.
+            with key_lock:
+                if cache_key not in self.upload_cache:
+                    self.upload_cache[cache_key] = self.__submit_upload(history_id, tool_input, files, name)
+                hid, job_id = self.upload_cache[cache_key]
+        self.uploads[os.path.basename(fname)] = self.uploads[fname] = self.uploads[name] = {"src": "hda", "id": hid}
+        return lambda: self.wait_for_job(job_id, history_id, maxseconds=maxseconds)
+
+    def __submit_upload(self, history_id, tool_input, files, name):
         submit_response_object = self.__submit_tool(history_id, "upload1", tool_input, extra_data={"type": "upload_dataset"}, files=files)
         submit_response = ensure_tool_run_response_okay(submit_response_object, "upload dataset %s" % name)
         assert "outputs" in submit_response, "Invalid response from server [%s], expecting outputs in response." % submit_response
         outputs = submit_response["outputs"]
         assert len(outputs) > 0, "Invalid response from server [%s], expecting an output dataset." % submit_response
         dataset = outputs[0]
-        hid = dataset['id']
-        self.uploads[os.path.basename(fname)] = self.uploads[fname] = self.uploads[name] = {"src": "hda", "id": hid}
         assert "jobs" in submit_response, "Invalid response from server [%s], expecting jobs in response." % submit_response
         jobs = submit_response["jobs"]
         assert len(jobs) > 0, "Invalid response from server [%s], expecting a job." % submit_response
-        return lambda: self.wait_for_job(jobs[0]["id"], history_id, maxseconds=maxseconds)
+        return dataset['id'], jobs[0]["id"]
 
     def run_tool(self, testdef, history_id, resource_parameters={}):
         # We need to handle the case where we've uploaded a valid compressed file since the upload
@@ -473,6 +532,12 @@ class GalaxyInteractorApi:
             raise ValueError("__job_ready passed empty job_id")
         job_json = self._get("jobs/%s" % job_id).json()
         state = job_json['state']
+        state_times = self._job_state_times.setdefault(job_id, {})
+        now = time.time()
+        if state not in JOB_QUEUED_STATES:
+            state_times.setdefault("running", now)
+        if state in ['ok', 'error']:
+            state_times.setdefault("finished", now)
         try:
             return self._state_ready(state, error_msg="Job in error state.")
         except Exception:
@@ -852,6 +917,8 @@ def verify_tool(tool_id,
     job_output_exceptions = None
     tool_execution_exception = None
     expected_failure_occurred = False
+    jobs = None
+    staged_time = None
     begin_time = time.time()
     try:
         stage_data_in_history(galaxy_interactor,
@@ -860,6 +927,7 @@ def verify_tool(tool_id,
                             history=test_history,
                             force_path_paste=force_path_paste,
                             maxseconds=maxseconds)
+        staged_time = time.time()
         try:
             tool_response = galaxy_interactor.run_tool(testdef, test_history, resource_parameters=resource_parameters)
             data_list, jobs, tool_inputs = tool_response.outputs, tool_response.jobs, tool_response.inputs
@@ -895,6 +963,7 @@ def verify_tool(tool_id,
                 "tool_version": tool_version,
                 "test_index": test_index,
                 "time_seconds": end_time - begin_time,
+                "timings": _test_timings(galaxy_interactor, jobs, begin_time, staged_time, end_time),
             }
             if tool_inputs is not None:
                 job_data["inputs"] = tool_inputs
@@ -915,6 +984,32 @@ def verify_tool(tool_id,
     galaxy_interactor.delete_history(test_history)
 
 
+def _test_timings(galaxy_interactor, jobs, begin_time, staged_time, end_time):
+    """Break the time of a tool test down into uploading, queueing, running and verifying.
+
+    Queueing includes submitting the tool request and the running and
+    finished times of the job are those observed while polling its state, so
+    these are only as precise as the polling interval.
+    """
+    timings = {}
+    if staged_time is None:
+        timings["upload"] = end_time - begin_time
+        return timings
+    timings["upload"] = staged_time - begin_time
+    state_times = {}
+    if jobs and hasattr(galaxy_interactor, "job_state_times"):
+        state_times = galaxy_interactor.job_state_times(jobs[0]["id"])
+    finished_time = state_times.get("finished")
+    if finished_time is None:
+        timings["queue"] = end_time - staged_time
+        return timings
+    running_time = state_times.get("running", finished_time)
+    timings["queue"] = running_time - staged_time
+    timings["run"] = finished_time - running_time
+    timings["verify"] = end_time - finished_time
+    return timings
+
+
 def _handle_def_errors(testdef):
     # If the test generation had an error, raise
     if testdef.error:
@@ -3,13 +3,15 @@
 import argparse
 import json
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from .interactor import (
     GalaxyInteractorApi,
     verify_tool,
 )
 
-DESCRIPTION = """Script to quickly run a tool test against a running Galaxy instance."""
+DESCRIPTION = """Script to quickly run tool tests against a running Galaxy instance."""
 ALL_TESTS = "*all_tests*"
 
 
@@ -23,17 +25,11 @@ def main(argv=None):
         "master_api_key": args.admin_key,
         "api_key": args.key,
         "keep_outputs_dir": args.output,
+        "cache_uploads": args.cache_uploads,
     }
-    tool_id = args.tool_id
-    tool_version = args.tool_version
 
     galaxy_interactor = GalaxyInteractorApi(**galaxy_interactor_kwds)
-    raw_test_index = args.test_index
-    if raw_test_index == ALL_TESTS:
-        tool_test_dicts = galaxy_interactor.get_tool_tests(tool_id, tool_version=tool_version)
-        test_indices = list(range(len(tool_test_dicts)))
-    else:
-        test_indices = [int(raw_test_index)]
+    tests = _collect_tests(galaxy_interactor, args.tool_id, args.tool_version, args.test_index)
 
     test_results = []
 
@@ -42,27 +38,31 @@ def main(argv=None):
             previous_results = json.load(f)
             test_results = previous_results["tests"]
 
-    exceptions = []
     verbose = args.verbose
-    for test_index in test_indices:
+
+    def run_test(test):
+        tool_id, tool_version, test_index, tool_test_dicts = test
         if tool_version:
             tool_id_and_version = f"{tool_id}/{tool_version}"
         else:
             tool_id_and_version = tool_id
 
         test_identifier = "tool %s test # %d" % (tool_id_and_version, test_index)
+        results = []
 
         def register(job_data):
-            test_results.append({
+            results.append({
                 'id': tool_id + "-" + str(test_index),
                 'has_data': True,
                 'data': job_data,
             })
 
+        exception = None
         try:
             verify_tool(
                 tool_id, galaxy_interactor, test_index=test_index, tool_version=tool_version,
-                register_job_data=register, quiet=not verbose, force_path_paste=args.force_path_paste
+                register_job_data=register, quiet=not verbose, force_path_paste=args.force_path_paste,
+                tool_test_dicts=tool_test_dicts,
             )
 
             if verbose:
@@ -71,11 +71,23 @@ def main(argv=None):
         except Exception as e:
             if verbose:
                 print(f"{test_identifier} failed, {e}")
-            exceptions.append(e)
+            exception = e
+        return results, exception
+
+    exceptions = []
+    begin_time = time.time()
+    # Results are recorded in the order of the tests, whatever order they complete in.
+    with ThreadPoolExecutor(max_workers=args.parallel_tests) as executor:
+        for results, exception in executor.map(run_test, tests):
+            test_results.extend(results)
+            if exception is not None:
+                exceptions.append(exception)
 
     report_obj = {
         'version': '0.1',
         'tests': test_results,
+        'time_seconds': time.time() - begin_time,
+        'parallel_tests': args.parallel_tests,
     }
     output_json = args.output_json
     if output_json:
@@ -90,19 +102,48 @@ def main(argv=None):
         raise exceptions[0]
 
 
+def _collect_tests(galaxy_interactor, tool_id, tool_version, raw_test_index):
+    """Return the tool id, version, test index and test definitions of every test to run.
+
+    Without a tool id, all tests of all tools of the target Galaxy are collected.
+    """
+    if tool_id is None:
+        if raw_test_index != ALL_TESTS:
+            raise ValueError("A test index can only be specified along with a tool id.")
+        tool_versions = []
+        for summary_tool_id, versions in galaxy_interactor.get_tests_summary().items():
+            for summary_tool_version in versions:
+                tool_versions.append((summary_tool_id, summary_tool_version))
+    else:
+        tool_versions = [(tool_id, tool_version)]
+
+    tests = []
+    for tool_id, tool_version in tool_versions:
+        tool_test_dicts = galaxy_interactor.get_tool_tests(tool_id, tool_version=tool_version)
+        if raw_test_index == ALL_TESTS:
+            test_indices = list(range(len(tool_test_dicts)))
+        else:
+            test_indices = [int(raw_test_index)]
+        for test_index in test_indices:
+            tests.append((tool_id, tool_version, test_index, tool_test_dicts))
+    return tests
+
+
 def _arg_parser():
     parser = argparse.ArgumentParser(description=DESCRIPTION)
     parser.add_argument('-u', '--galaxy-url', default="http://localhost:8080", help='Galaxy URL')
     parser.add_argument('-k', '--key', default=None, help='Galaxy User API Key')
     parser.add_argument('-a', '--admin-key', default=None, help='Galaxy Admin API Key')
     parser.add_argument('--force_path_paste', default=False, action="store_true", help='This requires Galaxy-side config option "allow_path_paste" enabled. Allows for fetching test data locally. Only for admins.')
-    parser.add_argument('-t', '--tool-id', default=None, help='Tool ID')
+    parser.add_argument('-t', '--tool-id', default=None, help='Tool ID - by default tests of all tools will run.')
     parser.add_argument('--tool-version', default=None, help='Tool Version')
     parser.add_argument('-i', '--test-index', default=ALL_TESTS, help='Tool Test Index (starting at 0) - by default all tests will run.')
     parser.add_argument('-o', '--output', default=None, help='directory to dump outputs to')
     parser.add_argument('--append', default=False, action="store_true", help="Extend a test record json (created with --output-json) with additional tests.")
     parser.add_argument('-j', '--output-json', default=None, help='output metadata json')
     parser.add_argument('--verbose', default=False, action="store_true", help="Verbose logging.")
+    parser.add_argument('--parallel-tests', default=1, type=int, help="Number of tests to run concurrently.")
+    parser.add_argument('--cache-uploads', default=False, action="store_true", help="Upload test data with the same contents and parameters only once and reuse the datasets across tests.")
     return parser
 
 
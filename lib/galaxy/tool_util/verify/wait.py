@@ -8,11 +8,12 @@ DEFAULT_POLLING_DELTA = 0.25
 TIMEOUT_MESSAGE_TEMPLATE = "Timed out after {} seconds waiting on {}."
 
 
-def wait_on(function, desc, timeout, delta=DEFAULT_POLLING_DELTA, polling_backoff=DEFAULT_POLLING_BACKOFF, sleep_=None):
+def wait_on(function, desc, timeout, delta=DEFAULT_POLLING_DELTA, polling_backoff=DEFAULT_POLLING_BACKOFF, sleep_=None, max_delta=None):
     """Wait for function to return non-None value.
 
     Grow the polling interval (initially ``delta`` defaulting to 0.25 seconds)
-    incrementally by the supplied ``polling_backoff`` (defaulting to 0).
+    incrementally by the supplied ``polling_backoff`` (defaulting to 0), up to
+    ``max_delta`` seconds if supplied.
 
     Throw a TimeoutAssertionError if the supplied timeout is reached without
     supplied function ever returning a non-None value.
@@ -28,6 +29,8 @@ def wait_on(function, desc, timeout, delta=DEFAULT_POLLING_DELTA, polling_backof
         total_wait += delta
         sleep(delta)
         delta += polling_backoff
+        if max_delta is not None:
+            delta = min(delta, max_delta)
 
 
 class TimeoutAssertionError(AssertionError):
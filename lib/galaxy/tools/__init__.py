@@ -4,12 +4,14 @@ Classes encapsulating galaxy tools and tool configuration.
 import itertools
 import json
 import logging
+import multiprocessing
 import os
 import re
 import tarfile
 import tempfile
 import threading
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import unquote_plus
@@ -52,7 +54,10 @@ from galaxy.tools.actions import DefaultToolAction
 from galaxy.tools.actions.data_manager import DataManagerToolAction
 from galaxy.tools.actions.data_source import DataSourceToolAction
 from galaxy.tools.actions.model_operations import ModelOperationToolAction
-from galaxy.tools.cache import ToolDocumentCache
+from galaxy.tools.cache import (
+    expand_tool_document,
+    ToolDocumentCache,
+)
 from galaxy.tools.parameters import (
     check_param,
     params_from_strings,
@@ -245,6 +250,9 @@ class ToolBox(BaseGalaxyToolBox):
         self._reload_count = 0
         self.tool_location_fetcher = ToolLocationFetcher()
         self.cache_regions = {}
+        # Modification times of tool and macro files, shared by the freshness checks
+        # of the tool document cache while the toolbox is being loaded.
+        self._tool_file_modtimes = None
         # This is here to deal with the old default value, which doesn't make
         # sense in an "installed Galaxy" world.
         # FIXME: ./
@@ -257,6 +265,13 @@ class ToolBox(BaseGalaxyToolBox):
             save_integrated_tool_panel=save_integrated_tool_panel,
         )
 
+    def _init_tools_from_configs(self, config_filenames):
+        self._tool_file_modtimes = {}
+        try:
+            super()._init_tools_from_configs(config_filenames)
+        finally:
+            self._tool_file_modtimes = None
+
     def persist_cache(self, register_postfork=False):
         """
         Persists any modified tool cache files to disk.
@@ -302,26 +317,82 @@ class ToolBox(BaseGalaxyToolBox):
             self.cache_regions[tool_cache_data_dir] = ToolDocumentCache(cache_dir=tool_cache_data_dir)
         return self.cache_regions[tool_cache_data_dir]
 
-    def create_tool(self, config_file, tool_cache_data_dir=None, **kwds):
-        if config_file.endswith('.xml'):
+    def _preload_tool_documents(self, tool_loads, workers):
+        """Expand the sources of uncached XML tools in worker processes if configured to do so.
+
+        The expanded documents are stored in the ``ToolDocumentCache`` region of each tool,
+        where ``create_tool`` picks them up.
+        """
+        documents_to_expand = []
+        for config_file, _, _, tool_cache_data_dir in tool_loads:
+            # Create cache regions up front, tool sources are loaded in threads.
             cache = self.get_cache_region(tool_cache_data_dir or self.app.config.tool_cache_data_dir)
-            tool_document = cache.get(config_file)
-            if tool_document:
-                tool_source = self.get_expanded_tool_source(
-                    config_file=config_file,
-                    xml_tree=etree.ElementTree(etree.fromstring(tool_document['document'].encode('utf-8'))),
-                    macro_paths=tool_document['macro_paths']
-                )
-            else:
-                tool_source = self.get_expanded_tool_source(config_file)
+            if config_file.endswith('.xml') and not cache.get(config_file, modtimes=self._tool_file_modtimes):
+                documents_to_expand.append((config_file, cache))
+        if getattr(self.app.config, "tool_loading_executor", "thread") != 'process' or not documents_to_expand:
+            return
+        enable_beta_formats = getattr(self.app.config, "enable_beta_tool_formats", False)
+        config_files = [config_file for config_file, _ in documents_to_expand]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+            tool_documents = executor.map(expand_tool_document, config_files, itertools.repeat(enable_beta_formats), chunksize=16)
+            for (config_file, cache), tool_document in zip(documents_to_expand, tool_documents):
+                if tool_document:
+                    cache.set_document(config_file, tool_document)
+
+    def create_tool_stub(self, config_file, tool_shed_repository=None, guid=None, tool_cache_data_dir=None):
+        if not getattr(self.app.config, "lazy_tool_loading", False) or not config_file.endswith('.xml'):
+            return None
+        cache = self.get_cache_region(tool_cache_data_dir or self.app.config.tool_cache_data_dir)
+        tool_document = cache.get(config_file, modtimes=self._tool_file_modtimes)
+        if not tool_document:
+            return None
+        tool_source = cache.get_snapshot(tool_document, self._tool_source_loader(config_file, tool_document))
+        if tool_source is None or not ToolStub.can_stub(tool_source):
+            return None
+        return ToolStub(self, config_file, tool_source, guid=guid, tool_shed_repository=tool_shed_repository, tool_cache_data_dir=tool_cache_data_dir)
+
+    def load_tool_source(self, config_file, tool_cache_data_dir=None):
+        """Return the macro expanded tool source of ``config_file``, using and filling the tool document cache.
+
+        This only reads tool files and the (internally synchronized) tool document
+        cache, so it is safe to call from several threads.
+        """
+        if not config_file.endswith('.xml'):
+            return self.get_expanded_tool_source(config_file)
+        cache = self.get_cache_region(tool_cache_data_dir or self.app.config.tool_cache_data_dir)
+        tool_document = cache.get(config_file, modtimes=self._tool_file_modtimes)
+        if tool_document:
+            load_tool_source = self._tool_source_loader(config_file, tool_document)
+            tool_source = cache.get_snapshot(tool_document, load_tool_source)
+            if tool_source is None:
+                tool_source = load_tool_source()
+                # Record a snapshot for the next start.
                 cache.set(config_file, tool_source)
         else:
             tool_source = self.get_expanded_tool_source(config_file)
+            cache.set(config_file, tool_source)
+        return tool_source
+
+    def create_tool(self, config_file, tool_cache_data_dir=None, **kwds):
+        tool_source = self._preloaded_tool_sources.pop(config_file, None)
+        if tool_source is None:
+            tool_source = self.load_tool_source(config_file, tool_cache_data_dir=tool_cache_data_dir)
         tool = self._create_tool_from_source(tool_source, config_file=config_file, **kwds)
         if not self.app.config.delay_tool_initialization:
             tool.assert_finalized(raise_if_invalid=True)
         return tool
 
+    def _tool_source_loader(self, config_file, tool_document):
+
+        def load_tool_source():
+            return self.get_expanded_tool_source(
+                config_file=config_file,
+                xml_tree=etree.ElementTree(etree.fromstring(tool_document['document'].encode('utf-8'))),
+                macro_paths=tool_document['macro_paths']
+            )
+
+        return load_tool_source
+
     def get_expanded_tool_source(self, config_file, **kwargs):
         try:
             return get_tool_source(
@@ -2369,6 +2440,117 @@ class Tool(Dictifiable):
         return external_paths
 
 
+class ToolStub:
+    """
+    Stand-in registered with the toolbox for a tool if lazy tool loading is enabled.
+
+    Stubs are created from a snapshot in the tool document cache and only know
+    what is needed to place the tool in the toolbox and the tool panel. The
+    `Tool` itself is created the first time anything else is asked of the stub,
+    after that all attribute access is delegated to the tool.
+    """
+
+    is_stub = True
+    tool_type = 'default'
+    version_object = Tool.version_object
+    lineage = Tool.lineage
+    tool_versions = Tool.tool_versions
+    is_latest_version = Tool.is_latest_version
+    latest_version = Tool.latest_version
+    tool_shed_repository = Tool.tool_shed_repository
+    get_panel_section = Tool.get_panel_section
+    _internal_attributes = ('_assigned', '_create_kwds', '_lock', '_tool', '_toolbox')
+
+    def __init__(self, toolbox, config_file, tool_source, guid=None, tool_shed_repository=None, **create_kwds):
+        old_id = tool_source.parse_id()
+        self.__dict__.update(
+            _assigned=set(),
+            _create_kwds=dict(guid=guid, tool_shed_repository=tool_shed_repository, **create_kwds),
+            _lock=threading.Lock(),
+            _tool=None,
+            _toolbox=toolbox,
+            _lineage=None,
+            _macro_paths=tool_source.macro_paths,
+            app=toolbox.app,
+            config_file=config_file,
+            tool_dir=os.path.dirname(config_file),
+            id=guid or old_id,
+            old_id=old_id,
+            guid=guid,
+            version=tool_source.parse_version() or '1.0.0',
+            name=tool_source.parse_name(),
+            description=tool_source.parse_description(),
+            # Used by the toolbox search index, which shouldn't create the tool.
+            raw_help=tool_source.parse_help(),
+            edam_operations=tool_source.parse_edam_operations(),
+            edam_topics=tool_source.parse_edam_topics(),
+            hidden=tool_source.parse_hidden(),
+            profile=float(tool_source.parse_profile()),
+            labels=[],
+            tool_shed=None,
+            repository_name=None,
+            repository_owner=None,
+            changeset_revision=None,
+            installed_changeset_revision=None,
+            tool_errors=None,
+            dynamic_tool=None,
+        )
+        if tool_shed_repository:
+            self.__dict__.update(
+                tool_shed=tool_shed_repository.tool_shed,
+                repository_name=tool_shed_repository.name,
+                repository_owner=tool_shed_repository.owner,
+                changeset_revision=tool_shed_repository.changeset_revision,
+                installed_changeset_revision=tool_shed_repository.installed_changeset_revision,
+            )
+
+    @staticmethod
+    def can_stub(tool_source):
+        """Whether the tool described by ``tool_source`` can be registered using a stub.
+
+        Tools using a special tool class and tools that would fail basic validation
+        when being created are loaded eagerly.
+        """
+        if tool_source.parse_tool_module() is not None or tool_source.parse_tool_type():
+            return False
+        if not (tool_source.parse_id() and tool_source.parse_name()):
+            return False
+        profile = packaging.version.parse(str(tool_source.parse_profile()))
+        if profile >= packaging.version.parse("16.04"):
+            return packaging.version.parse(VERSION_MAJOR) >= profile and bool(tool_source.parse_version())
+        return True
+
+    def materialize(self):
+        """Create the `Tool` for this stub (once) and return it."""
+        with self._lock:
+            if self._tool is None:
+                tool = self._toolbox.create_tool(config_file=self.config_file, **self._create_kwds)
+                for name in self._assigned:
+                    setattr(tool, name, self.__dict__[name])
+                # Drop the values copied from the snapshot, these are looked up on the tool from now on.
+                for name in list(self.__dict__):
+                    if name not in self._internal_attributes:
+                        del self.__dict__[name]
+                self.__dict__["_tool"] = tool
+            return self._tool
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.materialize(), name)
+
+    def __setattr__(self, name, value):
+        with self._lock:
+            if self._tool is None:
+                self.__dict__[name] = value
+                self._assigned.add(name)
+                return
+        setattr(self._tool, name, value)
+
+    def __repr__(self):
+        return f"<ToolStub {self.__dict__.get('id', '')} {self.config_file}>"
+
+
 class OutputParameterJSONTool(Tool):
     """
     Alternate implementation of Tool that provides parameters and other values
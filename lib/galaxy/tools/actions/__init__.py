@@ -33,6 +33,9 @@ class ToolExecutionCache:
         self.current_user_roles = trans.get_current_user_roles()
         self.chrom_info = {}
         self.cached_collection_elements = {}
+        # Permissions of output datasets of jobs created without flushing, the
+        # caller executing the batch of jobs persists them in bulk.
+        self.dataset_permissions_to_persist = []
 
     def get_chrom_info(self, tool_id, input_dbkey):
         genome_builds = self.trans.app.genome_builds
@@ -409,7 +412,10 @@ class DefaultToolAction:
                     dataset_collection_elements[name].hda = data
                 trans.sa_session.add(data)
                 if not completed_job:
-                    trans.app.security_agent.set_all_dataset_permissions(data.dataset, output_permissions, new=True, flush=False)
+                    if flush_job:
+                        trans.app.security_agent.set_all_dataset_permissions(data.dataset, output_permissions, new=True, flush=False)
+                    else:
+                        execution_cache.dataset_permissions_to_persist.append((data.dataset, output_permissions))
             data.copy_tags_to(preserved_tags)
 
             if not completed_job and trans.app.config.legacy_eager_objectstore_initialization:
@@ -17,7 +17,10 @@ from galaxy.exceptions import (
     ObjectInvalid,
     RequestParameterInvalidException,
 )
-from galaxy.model import tags
+from galaxy.model import (
+    cached_id,
+    tags,
+)
 from galaxy.util import unicodify
 from galaxy.util.path import external_chown
 
@@ -202,19 +205,7 @@ def __new_library_upload(trans, cntrller, uploaded_dataset, library_bunch, tag_h
     folder = library_bunch.folder
     if uploaded_dataset.get('in_folder', False):
         # Create subfolders if desired
-        for name in uploaded_dataset.in_folder.split(os.path.sep):
-            trans.sa_session.refresh(folder)
-            matches = [x for x in active_folders(trans, folder) if x.name == name]
-            if matches:
-                folder = matches[0]
-            else:
-                new_folder = trans.app.model.LibraryFolder(name=name, description='Automatically created by upload tool')
-                new_folder.genome_build = trans.app.genome_builds.default_value
-                folder.add_folder(new_folder)
-                trans.sa_session.add(new_folder)
-                trans.sa_session.flush()
-                trans.app.security_agent.copy_library_permissions(trans, folder, new_folder)
-                folder = new_folder
+        folder = __library_upload_folder(trans, folder, uploaded_dataset.in_folder)
     if library_bunch.replace_dataset:
         ld = library_bunch.replace_dataset
     else:
@@ -286,6 +277,111 @@ def __new_library_upload(trans, cntrller, uploaded_dataset, library_bunch, tag_h
     return ldda
 
 
+def __library_upload_folder(trans, folder, in_folder):
+    for name in in_folder.split(os.path.sep):
+        trans.sa_session.refresh(folder)
+        matches = [x for x in active_folders(trans, folder) if x.name == name]
+        if matches:
+            folder = matches[0]
+        else:
+            new_folder = trans.app.model.LibraryFolder(name=name, description='Automatically created by upload tool')
+            new_folder.genome_build = trans.app.genome_builds.default_value
+            folder.add_folder(new_folder)
+            trans.sa_session.add(new_folder)
+            trans.sa_session.flush()
+            trans.app.security_agent.copy_library_permissions(trans, folder, new_folder)
+            folder = new_folder
+    return folder
+
+
+def new_library_uploads(trans, cntrller, uploaded_datasets, library_bunch, chunk_size=1000):
+    """
+    Create the library datasets of many uploads at once, e.g. of the files of a
+    server directory, setting ``uploaded_dataset.data`` of each upload and
+    linking it to the uploaded path if ``uploaded_dataset.link_data_only`` is
+    'link_to_files'.
+
+    Library datasets, their associations and datasets are flushed together and
+    their permissions inserted in bulk for every ``chunk_size`` uploads, instead
+    of flushing several times per upload. Uploads replacing a library dataset,
+    with template contents or by users without default permissions managing
+    datasets are created one by one.
+    """
+    security_agent = trans.app.security_agent
+    dataset_permissions = security_agent.user_get_default_permissions(trans.user)
+    if (library_bunch.replace_dataset or (library_bunch.template and library_bunch.template_field_contents) or
+            not dataset_permissions.get(security_agent.permitted_actions.DATASET_MANAGE_PERMISSIONS)):
+        for uploaded_dataset in uploaded_datasets:
+            uploaded_dataset.data = new_upload(trans, cntrller, uploaded_dataset, library_bunch=library_bunch)
+            if uploaded_dataset.get('link_data_only') == 'link_to_files':
+                uploaded_dataset.data.link_to(uploaded_dataset.path)
+                trans.sa_session.add_all((uploaded_dataset.data, uploaded_dataset.data.dataset))
+                trans.sa_session.flush()
+        return
+    current_user_roles = trans.get_current_user_roles()
+    if not ((trans.user_is_admin and cntrller in ['library_admin', 'api']) or security_agent.can_add_library_item(current_user_roles, library_bunch.folder)):
+        raise Exception("User is not authorized to add datasets to this library.")
+    if library_bunch.roles:
+        dataset_permissions = dict(dataset_permissions)
+        dataset_permissions[security_agent.permitted_actions.DATASET_ACCESS] = dataset_permissions.get(security_agent.permitted_actions.DATASET_ACCESS, []) + library_bunch.roles
+    tag_handler = tags.GalaxyTagHandlerSession(trans.sa_session)
+    library_tags = tag_handler.parse_tags_list(library_bunch.tags) if library_bunch.tags else []
+    folders = {}
+    folder_permissions = {}
+    for i in range(0, len(uploaded_datasets), chunk_size):
+        chunk = uploaded_datasets[i:i + chunk_size]
+        lds = []
+        for uploaded_dataset in chunk:
+            in_folder = uploaded_dataset.get('in_folder', None)
+            if in_folder not in folders:
+                folders[in_folder] = __library_upload_folder(trans, library_bunch.folder, in_folder) if in_folder else library_bunch.folder
+            folder = folders[in_folder]
+            ld = trans.app.model.LibraryDataset(folder=folder, name=uploaded_dataset.name)
+            ldda = trans.app.model.LibraryDatasetDatasetAssociation(name=uploaded_dataset.name,
+                                                                    extension=uploaded_dataset.file_type,
+                                                                    dbkey=uploaded_dataset.dbkey,
+                                                                    library_dataset=ld,
+                                                                    user=trans.user,
+                                                                    create_dataset=True,
+                                                                    sa_session=trans.sa_session,
+                                                                    flush=False)
+            if uploaded_dataset.get('tag_using_filenames', False):
+                tag_from_filename = os.path.splitext(os.path.basename(uploaded_dataset.name))[0]
+                tag_handler.apply_item_tag(item=ldda, user=trans.user, name='name', value=tag_from_filename)
+            tags_list = uploaded_dataset.get('tags', False)
+            if tags_list:
+                for tag in tags_list:
+                    tag_handler.apply_item_tag(item=ldda, user=trans.user, name='name', value=tag)
+            else:
+                for tag in library_tags:
+                    tag_handler.apply_item_tag(user=trans.user, item=ldda, name=tag[0], value=tag[1])
+            ldda.state = ldda.states.QUEUED
+            ldda.message = library_bunch.message
+            if uploaded_dataset.get('link_data_only') == 'link_to_files':
+                ldda.link_to(uploaded_dataset.path)
+            folder.add_library_dataset(ld, genome_build=uploaded_dataset.dbkey)
+            trans.sa_session.add_all((ld, ldda, ldda.dataset))
+            uploaded_dataset.data = ldda
+            lds.append((folder, ld, ldda, ldda.dataset))
+        trans.sa_session.add_all(set(folders.values()))
+        trans.sa_session.flush()
+        lds_by_folder = OrderedDict()
+        for folder, ld, ldda, dataset in lds:
+            ld.library_dataset_dataset_association_id = cached_id(ldda)
+            lds_by_folder.setdefault(folder, []).append((ld, ldda))
+        trans.sa_session.flush()
+        # Library datasets and their associations get the permissions of their folder
+        for folder, folder_lds in lds_by_folder.items():
+            if folder not in folder_permissions:
+                permissions = folder_permissions[folder] = {}
+                for role_assoc in folder.actions:
+                    if role_assoc.action != security_agent.permitted_actions.LIBRARY_ACCESS.action:
+                        permissions.setdefault(role_assoc.action, []).append(role_assoc.role)
+            security_agent.set_new_library_item_permissions_in_bulk([ld for ld, _ in folder_lds], folder_permissions[folder])
+            security_agent.set_new_library_item_permissions_in_bulk([ldda for _, ldda in folder_lds], folder_permissions[folder])
+        security_agent.set_new_dataset_permissions_in_bulk([(dataset, dataset_permissions) for _, _, _, dataset in lds])
+
+
 def new_upload(trans, cntrller, uploaded_dataset, library_bunch=None, history=None, state=None, tag_list=None):
     tag_handler = tags.GalaxyTagHandlerSession(trans.sa_session)
     if library_bunch:
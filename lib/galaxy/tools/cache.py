@@ -14,12 +14,27 @@ from sqlalchemy.orm import (
 )
 from sqlitedict import SqliteDict
 
-from galaxy.util import unicodify
+from galaxy.tool_util.deps.requirements import (
+    ContainerDescription,
+    ToolRequirements,
+)
+from galaxy.tool_util.parser import get_tool_source
+from galaxy.tool_util.parser.stdio import (
+    ToolStdioExitCode,
+    ToolStdioRegex,
+)
+from galaxy.util import (
+    parse_xml_string,
+    string_as_bool,
+    unicodify,
+    xml_to_string,
+)
 from galaxy.util.hash_util import md5_hash_file
+from galaxy.version import VERSION
 
 log = logging.getLogger(__name__)
 
-CURRENT_TOOL_CACHE_VERSION = 0
+CURRENT_TOOL_CACHE_VERSION = 1
 
 
 def encoder(obj):
@@ -30,6 +45,264 @@ def decoder(obj):
     return json.loads(zlib.decompress(bytes(obj)).decode('utf-8'))
 
 
+# ToolSource methods without arguments whose results don't depend on the Galaxy app
+# and are recorded in tool source snapshots.
+SNAPSHOT_METHODS = (
+    'parse_action_module',
+    'parse_command',
+    'parse_description',
+    'parse_docker_env_pass_through',
+    'parse_edam_operations',
+    'parse_edam_topics',
+    'parse_environment_variables',
+    'parse_help',
+    'parse_hidden',
+    'parse_home_target',
+    'parse_id',
+    'parse_interactivetool',
+    'parse_interpreter',
+    'parse_is_multi_byte',
+    'parse_name',
+    'parse_parallelism',
+    'parse_profile',
+    'parse_provided_metadata_file',
+    'parse_provided_metadata_style',
+    'parse_python_template_version',
+    'parse_redirect_url_params_elem',
+    'parse_refresh',
+    'parse_request_param_translation_elem',
+    'parse_requirements_and_containers',
+    'parse_sanitize',
+    'parse_stdio',
+    'parse_strict_shell',
+    'parse_tests_to_dict',
+    'parse_tmp_directory_vars',
+    'parse_tmp_target',
+    'parse_tool_module',
+    'parse_tool_type',
+    'parse_version',
+    'parse_version_command',
+    'parse_version_command_interpreter',
+    'parse_xrefs',
+)
+# Small top-level elements of tool documents that the Tool reads directly, these are
+# stored as XML fragments so they can be consulted without parsing the whole document.
+SNAPSHOT_FRAGMENT_TAGS = ('citations', 'code', 'configfiles', 'trackster_conf', 'uihints')
+
+
+def _requirements_and_containers_to_plain(value):
+    requirements, containers = value
+    return {'requirements': requirements.to_list(), 'containers': [container.to_dict() for container in containers]}
+
+
+def _requirements_and_containers_from_plain(value):
+    return ToolRequirements.from_list(value['requirements']), [ContainerDescription.from_dict(container) for container in value['containers']]
+
+
+def _stdio_to_plain(value):
+    exit_codes, regexes = value
+    return {'exit_codes': [exit_code.to_dict() for exit_code in exit_codes], 'regexes': [regex.to_dict() for regex in regexes]}
+
+
+def _stdio_from_plain(value):
+    return [ToolStdioExitCode(exit_code) for exit_code in value['exit_codes']], [ToolStdioRegex(regex) for regex in value['regexes']]
+
+
+def _optional_tuple(value):
+    return tuple(value) if value is not None else None
+
+
+# Conversions of SNAPSHOT_METHODS results that aren't plain JSON data, as (to_plain, from_plain) pairs.
+SNAPSHOT_CODECS = {
+    'parse_action_module': (_optional_tuple, _optional_tuple),
+    'parse_requirements_and_containers': (_requirements_and_containers_to_plain, _requirements_and_containers_from_plain),
+    'parse_stdio': (_stdio_to_plain, _stdio_from_plain),
+}
+
+
+def tool_document_from_source(tool_source):
+    return {
+        'document': tool_source.to_string(),
+        'macro_paths': tool_source.macro_paths,
+        'paths_and_modtimes': tool_source.paths_and_modtimes(),
+        'tool_cache_version': CURRENT_TOOL_CACHE_VERSION,
+        # Snapshots are only valid for the Galaxy version that recorded them.
+        'snapshots': {VERSION: snapshot_tool_source(tool_source)},
+    }
+
+
+def snapshot_tool_source(tool_source):
+    """Record the app independent parts of an XML ``tool_source``.
+
+    The snapshot only consists of plain (JSON serializable) data, so it is stored as part of
+    the tool document and consumed by :class:`ToolSourceSnapshot`. Results that aren't plain
+    data and have no entry in ``SNAPSHOT_CODECS`` (e.g. XML elements) are left out and will be
+    parsed from the tool document on demand.
+    """
+    values = {}
+    for name in SNAPSHOT_METHODS:
+        to_plain = SNAPSHOT_CODECS.get(name, (None, None))[0]
+        try:
+            value = getattr(tool_source, name)()
+            if to_plain is not None:
+                value = to_plain(value)
+            # Serialized individually, so only results that are asked for are decoded.
+            serialized = json.dumps(value)
+            if json.loads(serialized) != value:
+                continue
+        except Exception:
+            continue
+        values[name] = serialized
+    root = tool_source.root
+    return {
+        'values': values,
+        'root_attributes': dict(root.attrib),
+        'root_tags': sorted({child.tag for child in root if isinstance(child.tag, str)}),
+        'root_fragments': {tag: [xml_to_string(elem) for elem in root.findall(tag)] for tag in SNAPSHOT_FRAGMENT_TAGS},
+    }
+
+
+class LazyRootElement:
+    """Stand-in for the root element of a tool document that hasn't been parsed yet.
+
+    Attribute lookups, searches for top-level tags the document doesn't contain and
+    for the small elements in ``SNAPSHOT_FRAGMENT_TAGS`` are answered from the snapshot,
+    everything else parses the document and is delegated to the real root element.
+    """
+
+    def __init__(self, tool_source_snapshot, attributes, tags, fragments):
+        self._tool_source_snapshot = tool_source_snapshot
+        self.attrib = attributes
+        self._tags = tags
+        self._fragments = fragments
+
+    def _is_absent(self, path):
+        if self._tool_source_snapshot.is_parsed:
+            return False
+        tag = path[2:] if path.startswith("./") else path
+        tag = tag.split("/", 1)[0]
+        return tag.isidentifier() and tag not in self._tags
+
+    def _fragment_elements(self, path):
+        if self._tool_source_snapshot.is_parsed or path not in self._fragments:
+            return None
+        return [parse_xml_string(fragment) for fragment in self._fragments[path]]
+
+    def get(self, key, default=None):
+        return self.attrib.get(key, default)
+
+    def find(self, path, *args, **kwargs):
+        if self._is_absent(path):
+            return None
+        elements = self._fragment_elements(path)
+        if elements is not None:
+            return elements[0] if elements else None
+        return self._root.find(path, *args, **kwargs)
+
+    def findall(self, path, *args, **kwargs):
+        if self._is_absent(path):
+            return []
+        elements = self._fragment_elements(path)
+        if elements is not None:
+            return elements
+        return self._root.findall(path, *args, **kwargs)
+
+    def findtext(self, path, default=None, *args, **kwargs):
+        if self._is_absent(path):
+            return default
+        return self._root.findtext(path, default, *args, **kwargs)
+
+    @property
+    def _root(self):
+        return self._tool_source_snapshot.xml_tool_source.root
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self._root, name)
+
+    def __iter__(self):
+        return iter(self._root)
+
+    def __len__(self):
+        return len(self._root)
+
+    def __getitem__(self, index):
+        return self._root[index]
+
+
+class ToolSourceSnapshot:
+    """XML tool source answering app independent parse methods from a snapshot.
+
+    The expanded tool document is only parsed (using ``load_tool_source``) once
+    something not recorded in the snapshot is requested, e.g. the tool inputs.
+    """
+
+    def __init__(self, snapshot, tool_document, load_tool_source):
+        self._values = snapshot['values']
+        self._load_tool_source = load_tool_source
+        self._xml_tool_source = None
+        self._macro_paths = tool_document['macro_paths']
+        self._paths_and_modtimes = tool_document['paths_and_modtimes']
+        self.root = LazyRootElement(self, snapshot['root_attributes'], frozenset(snapshot['root_tags']), snapshot['root_fragments'])
+        self.legacy_defaults = self.parse_profile() == "16.01"
+
+    @property
+    def is_parsed(self):
+        return self._xml_tool_source is not None
+
+    @property
+    def xml_tool_source(self):
+        if self._xml_tool_source is None:
+            self._xml_tool_source = self._load_tool_source()
+        return self._xml_tool_source
+
+    @property
+    def macro_paths(self):
+        return self._macro_paths
+
+    def paths_and_modtimes(self):
+        return self._paths_and_modtimes
+
+    def parse_display_interface(self, default):
+        return string_as_bool(self.root.get("display_interface", default))
+
+    def parse_require_login(self, default):
+        return string_as_bool(self.root.get("require_login", default))
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name in self._values:
+            # Callers may modify the results, so hand out new objects on every call.
+            return lambda: self._load_value(name)
+        return getattr(self.xml_tool_source, name)
+
+    def _load_value(self, name):
+        try:
+            value = json.loads(self._values[name])
+            from_plain = SNAPSHOT_CODECS.get(name, (None, None))[1]
+            return from_plain(value) if from_plain is not None else value
+        except Exception:
+            log.debug("Failed to load %s from tool source snapshot, parsing tool document instead", name, exc_info=True)
+            return getattr(self.xml_tool_source, name)()
+
+    def __str__(self):
+        return str(self.xml_tool_source)
+
+
+def expand_tool_document(config_file, enable_beta_formats=False):
+    """Parse and macro expand the XML tool at ``config_file``, returning a cacheable tool document.
+
+    This only involves picklable arguments and results, so it can be run in worker processes.
+    Returns ``None`` if the tool can't be parsed, errors are reported when the tool is loaded.
+    """
+    try:
+        return tool_document_from_source(get_tool_source(config_file, enable_beta_formats=enable_beta_formats))
+    except Exception:
+        return None
+
+
 class ToolDocumentCache:
 
     def __init__(self, cache_dir):
@@ -38,6 +311,7 @@ class ToolDocumentCache:
             os.makedirs(self.cache_dir)
         self.cache_file = os.path.join(self.cache_dir, 'cache.sqlite')
         self.writeable_cache_file = None
+        self._lock = Lock()
         # Create database if necessary using 'c' flag
         self._cache = SqliteDict(self.cache_file, flag='c', encode=encoder, decode=decoder, autocommit=False)
         # Switch SqliteDict back to readonly
@@ -50,18 +324,51 @@ class ToolDocumentCache:
         self._cache = SqliteDict(self.cache_file, flag='r', encode=encoder, decode=decoder, autocommit=False)
         self.writeable_cache_file = None
 
-    def get(self, config_file):
-        tool_document = self._cache.get(config_file)
+    def get(self, config_file, modtimes=None):
+        """Return the tool document for ``config_file`` if it is still up to date.
+
+        ``modtimes`` may be a dictionary shared between calls, in which case each
+        tool and macro file is only stat'ed once (macro files are often shared by
+        many tools).
+        """
+        try:
+            tool_document = self._cache.get(config_file)
+        except Exception:
+            # Unreadable entries (e.g. written by an incompatible Galaxy) are cache misses.
+            log.debug("Failed to load tool document for %s from cache", config_file, exc_info=True)
+            return None
         if not tool_document:
             return None
         if tool_document.get('tool_cache_version') != CURRENT_TOOL_CACHE_VERSION:
             return None
         for path, modtime in tool_document['paths_and_modtimes'].items():
-            if os.path.getmtime(path) != modtime:
+            if modtimes is None:
+                current_modtime = os.path.getmtime(path)
+            else:
+                current_modtime = modtimes.get(path)
+                if current_modtime is None:
+                    current_modtime = modtimes[path] = os.path.getmtime(path)
+            if current_modtime != modtime:
                 return None
         return tool_document
 
+    def get_snapshot(self, tool_document, load_tool_source):
+        """Return a :class:`ToolSourceSnapshot` for ``tool_document`` or ``None`` if there is
+        no usable snapshot recorded by the running Galaxy version."""
+        try:
+            snapshot = (tool_document.get('snapshots') or {}).get(VERSION)
+            if not snapshot:
+                return None
+            return ToolSourceSnapshot(snapshot, tool_document, load_tool_source)
+        except Exception:
+            log.debug("Failed to load tool source snapshot, parsing tool document instead", exc_info=True)
+            return None
+
     def make_writable(self):
+        with self._lock:
+            self._make_writable()
+
+    def _make_writable(self):
         if not self.writeable_cache_file:
             self.writeable_cache_file = tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='cache.sqlite.tmp', delete=False)
             if os.path.exists(self.cache_file):
@@ -75,14 +382,11 @@ class ToolDocumentCache:
             self.reopen_ro()
 
     def set(self, config_file, tool_source):
+        self.set_document(config_file, tool_document_from_source(tool_source))
+
+    def set_document(self, config_file, tool_document):
         self.make_writable()
-        to_persist = {
-            'document': tool_source.to_string(),
-            'macro_paths': tool_source.macro_paths,
-            'paths_and_modtimes': tool_source.paths_and_modtimes(),
-            'tool_cache_version': CURRENT_TOOL_CACHE_VERSION,
-        }
-        self._cache[config_file] = to_persist
+        self._cache[config_file] = tool_document
 
     def delete(self, config_file):
         self.make_writable()
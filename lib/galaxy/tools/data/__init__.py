@@ -330,6 +330,7 @@ class TabularToolDataTable(ToolDataTable, Dictifiable):
         super().__init__(config_element, tool_data_path, from_shed_config, filename, tool_data_path_files, other_config_dict=other_config_dict)
         self.config_element = config_element
         self.data = []
+        self._invalidate_indexes()
         self.configure_and_load(config_element, tool_data_path, from_shed_config)
 
     def configure_and_load(self, config_element, tool_data_path, from_shed_config=False, url_timeout=10):
@@ -454,26 +455,56 @@ class TabularToolDataTable(ToolDataTable, Dictifiable):
         return self.data
 
     def get_field(self, value):
-        rval = None
-        for i in self.get_named_fields_list():
-            if i['value'] == value:
-                rval = TabularToolDataField(i)
-        return rval
+        rows = self._get_column_index(self.columns['value']).get(value)
+        if not rows:
+            return None
+        # The last entry with this value wins
+        return TabularToolDataField(self._get_named_fields(self.get_fields()[rows[-1]], self.get_column_name_list()))
 
     def get_named_fields_list(self):
-        rval = []
         named_columns = self.get_column_name_list()
-        for fields in self.get_fields():
-            field_dict = {}
-            for i, field in enumerate(fields):
-                if i == len(named_columns):
-                    break
-                field_name = named_columns[i]
-                if field_name is None:
-                    field_name = i  # check that this is supposed to be 0 based.
-                field_dict[field_name] = field
-            rval.append(field_dict)
-        return rval
+        return [self._get_named_fields(fields, named_columns) for fields in self.get_fields()]
+
+    def _get_named_fields(self, fields, named_columns):
+        field_dict = {}
+        for i, field in enumerate(fields):
+            if i == len(named_columns):
+                break
+            field_name = named_columns[i]
+            if field_name is None:
+                field_name = i  # check that this is supposed to be 0 based.
+            field_dict[field_name] = field
+        return field_dict
+
+    def _invalidate_indexes(self):
+        # Indexes of the table data, built on first use. Entries added with
+        # `add_entry` are added to existing indexes, they are discarded when
+        # the data is loaded from files, reloaded or deduplicated.
+        self._column_indexes = {}
+        self._entry_set = None
+
+    def _get_column_index(self, column):
+        """Return a dictionary mapping the values in ``column`` to the positions of the entries with that value."""
+        index = self._column_indexes.get(column)
+        if index is None:
+            index = {}
+            for position, fields in enumerate(self.get_fields()):
+                index.setdefault(fields[column], []).append(position)
+            self._column_indexes[column] = index
+        return index
+
+    def _get_entry_set(self):
+        if self._entry_set is None:
+            self._entry_set = {tuple(fields) for fields in self.get_fields()}
+        return self._entry_set
+
+    def _index_appended_entry(self):
+        position = len(self.data) - 1
+        fields = self.data[position]
+        for column, index in self._column_indexes.items():
+            index.setdefault(fields[column], []).append(position)
+        if self._entry_set is not None:
+            self._entry_set.add(tuple(fields))
 
     def get_version_fields(self):
         return (self._loaded_content_version, self.get_fields())
@@ -515,6 +546,7 @@ class TabularToolDataTable(ToolDataTable, Dictifiable):
     def extend_data_with(self, filename, errors=None):
         here = os.path.dirname(os.path.abspath(filename))
         self.data.extend(self.parse_file_fields(filename, errors=errors, here=here))
+        self._invalidate_indexes()
         if not self.allow_duplicate_entries:
             self._deduplicate_data()
 
@@ -525,16 +557,20 @@ class TabularToolDataTable(ToolDataTable, Dictifiable):
         TODO: Allow named access to fields using the column names.
         """
         separator_char = "<TAB>" if self.separator == "\t" else self.separator
+        separator = self.separator
+        comment_char = self.comment_char
+        min_fields = self.largest_index + 1
         rval = []
         with open(filename) as fh:
             for i, line in enumerate(fh):
-                if line.lstrip().startswith(self.comment_char):
+                if line.lstrip().startswith(comment_char):
                     continue
                 line = line.rstrip("\n\r")
                 if line:
-                    line = expand_here_template(line, here=here)
-                    fields = line.split(self.separator)
-                    if self.largest_index < len(fields):
+                    if "$" in line:
+                        line = expand_here_template(line, here=here)
+                    fields = line.split(separator)
+                    if len(fields) >= min_fields:
                         rval.append(fields)
                     else:
                         line_error = "Line %i in tool data table '%s' is invalid (HINT: '%s' characters must be used to separate fields):\n%s" % ((i + 1), self.name, separator_char, line)
@@ -582,17 +618,16 @@ class TabularToolDataTable(ToolDataTable, Dictifiable):
                 return default
         rval = []
         # Look for table entry.
-        for fields in self.get_fields():
-            if fields[query_col] == query_val:
-                if return_attr is None:
-                    field_dict = {}
-                    for i, col_name in enumerate(self.get_column_name_list()):
-                        field_dict[col_name or i] = fields[i]
-                    rval.append(field_dict)
-                else:
-                    rval.append(fields[return_col])
-                if limit is not None and len(rval) == limit:
-                    break
+        all_fields = self.get_fields()
+        column_names = self.get_column_name_list() if return_attr is None else None
+        for position in self._get_column_index(query_col).get(query_val, ()):
+            fields = all_fields[position]
+            if return_attr is None:
+                rval.append({col_name or i: fields[i] for i, col_name in enumerate(column_names)})
+            else:
+                rval.append(fields[return_col])
+            if limit is not None and len(rval) == limit:
+                break
         return rval or default
 
     def get_filename_for_source(self, source, default=None):
@@ -628,8 +663,9 @@ class TabularToolDataTable(ToolDataTable, Dictifiable):
         is_error = False
         if self.largest_index < len(fields):
             fields = self._replace_field_separators(fields)
-            if (allow_duplicates and self.allow_duplicate_entries) or fields not in self.get_fields():
+            if (allow_duplicates and self.allow_duplicate_entries) or tuple(fields) not in self._get_entry_set():
                 self.data.append(fields)
+                self._index_appended_entry()
             else:
                 log.debug("Attempted to add fields (%s) to data table '%s', but this entry already exists and allow_duplicates is False.", fields, self.name)
                 is_error = True
@@ -717,17 +753,18 @@ class TabularToolDataTable(ToolDataTable, Dictifiable):
 
     def _deduplicate_data(self):
         # Remove duplicate entries, without recreating self.data object
-        dup_lines = []
-        hash_set = set()
-        for i, fields in enumerate(self.data):
-            fields_hash = hash(self.separator.join(fields))
-            if fields_hash in hash_set:
-                dup_lines.append(i)
+        deduplicated_data = []
+        entry_set = set()
+        for fields in self.data:
+            entry = tuple(fields)
+            if entry in entry_set:
                 log.debug('Found duplicate entry in tool data table "%s", but duplicates are not allowed, removing additional entry for: "%s"', self.name, fields)
             else:
-                hash_set.add(fields_hash)
-        for i in reversed(dup_lines):
-            self.data.pop(i)
+                entry_set.add(entry)
+                deduplicated_data.append(fields)
+        self.data[:] = deduplicated_data
+        self._invalidate_indexes()
+        self._entry_set = entry_set
 
     @property
     def xml_string(self):
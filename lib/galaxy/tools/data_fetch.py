@@ -5,7 +5,11 @@ import os
 import shutil
 import sys
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
+from urllib.error import HTTPError
 
 import bdbag.bdbag_api
 
@@ -21,6 +25,8 @@ from galaxy.util.compression_utils import CompressedFile
 from galaxy.util.hash_util import HASH_NAMES, memory_bound_hexdigest
 
 DESCRIPTION = """Data Import Script"""
+DEFAULT_FETCH_CONCURRENCY = 1
+DEFAULT_FETCH_RETRIES = 0
 
 
 def main(argv=None):
@@ -275,7 +281,8 @@ def _fetch_target(upload_config, target):
             rval["extra_files"] = os.path.abspath(staged_extra_files)
         return _copy_and_validate_simple_attributes(item, rval)
 
-    elements = elements_tree_map(_resolve_item, items)
+    # Elements are fetched and staged concurrently, results keep the order of the request.
+    elements = elements_tree_map(_resolve_item, items, max_workers=upload_config.fetch_concurrency)
     fetched_target["elements"] = elements
     return fetched_target
 
@@ -300,7 +307,13 @@ def _decompress_target(upload_config, target):
     return result if fuzzy_root else temp_directory
 
 
-def elements_tree_map(f, items):
+def elements_tree_map(f, items, max_workers=1):
+    if max_workers > 1:
+        leaf_items = list(_leaf_items(items))
+        if len(leaf_items) > 1:
+            results = _map_concurrently(f, leaf_items, max_workers)
+            results_by_item = {id(item): result for item, result in zip(leaf_items, results)}
+            return elements_tree_map(lambda item: results_by_item[id(item)], items)
     new_items = []
     for item in items:
         if "elements" in item:
@@ -312,6 +325,26 @@ def elements_tree_map(f, items):
     return new_items
 
 
+def _leaf_items(items):
+    for item in items:
+        if "elements" in item:
+            yield from _leaf_items(item["elements"])
+        else:
+            yield item
+
+
+def _map_concurrently(f, items, max_workers):
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = [executor.submit(f, item) for item in items]
+        try:
+            return [future.result() for future in futures]
+        except Exception:
+            # Like when fetching serially, the first failing element fails the request.
+            for future in futures:
+                future.cancel()
+            raise
+
+
 def _directory_to_items(directory):
     items = []
     dir_elements = {}
@@ -336,7 +369,7 @@ def _has_src_to_path(upload_config, item, is_dataset=False):
     name = item.get("name")
     if src == "url":
         url = item.get("url")
-        path = sniff.stream_url_to_file(url, file_sources=get_file_sources())
+        path = _fetch_url(upload_config, url)
         if not is_dataset:
             # Actual target dataset will validate and put results in dict
             # that gets passed back to Galaxy.
@@ -358,6 +391,27 @@ def _has_src_to_path(upload_config, item, is_dataset=False):
     return name, path
 
 
+def _fetch_url(upload_config, url):
+    attempt = 0
+    while True:
+        try:
+            return sniff.stream_url_to_file(url, file_sources=get_file_sources(), timeout=upload_config.fetch_timeout)
+        except Exception as e:
+            if attempt >= upload_config.fetch_retries or not _is_retryable(e):
+                raise
+            attempt += 1
+            print(f"Fetching [{url}] failed ({e}), retrying ({attempt}/{upload_config.fetch_retries})")
+            time.sleep(upload_config.fetch_retry_delay * attempt)
+
+
+def _is_retryable(exception):
+    if isinstance(exception, HTTPError):
+        # Client errors (e.g. 404) won't go away by retrying.
+        return exception.code >= 500
+    # Includes URLError, connection errors and timeouts.
+    return isinstance(exception, OSError)
+
+
 def _handle_hash_validation(upload_config, hash_function, hash_value, path):
     if upload_config.validate_hashes:
         calculated_hash_value = memory_bound_hexdigest(hash_func_name=hash_function, path=path)
@@ -375,22 +429,24 @@ def _arg_parser():
 
 
 _file_sources = None
+_file_sources_lock = threading.Lock()
 
 
 def get_file_sources():
     global _file_sources
-    if _file_sources is None:
-        from galaxy.files import ConfiguredFileSources
-        file_sources = None
-        if os.path.exists("file_sources.json"):
-            file_sources_as_dict = None
-            with open("file_sources.json") as f:
-                file_sources_as_dict = json.load(f)
-            if file_sources_as_dict is not None:
-                file_sources = ConfiguredFileSources.from_dict(file_sources_as_dict)
-        if file_sources is None:
-            ConfiguredFileSources.from_dict([])
-        _file_sources = file_sources
+    with _file_sources_lock:
+        if _file_sources is None:
+            from galaxy.files import ConfiguredFileSources
+            file_sources = None
+            if os.path.exists("file_sources.json"):
+                file_sources_as_dict = None
+                with open("file_sources.json") as f:
+                    file_sources_as_dict = json.load(f)
+                if file_sources_as_dict is not None:
+                    file_sources = ConfiguredFileSources.from_dict(file_sources_as_dict)
+            if file_sources is None:
+                ConfiguredFileSources.from_dict([])
+            _file_sources = file_sources
     return _file_sources
 
 
@@ -404,9 +460,14 @@ class UploadConfig:
         self.auto_decompress = request.get("auto_decompress", False)
         self.validate_hashes = request.get("validate_hashes", False)
         self.link_data_only = _link_data_only(request)
+        self.fetch_concurrency = request.get("fetch_concurrency", DEFAULT_FETCH_CONCURRENCY)
+        self.fetch_timeout = request.get("fetch_timeout", None)
+        self.fetch_retries = request.get("fetch_retries", DEFAULT_FETCH_RETRIES)
+        self.fetch_retry_delay = 1
 
         self.__workdir = os.path.abspath(".")
         self.__upload_count = 0
+        self.__upload_count_lock = threading.Lock()
 
     def get_option(self, item, key):
         """Return item[key] if specified otherwise use default from UploadConfig.
@@ -420,8 +481,9 @@ class UploadConfig:
             return getattr(self, key)
 
     def __new_dataset_path(self):
-        path = "gxupload_%d" % self.__upload_count
-        self.__upload_count += 1
+        with self.__upload_count_lock:
+            path = "gxupload_%d" % self.__upload_count
+            self.__upload_count += 1
         return path
 
     def ensure_in_working_directory(self, path, purge_source, in_place):
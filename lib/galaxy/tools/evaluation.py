@@ -401,7 +401,7 @@ class ToolEvaluator:
             for key in 'port', 'name', 'url':
                 val = ep.get(key, None)
                 if val is not None:
-                    val = fill_template(val, context=param_dict, python_template_version=self.tool.python_template_version)
+                    val = self._fill_template(val, context=param_dict)
                     clean_val = []
                     for line in val.split('\n'):
                         clean_val.append(line.strip())
@@ -468,6 +468,15 @@ class ToolEvaluator:
 
         return self.command_line, self.extra_filenames, self.environment_variables
 
+    def _fill_template(self, template_text, context):
+        """Fill a command line, config file or environment template of the tool, compiled templates are cached per process."""
+        template_cache = getattr(self.app, 'compiled_template_cache', None)
+        return fill_template(template_text,
+                             context=context,
+                             python_template_version=self.tool.python_template_version,
+                             template_cache=template_cache,
+                             template_cache_key=[self.tool.id, self.tool.version] if template_cache else None)
+
     def __build_command_line(self):
         """
         Build command line to invoke this tool given a populated param_dict
@@ -480,7 +489,7 @@ class ToolEvaluator:
             return
         try:
             # Substituting parameters into the command
-            command_line = fill_template(command, context=param_dict, python_template_version=self.tool.python_template_version)
+            command_line = self._fill_template(command, context=param_dict)
             cleaned_command_line = []
             # Remove leading and trailing whitespace from each line for readability.
             for line in command_line.split('\n'):
@@ -613,7 +622,7 @@ class ToolEvaluator:
         if not os.path.exists(parent_dir):
             safe_makedirs(parent_dir)
         if is_template:
-            value = fill_template(content, context=context, python_template_version=self.tool.python_template_version)
+            value = self._fill_template(content, context=context)
         else:
             value = unicodify(content)
         if strip:
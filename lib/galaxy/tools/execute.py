@@ -72,6 +72,12 @@ def execute(trans, tool, mapping_params, history, rerun_remap_job_id=None, colle
         else:
             execution_tracker.record_error(result)
 
+    if collection_info:
+        # Load the permissions of all mapped over datasets at once instead of once per job.
+        datasets = [dataset_instance.dataset for collection in collection_info.collections.values()
+                    for dataset_instance in collection.dataset_instances if dataset_instance is not None]
+        trans.app.security_agent.prefetch_dataset_permissions(datasets)
+
     tool_action = tool.tool_action
     if hasattr(tool_action, "check_inputs_ready"):
         for params in execution_tracker.param_combinations:
@@ -107,6 +113,11 @@ def execute(trans, tool, mapping_params, history, rerun_remap_job_id=None, colle
     else:
         # Make sure collections, implicit jobs etc are flushed even if there are no precreated output datasets
         trans.sa_session.flush()
+    if execution_cache.dataset_permissions_to_persist:
+        # Output datasets need ids before their permissions can be inserted.
+        trans.sa_session.flush()
+        trans.app.security_agent.set_new_dataset_permissions_in_bulk(execution_cache.dataset_permissions_to_persist)
+        execution_cache.dataset_permissions_to_persist = []
     for job in execution_tracker.successful_jobs:
         # Put the job in the queue if tracking in memory
         tool.app.job_manager.enqueue(job, tool=tool, flush=False)
@@ -1,5 +1,16 @@
 from logging import getLogger
 
+from sqlalchemy import (
+    not_,
+    or_,
+)
+from sqlalchemy.orm import (
+    contains_eager,
+    joinedload,
+    object_session,
+    selectinload,
+)
+
 import galaxy.model
 
 log = getLogger(__name__)
@@ -26,6 +37,8 @@ class DatasetMatcherFactory:
         self._tool = tool
         self._data_inputs = []
         self._matches_format_cache = {}
+        self._converts_to_format_cache = {}
+        self._history_dataset_indexes = {}
         if tool:
             valid_input_states = tool.valid_input_states
         else:
@@ -63,6 +76,38 @@ class DatasetMatcherFactory:
 
         return formats[format]
 
+    def converts_to_any_format(self, hda_extension, formats):
+        """Return True if datasets of ``hda_extension`` can be implicitly converted to one of ``formats``."""
+        cache_key = (hda_extension, tuple(formats))
+        if cache_key not in self._converts_to_format_cache:
+            datatypes_registry = self._trans.app.datatypes_registry
+            converted_ext, _ = datatypes_registry.find_conversion_destination_for_dataset_by_extensions(hda_extension, formats)
+            self._converts_to_format_cache[cache_key] = converted_ext is not None
+        return self._converts_to_format_cache[cache_key]
+
+    def history_datasets(self, history, param):
+        """
+        Return the active, visible datasets of ``history`` that ``param`` may
+        be matched to, ordered by hid.
+
+        Only datasets in a valid input state and with an extension matching the
+        formats of the parameter (directly or through an implicit conversion)
+        are loaded. If the datasets of the history have already been loaded
+        all of them are returned.
+        """
+        if hasattr(history, '_active_visible_datasets_and_roles') or object_session(history) is None:
+            return history.active_visible_datasets_and_roles
+        if history.id not in self._history_dataset_indexes:
+            self._history_dataset_indexes[history.id] = HistoryDatasetIndex(history, self.valid_input_states)
+        history_dataset_index = self._history_dataset_indexes[history.id]
+        formats = param.formats
+        extensions = [extension for extension in history_dataset_index.extensions
+                      if self.matches_any_format(extension, formats) or self.converts_to_any_format(extension, formats)]
+        if len(extensions) == len(history_dataset_index.extensions) and not history_dataset_index.loaded:
+            # Every dataset may match (e.g. format="data"), the contents of the history are loaded as a whole.
+            return history.active_visible_datasets_and_roles
+        return history_dataset_index.datasets(extensions)
+
     def _collect_data_inputs(self, input):
         type_name = input.type
         if type_name == "repeat" or type_name == "upload_dataset" or type_name == "section":
@@ -85,6 +130,70 @@ class DatasetMatcherFactory:
             return DatasetCollectionMatcher(self._trans, dataset_matcher)
 
 
+class HistoryDatasetIndex:
+    """
+    Active and visible datasets of a history in a valid input state, grouped
+    by extension.
+
+    The extensions present in the history are queried first, datasets are
+    then loaded for the extensions requested by data parameters only.
+    """
+
+    def __init__(self, history, valid_input_states):
+        self.history = history
+        self.valid_input_states = valid_input_states
+        self._extensions = None
+        self._datasets_by_extension = {}
+
+    def _query(self, *entities):
+        HistoryDatasetAssociation = galaxy.model.HistoryDatasetAssociation
+        Dataset = galaxy.model.Dataset
+        return (object_session(self.history).query(*entities)
+            .select_from(HistoryDatasetAssociation)
+            .join(Dataset, HistoryDatasetAssociation.table.c.dataset_id == Dataset.table.c.id)
+            .filter(HistoryDatasetAssociation.table.c.history_id == self.history.id)
+            .filter(not_(HistoryDatasetAssociation.table.c.deleted))
+            .filter(HistoryDatasetAssociation.table.c.visible)
+            .filter(Dataset.table.c.state.in_(self.valid_input_states)))
+
+    @property
+    def loaded(self):
+        return bool(self._datasets_by_extension)
+
+    @property
+    def extensions(self):
+        if self._extensions is None:
+            query = self._query(galaxy.model.HistoryDatasetAssociation.table.c.extension).distinct()
+            self._extensions = [extension for extension, in query]
+        return self._extensions
+
+    def datasets(self, extensions):
+        """Return the datasets with one of ``extensions``, ordered by hid."""
+        missing_extensions = [extension for extension in extensions if extension not in self._datasets_by_extension]
+        if missing_extensions:
+            self._load(missing_extensions)
+        datasets = [hda for extension in extensions for hda in self._datasets_by_extension[extension]]
+        return sorted(datasets, key=lambda hda: hda.hid if hda.hid is not None else -1)
+
+    def _load(self, extensions):
+        extension_column = galaxy.model.HistoryDatasetAssociation.table.c.extension
+        extension_filter = extension_column.in_([extension for extension in extensions if extension is not None])
+        if None in extensions:
+            extension_filter = or_(extension_filter, extension_column.is_(None))
+        query = (self._query(galaxy.model.HistoryDatasetAssociation)
+            .filter(extension_filter)
+            .order_by(galaxy.model.HistoryDatasetAssociation.table.c.hid.asc())
+            .options(contains_eager("dataset"),
+                     joinedload("dataset.actions"),
+                     joinedload("dataset.actions.role"),
+                     joinedload("tags"),
+                     selectinload("implicitly_converted_datasets")))
+        for extension in extensions:
+            self._datasets_by_extension[extension] = []
+        for hda in query:
+            self._datasets_by_extension[hda.extension].append(hda)
+
+
 class DatasetMatcher:
     """ Utility class to aid DataToolParameter and similar classes in reasoning
     about what HDAs could match or are selected for a parameter and value.
@@ -222,9 +331,7 @@ class SummaryDatasetCollectionMatcher:
             if self.dataset_matcher_factory.matches_any_format(extension, formats):
                 continue
 
-            datatypes_registry = self._trans.app.datatypes_registry
-            converted_ext, _ = datatypes_registry.find_conversion_destination_for_dataset_by_extensions(extension, formats)
-            if not converted_ext:
+            if not self.dataset_matcher_factory.converts_to_any_format(extension, formats):
                 return False
             else:
                 uses_implicit_conversion = True
@@ -2,6 +2,8 @@
 Support for generating the options for a SelectToolParameter dynamically (based
 on the values of other parameters or other aspects of the current state)
 """
+import itertools
+import json
 import logging
 import os
 import re
@@ -14,10 +16,65 @@ from galaxy.model import (
     User
 )
 from galaxy.util import string_as_bool
+from galaxy.util.lru_cache import LRUCache
 from . import validation
 
 log = logging.getLogger(__name__)
 
+# Returned by `Filter.get_cache_key` when the result of a filter can't be cached.
+UNCACHEABLE = object()
+# Returned by filters when the value they depend on is missing or can't be used.
+INVALID_VALUE = object()
+_dynamic_options_counter = itertools.count()
+
+
+def value_cache_key(value):
+    """Return a hashable representation of a (JSON like) parameter or metadata value."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    try:
+        return json.dumps(value, sort_keys=True)
+    except (TypeError, ValueError):
+        return UNCACHEABLE
+
+
+class DynamicOptionsCache:
+    """
+    Bounded cache of the options computed by :class:`DynamicOptions`.
+
+    Options are keyed on the select parameter, the version of the source of the
+    options (the data table version or the path and modification time of a
+    dataset) and the values the filters depend on. Reloading a data table also
+    invalidates the options computed from it, see `invalidate_data_tables`.
+    """
+
+    def __init__(self, maxsize=500):
+        self._cache = LRUCache(maxsize)
+        # Entries of invalidated data tables aren't looked up anymore and are
+        # discarded once they become the least recently used ones.
+        self._data_table_generations = {}
+        self.invalidations = 0
+
+    def get(self, cache_key):
+        return self._cache.get(cache_key)
+
+    def put(self, cache_key, options):
+        self._cache.put(cache_key, options)
+
+    def data_table_generation(self, table_name):
+        return self._data_table_generations.get(table_name, 0)
+
+    def invalidate_data_tables(self, table_names):
+        for table_name in table_names:
+            self._data_table_generations[table_name] = self.data_table_generation(table_name) + 1
+        self.invalidations += 1
+        log.debug("Invalidated dynamic options of data tables %s, dynamic options cache stats: %s", ', '.join(table_names), self.stats())
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats['invalidations'] = self.invalidations
+        return stats
+
 
 class Filter:
     """
@@ -42,6 +99,14 @@ class Filter:
         """Returns a list of options after the filter is applied"""
         raise TypeError("Abstract Method")
 
+    def get_cache_key(self, trans, other_values):
+        """
+        Returns a hashable value capturing what the result of the filter depends
+        on besides the options (e.g. the value of a referenced parameter), or
+        UNCACHEABLE. Filters configured by their attributes only return None.
+        """
+        return None
+
 
 class StaticValueFilter(Filter):
     """
@@ -66,13 +131,20 @@ class StaticValueFilter(Filter):
         self.column = d_option.column_spec_to_index(column)
         self.keep = string_as_bool(elem.get("keep", 'True'))
 
-    def filter_options(self, options, trans, other_values):
-        rval = []
+    def _get_filter_value(self, trans):
         filter_value = self.value
         try:
             filter_value = User.expand_user_properties(trans.user, filter_value)
         except Exception:
             pass
+        return filter_value
+
+    def get_cache_key(self, trans, other_values):
+        return self._get_filter_value(trans)
+
+    def filter_options(self, options, trans, other_values):
+        rval = []
+        filter_value = self._get_filter_value(trans)
         for fields in options:
             if self.keep == (filter_value == fields[self.column]):
                 rval.append(fields)
@@ -102,13 +174,20 @@ class RegexpFilter(Filter):
         self.column = d_option.column_spec_to_index(column)
         self.keep = string_as_bool(elem.get("keep", 'True'))
 
-    def filter_options(self, options, trans, other_values):
-        rval = []
+    def _get_filter_value(self, trans):
         filter_value = self.value
         try:
             filter_value = User.expand_user_properties(trans.user, filter_value)
         except Exception:
             pass
+        return filter_value
+
+    def get_cache_key(self, trans, other_values):
+        return self._get_filter_value(trans)
+
+    def filter_options(self, options, trans, other_values):
+        rval = []
+        filter_value = self._get_filter_value(trans)
         filter_pattern = re.compile(filter_value)
         for fields in options:
             if self.keep == (not filter_pattern.match(fields[self.column]) is None):
@@ -156,19 +235,7 @@ class DataMetaFilter(Filter):
     def get_dependency_name(self):
         return self.ref_name
 
-    def filter_options(self, options, trans, other_values):
-        def compare_meta_value(file_value, dataset_value):
-            if isinstance(dataset_value, list):
-                if self.multiple:
-                    file_value = file_value.split(self.separator)
-                    for value in dataset_value:
-                        if value not in file_value:
-                            return False
-                    return True
-                return file_value in dataset_value
-            if self.multiple:
-                return dataset_value in file_value.split(self.separator)
-            return file_value == dataset_value
+    def _get_meta_value(self, other_values):
         ref = other_values.get(self.ref_name, None)
         if isinstance(ref, HistoryDatasetCollectionAssociation):
             ref = ref.to_hda_representative(self.multiple)
@@ -176,7 +243,7 @@ class DataMetaFilter(Filter):
         is_data_list = isinstance(ref, galaxy.tools.wrappers.DatasetListWrapper) or isinstance(ref, list)
         is_data_or_data_list = is_data or is_data_list
         if not isinstance(ref, HistoryDatasetAssociation) and not is_data_or_data_list:
-            return []  # not a valid dataset
+            return INVALID_VALUE  # not a valid dataset
 
         # get the metadata value. for lists (of data sets) and collections
         # the meta data value of all elements is determined if its the same
@@ -191,9 +258,35 @@ class DataMetaFilter(Filter):
                     meta_value = this_meta_value
                 else:
                     # Different values with mismatching metadata, return []
-                    return []
+                    return INVALID_VALUE
         else:
             meta_value = ref.metadata.get(self.key, None)
+        return meta_value
+
+    def get_cache_key(self, trans, other_values):
+        if self.column is None:
+            return UNCACHEABLE
+        meta_value = self._get_meta_value(other_values)
+        if meta_value is INVALID_VALUE:
+            return ()
+        return value_cache_key(meta_value)
+
+    def filter_options(self, options, trans, other_values):
+        def compare_meta_value(file_value, dataset_value):
+            if isinstance(dataset_value, list):
+                if self.multiple:
+                    file_value = file_value.split(self.separator)
+                    for value in dataset_value:
+                        if value not in file_value:
+                            return False
+                    return True
+                return file_value in dataset_value
+            if self.multiple:
+                return dataset_value in file_value.split(self.separator)
+            return file_value == dataset_value
+        meta_value = self._get_meta_value(other_values)
+        if meta_value is INVALID_VALUE:
+            return []
 
         # if no meta data value could be determined just return a copy
         # of the original options
@@ -257,15 +350,24 @@ class ParamValueFilter(Filter):
     def get_dependency_name(self):
         return self.ref_name
 
-    def filter_options(self, options, trans, other_values):
+    def _get_ref_value(self, trans, other_values):
         if trans is not None and trans.workflow_building_mode:
-            return []
+            return INVALID_VALUE
         ref = other_values.get(self.ref_name, None)
         for ref_attribute in self.ref_attribute:
             if not hasattr(ref, ref_attribute):
-                return []  # ref does not have attribute, so we cannot filter, return empty list
+                return INVALID_VALUE  # ref does not have attribute, so we cannot filter, return empty list
             ref = getattr(ref, ref_attribute)
-        ref = str(ref)
+        return str(ref)
+
+    def get_cache_key(self, trans, other_values):
+        ref = self._get_ref_value(trans, other_values)
+        return () if ref is INVALID_VALUE else ref
+
+    def filter_options(self, options, trans, other_values):
+        ref = self._get_ref_value(trans, other_values)
+        if ref is INVALID_VALUE:
+            return []
         rval = []
         for fields in options:
             if self.keep == (fields[self.column] == ref):
@@ -436,10 +538,27 @@ class RemoveValueFilter(Filter):
         self.multiple = string_as_bool(elem.get("multiple", "False"))
         self.separator = elem.get("separator", ",")
 
-    def filter_options(self, options, trans, other_values):
+    def _get_value(self, trans, other_values):
         if trans is not None and trans.workflow_building_mode:
-            return options
+            return INVALID_VALUE
+        value = self.value
+        if value is None:
+            if self.ref_name is not None:
+                value = other_values.get(self.ref_name)
+            else:
+                data_ref = other_values.get(self.meta_ref)
+                if isinstance(data_ref, HistoryDatasetCollectionAssociation):
+                    data_ref = data_ref.to_hda_representative()
+                if not isinstance(data_ref, HistoryDatasetAssociation) and not isinstance(data_ref, galaxy.tools.wrappers.DatasetFilenameWrapper):
+                    return INVALID_VALUE  # cannot modify options
+                value = data_ref.metadata.get(self.metadata_key, None)
+        return value
+
+    def get_cache_key(self, trans, other_values):
+        value = self._get_value(trans, other_values)
+        return () if value is INVALID_VALUE else value_cache_key(value)
 
+    def filter_options(self, options, trans, other_values):
         def compare_value(option_value, filter_value):
             if isinstance(filter_value, list):
                 if self.multiple:
@@ -453,17 +572,9 @@ class RemoveValueFilter(Filter):
                 return filter_value in option_value.split(self.separator)
             return option_value == filter_value
 
-        value = self.value
-        if value is None:
-            if self.ref_name is not None:
-                value = other_values.get(self.ref_name)
-            else:
-                data_ref = other_values.get(self.meta_ref)
-                if isinstance(data_ref, HistoryDatasetCollectionAssociation):
-                    data_ref = data_ref.to_hda_representative()
-                if not isinstance(data_ref, HistoryDatasetAssociation) and not isinstance(data_ref, galaxy.tools.wrappers.DatasetFilenameWrapper):
-                    return options  # cannot modify options
-                value = data_ref.metadata.get(self.metadata_key, None)
+        value = self._get_value(trans, other_values)
+        if value is INVALID_VALUE:
+            return options  # cannot modify options
         # Default to the second column (i.e. 1) since this used to work only on options produced by the data_meta filter
         value_col = self.dynamic_option.columns.get('value', 1)
         return [option for option in options if not compare_value(option[value_col], value)]
@@ -523,6 +634,8 @@ class DynamicOptions:
         self.has_dataset_dependencies = False
         self.validators = []
         self.converter_safe = True
+        # Identifies the options of this parameter in the dynamic options cache
+        self._cache_id = next(_dynamic_options_counter)
 
         # Parse the <options> tag
         self.separator = elem.get('separator', '\t')
@@ -648,6 +761,53 @@ class DynamicOptions:
         return rval
 
     def get_fields(self, trans, other_values):
+        cache = getattr(self.tool_param.tool.app, 'dynamic_options_cache', None)
+        cache_key = cache and self._get_fields_cache_key(cache, trans, other_values)
+        if cache_key is None:
+            return self._get_fields(trans, other_values)
+        options = cache.get(cache_key)
+        if options is None:
+            options = self._get_fields(trans, other_values)
+            cache.put(cache_key, options)
+        return list(options)
+
+    def _get_fields_cache_key(self, cache, trans, other_values):
+        """
+        Returns the key of the options in the dynamic options cache, None if
+        the options can't (or don't need to) be cached.
+        """
+        if self.dataset_ref_name:
+            dataset = other_values.get(self.dataset_ref_name, None)
+            if not dataset or not hasattr(dataset, 'file_name'):
+                return None
+            path = dataset.file_name
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            source_key = ('dataset', path, stat.st_mtime, stat.st_size)
+        elif self.tool_data_table_name:
+            tool_data_table = self.tool_data_table
+            version = getattr(tool_data_table, '_loaded_content_version', None)
+            if version is None or not self.filters:
+                # Unfiltered options are the fields of the data table
+                return None
+            source_key = ('data_table', self.tool_data_table_name, cache.data_table_generation(self.tool_data_table_name), id(tool_data_table), version)
+        elif self.file_fields and self.filters:
+            # Fields from a file or another parameter are loaded once with the tool
+            source_key = None
+        else:
+            return None
+        filter_keys = []
+        for filter in self.filters:
+            filter_key = filter.get_cache_key(trans, other_values)
+            if filter_key is UNCACHEABLE:
+                return None
+            filter_keys.append(filter_key)
+        workflow_building_mode = bool(trans is not None and trans.workflow_building_mode)
+        return (self._cache_id, source_key, tuple(filter_keys), workflow_building_mode)
+
+    def _get_fields(self, trans, other_values):
         if self.dataset_ref_name:
             dataset = other_values.get(self.dataset_ref_name, None)
             if not dataset or not hasattr(dataset, 'file_name'):
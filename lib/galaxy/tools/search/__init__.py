@@ -4,6 +4,8 @@ installed within this Galaxy. Before changing index-building
 or searching related parts it is deeply recommended to read
 through the library docs at https://whoosh.readthedocs.io.
 """
+import hashlib
+import json
 import logging
 import os
 import re
@@ -27,13 +29,17 @@ from whoosh.scoring import (
     BM25F,
     MultiWeighting,
 )
-from whoosh.writing import AsyncWriter
 
 from galaxy.util import ExecutionTimer
 from galaxy.web.framework.helpers import to_unicode
 
 log = logging.getLogger(__name__)
 
+# Name of the lock file serializing index updates of Galaxy processes sharing an index directory.
+INDEX_UPDATE_LOCK = "GALAXY_TOOLBOX_INDEX_UPDATE"
+# Seconds to wait for the Whoosh writer lock.
+INDEX_WRITER_TIMEOUT = 60
+
 
 def get_or_create_index(index_dir, schema):
     if not os.path.exists(index_dir):
@@ -62,7 +68,8 @@ class ToolBoxSearch:
                              description=TEXT,
                              section=TEXT,
                              help=TEXT,
-                             labels=KEYWORD)
+                             labels=KEYWORD,
+                             content_hash=ID(stored=True))
         self.rex = analysis.RegexTokenizer()
         self.index_dir = index_dir
         self.toolbox = toolbox
@@ -78,44 +85,71 @@ class ToolBoxSearch:
 
     def build_index(self, tool_cache, index_help=True):
         """
-        Prepare search index for tools loaded in toolbox.
-        Use `tool_cache` to determine which tools need indexing and which tools should be expired.
+        Update the search index for the tools loaded in the toolbox.
+
+        Use `tool_cache` to determine which tools should be indexed. Only documents
+        of tools that are new or whose indexed content changed (determined using a
+        hash of the document that is stored in the index) are written and documents
+        of tools that are gone are deleted. Galaxy processes on the same host may
+        share the index directory, updates are serialized using a lock file and
+        processes finding an up-to-date index don't write to it.
         """
         log.debug('Starting to build toolbox index.')
         self.index_count += 1
         execution_timer = ExecutionTimer()
-        with self.index.reader() as reader:
-            # Index ocasionally contains empty stored fields
-            indexed_tool_ids = {f['id'] for f in reader.all_stored_fields() if f}
-        tool_ids_to_remove = (indexed_tool_ids - set(tool_cache._tool_paths_by_id.keys())).union(tool_cache._removed_tool_ids)
-        for indexed_tool_id in indexed_tool_ids:
-            indexed_tool = tool_cache.get_tool_by_id(indexed_tool_id)
-            if not indexed_tool:
-                tool_ids_to_remove.add(indexed_tool_id)
+        documents = self._tool_documents(tool_cache, index_help=index_help)
+        lock = self.index.storage.lock(INDEX_UPDATE_LOCK)
+        lock.acquire(blocking=True)
+        try:
+            with self.index.reader() as reader:
+                # Index ocasionally contains empty stored fields
+                indexed_hashes = {f['id']: f.get('content_hash') for f in reader.all_stored_fields() if f}
+            tool_ids_to_remove = set(indexed_hashes) - set(documents)
+            documents_to_update = [doc for tool_id, doc in documents.items() if indexed_hashes.get(tool_id) != doc['content_hash']]
+            if tool_ids_to_remove or documents_to_update:
+                with self.index.writer(timeout=INDEX_WRITER_TIMEOUT) as writer:
+                    for tool_id in tool_ids_to_remove:
+                        writer.delete_by_term('id', tool_id)
+                    for add_doc_kwds in documents_to_update:
+                        writer.update_document(**add_doc_kwds)
+        finally:
+            lock.release()
+        log.debug("Toolbox index finished %s, %d documents added or updated, %d removed",
+                  execution_timer, len(documents_to_update), len(tool_ids_to_remove))
+
+    def _tool_documents(self, tool_cache, index_help=True):
+        """
+        Return a dictionary mapping the ids of the tools that should be indexed to their documents.
+
+        The latest version of every tool is indexed, unless it is hidden, then the
+        latest older version that isn't hidden is indexed instead.
+        """
+        documents = {}
+        for tool_id in list(tool_cache._tool_paths_by_id.keys()):
+            tool = tool_cache.get_tool_by_id(tool_id)
+            if not tool or not tool.is_latest_version:
+                continue
+            if tool.hidden:
+                tool = self._visible_older_version(tool_cache, tool)
+                if not tool:
+                    continue
+            if tool.id in documents:
                 continue
-            if not indexed_tool.is_latest_version and not indexed_tool.latest_version.hidden:
-                tool_ids_to_remove.add(indexed_tool_id)
-        with AsyncWriter(self.index) as writer:
-            for tool_id in tool_ids_to_remove:
-                writer.delete_by_term('id', tool_id)
-            for tool_id in tool_cache._new_tool_ids - indexed_tool_ids:
-                tool = tool_cache.get_tool_by_id(tool_id)
-                if tool and tool.is_latest_version:
-                    if tool.hidden:
-                        # we check if there is an older tool we can return
-                        if tool.lineage:
-                            for tool_version in reversed(tool.lineage.get_versions()):
-                                tool = tool_cache.get_tool_by_id(tool_version.id)
-                                if tool and not tool.hidden:
-                                    tool_id = tool.id
-                                    break
-                            else:
-                                continue
-                        else:
-                            continue
-                    add_doc_kwds = self._create_doc(tool_id=tool_id, tool=tool, index_help=index_help)
-                    writer.update_document(**add_doc_kwds)
-        log.debug("Toolbox index finished %s", execution_timer)
+            add_doc_kwds = self._create_doc(tool_id=tool.id, tool=tool, index_help=index_help)
+            if not add_doc_kwds:
+                continue
+            add_doc_kwds['content_hash'] = hashlib.sha1(json.dumps(add_doc_kwds, sort_keys=True).encode('utf-8')).hexdigest()
+            documents[tool.id] = add_doc_kwds
+        return documents
+
+    def _visible_older_version(self, tool_cache, tool):
+        # we check if there is an older tool we can return
+        if tool.lineage:
+            for tool_version in reversed(tool.lineage.get_versions()):
+                older_tool = tool_cache.get_tool_by_id(tool_version.id)
+                if older_tool and not older_tool.hidden:
+                    return older_tool
+        return None
 
     def _create_doc(self, tool_id, tool, index_help=True):
         #  Do not add data managers to the public index
@@ -138,7 +172,7 @@ class ToolBoxSearch:
             id_stub = tool.guid[(slash_indexes[1] + 1): slash_indexes[4]]
             add_doc_kwds['stub'] = (' ').join(token.text for token in self.rex(to_unicode(id_stub)))
         else:
-            add_doc_kwds['stub'] = to_unicode(id)
+            add_doc_kwds['stub'] = to_unicode(tool_id)
         if tool.labels:
             add_doc_kwds['labels'] = to_unicode(" ".join(tool.labels))
         if index_help:
@@ -0,0 +1,201 @@
+"""
+In-memory engine for searching the tools of a toolbox.
+
+Tool documents are analyzed into compact inverted indexes (one per field) that
+are kept in memory, so queries don't have to go through the Whoosh index on
+disk. Like the Whoosh backend, query terms match any indexed term containing
+them, these are found using a trigram index of the vocabulary.
+"""
+import heapq
+import logging
+import math
+import re
+from array import array
+from collections import (
+    Counter,
+    defaultdict,
+)
+
+from whoosh import analysis
+
+from galaxy.tools.search import ToolBoxSearch
+from galaxy.util import ExecutionTimer
+from galaxy.util.lru_cache import LRUCache
+from galaxy.web.framework.helpers import to_unicode
+
+log = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+(?:\.?\w+)*", re.UNICODE)
+GRAM_SIZE = 3
+# BM25F parameters, these are the defaults of Whoosh.
+BM25_B = 0.75
+BM25_K1 = 1.2
+# Documents matching more than one of the query terms get a bonus, similar to
+# the OrGroup factor used by the Whoosh backend.
+MULTI_HIT_BONUS = 0.1
+MATCHING_TERMS_CACHE_SIZE = 10000
+# Maps the indexed fields to the boost applied to them in `search`.
+FIELD_BOOSTS = {
+    'name': 'tool_name_boost',
+    'id': 'tool_id_boost',
+    'stub': 'tool_stub_boost',
+    'section': 'tool_section_boost',
+    'description': 'tool_description_boost',
+    'labels': 'tool_label_boost',
+    'edam': 'tool_label_boost',
+    'help': 'tool_help_boost',
+}
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class InMemoryIndex:
+    """
+    Inverted indexes of the tool documents.
+
+    Instances aren't modified once created, `InMemoryToolBoxSearch` replaces the
+    index as a whole when tools change, so searches never see a partial update.
+    """
+
+    def __init__(self, analyzed_documents):
+        # Documents are referred to by their position in `tool_ids`.
+        self.tool_ids = list(analyzed_documents)
+        term_numbers = {}
+        field_postings = defaultdict(lambda: defaultdict(list))
+        for field in FIELD_BOOSTS:
+            lengths = [sum(analyzed_documents[tool_id].get(field, {}).values()) for tool_id in self.tool_ids]
+            average_length = (sum(lengths) / len(lengths)) if lengths else 0
+            postings = field_postings[field]
+            for doc_number, tool_id in enumerate(self.tool_ids):
+                for term, frequency in analyzed_documents[tool_id].get(field, {}).items():
+                    term_numbers.setdefault(term, len(term_numbers))
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_number] / average_length)
+                    postings[term].append((doc_number, frequency * (BM25_K1 + 1) / (frequency + norm)))
+        document_count = len(self.tool_ids)
+        # field -> term -> (document numbers, weights)
+        self.postings = {}
+        for field, postings in field_postings.items():
+            self.postings[field] = {}
+            for term, entries in postings.items():
+                idf = math.log(1 + (document_count - len(entries) + 0.5) / (len(entries) + 0.5))
+                self.postings[field][term] = (array('I', (doc_number for doc_number, _ in entries)),
+                                              array('f', (weight * idf for _, weight in entries)))
+        self.vocabulary = sorted(term_numbers, key=term_numbers.get)
+        grams = defaultdict(list)
+        for term_number, term in enumerate(self.vocabulary):
+            for gram in {term[i:i + GRAM_SIZE] for i in range(len(term) - GRAM_SIZE + 1)}:
+                grams[gram].append(term_number)
+        self.grams = {gram: array('I', term_numbers) for gram, term_numbers in grams.items()}
+        self._matching_terms_cache = LRUCache(MATCHING_TERMS_CACHE_SIZE)
+
+    def matching_terms(self, token):
+        """Return the indexed terms containing `token`."""
+        terms = self._matching_terms_cache.get(token)
+        if terms is None:
+            if len(token) < GRAM_SIZE:
+                terms = [term for term in self.vocabulary if token in term]
+            else:
+                candidates = None
+                for gram in sorted({token[i:i + GRAM_SIZE] for i in range(len(token) - GRAM_SIZE + 1)},
+                                   key=lambda gram: len(self.grams.get(gram, ()))):
+                    term_numbers = self.grams.get(gram, ())
+                    candidates = set(term_numbers) if candidates is None else candidates.intersection(term_numbers)
+                    if not candidates:
+                        break
+                terms = [self.vocabulary[term_number] for term_number in candidates or ()
+                         if token in self.vocabulary[term_number]]
+            self._matching_terms_cache.put(token, terms)
+        return terms
+
+    def score(self, token, boosts):
+        """Return a dictionary mapping document numbers to the score of `token` for the document."""
+        scores = defaultdict(float)
+        for term in self.matching_terms(token):
+            for field, boost in boosts.items():
+                posting = self.postings[field].get(term)
+                if posting:
+                    for doc_number, weight in zip(*posting):
+                        scores[doc_number] += boost * weight
+        return scores
+
+
+class InMemoryToolBoxSearch(ToolBoxSearch):
+    """
+    Support searching tools in a toolbox using indexes kept in memory.
+
+    Selected with ``tool_search_engine: memory``, documents are built like for
+    the Whoosh backend and in addition EDAM operations and topics are indexed.
+    """
+
+    def __init__(self, toolbox, index_dir=None, index_help=True):
+        super().__init__(toolbox, index_dir=index_dir, index_help=index_help)
+        # Maps tool ids to the content hash and the analyzed fields of their document.
+        self._analyzed_documents = {}
+
+    def _index_setup(self):
+        return InMemoryIndex({})
+
+    def build_index(self, tool_cache, index_help=True):
+        """
+        Replace the in-memory index with one for the tools loaded in the toolbox.
+
+        Only documents that are new or have changed are analyzed again.
+        """
+        log.debug('Starting to build in-memory toolbox index.')
+        self.index_count += 1
+        execution_timer = ExecutionTimer()
+        documents = self._tool_documents(tool_cache, index_help=index_help)
+        analyzed_documents = {}
+        for tool_id, add_doc_kwds in documents.items():
+            analyzed = self._analyzed_documents.get(tool_id)
+            if not analyzed or analyzed[0] != add_doc_kwds['content_hash']:
+                analyzed = (add_doc_kwds['content_hash'], self._analyze(add_doc_kwds))
+            analyzed_documents[tool_id] = analyzed
+        self._analyzed_documents = analyzed_documents
+        self.index = InMemoryIndex({tool_id: fields for tool_id, (_, fields) in analyzed_documents.items()})
+        log.debug("In-memory toolbox index finished %s, %d documents, %d terms",
+                  execution_timer, len(self.index.tool_ids), len(self.index.vocabulary))
+
+    def _create_doc(self, tool_id, tool, index_help=True):
+        add_doc_kwds = super()._create_doc(tool_id, tool, index_help=index_help)
+        if add_doc_kwds:
+            edam_terms = list(getattr(tool, 'edam_operations', None) or []) + list(getattr(tool, 'edam_topics', None) or [])
+            add_doc_kwds['edam'] = to_unicode(" ".join(edam_terms))
+        return add_doc_kwds
+
+    def _analyze(self, add_doc_kwds):
+        return {field: Counter(tokenize(add_doc_kwds.get(field))) for field in FIELD_BOOSTS}
+
+    def search(self, q, tool_name_boost, tool_id_boost, tool_section_boost,
+            tool_description_boost, tool_label_boost, tool_stub_boost,
+            tool_help_boost, tool_search_limit, tool_enable_ngram_search,
+            tool_ngram_minsize, tool_ngram_maxsize):
+        """
+        Perform search on the in-memory index. Weight in the given boosts.
+        """
+        index = self.index
+        boost_values = dict(tool_name_boost=tool_name_boost, tool_id_boost=tool_id_boost,
+                            tool_section_boost=tool_section_boost, tool_description_boost=tool_description_boost,
+                            tool_label_boost=tool_label_boost, tool_stub_boost=tool_stub_boost,
+                            tool_help_boost=tool_help_boost)
+        boosts = {field: float(boost_values[boost]) for field, boost in FIELD_BOOSTS.items()}
+        cleaned_query = q.lower()
+        scores = defaultdict(float)
+        if tool_enable_ngram_search is True:
+            # Break tokens into ngrams like the Whoosh backend, scores of all ngrams are summed up.
+            token_analyzer = analysis.StandardAnalyzer() | analysis.NgramFilter(minsize=int(tool_ngram_minsize), maxsize=int(tool_ngram_maxsize))
+            for ngram in [token.text for token in token_analyzer(cleaned_query)]:
+                for doc_number, score in index.score(ngram, boosts).items():
+                    scores[doc_number] += score
+        else:
+            hit_counts = Counter()
+            for token in tokenize(cleaned_query):
+                for doc_number, score in index.score(token, boosts).items():
+                    scores[doc_number] += score
+                    hit_counts[doc_number] += 1
+            for doc_number, hit_count in hit_counts.items():
+                scores[doc_number] *= 1 + MULTI_HIT_BONUS * (hit_count - 1)
+        best = heapq.nlargest(int(tool_search_limit), scores.items(), key=lambda item: (item[1], -item[0]))
+        return [index.tool_ids[doc_number] for doc_number, _ in best]
@@ -7,6 +7,7 @@ from collections import (
     namedtuple,
     OrderedDict
 )
+from concurrent.futures import ThreadPoolExecutor
 from errno import ENOENT
 from urllib.parse import urlparse
 
@@ -32,6 +33,11 @@ from galaxy.util import (
 )
 from galaxy.util.bunch import Bunch
 from galaxy.util.dictifiable import Dictifiable
+from .changes import (
+    item_from_description,
+    ToolConfChangeSet,
+    ToolConfState,
+)
 from .filters import FilterFactory
 from .integrated_panel import ManagesIntegratedToolPanelMixin
 from .lineages import LineageMap
@@ -97,6 +103,12 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
         # In-memory dictionary that defines the layout of the tool panel.
         self._tool_panel = ToolPanelElements()
         self._index = 0
+        # Tools built ahead of the serial panel load, keyed by (config_file, guid).
+        self._preloaded_tools = {}
+        self._preloaded_tool_sources = {}
+        # What each tool config file defined when it was loaded, used to compute change sets on reload.
+        self._tool_conf_states = OrderedDict()
+        self._tool_ids_by_path = {}
         self.data_manager_tools = OrderedDict()
         self._lineage_map = LineageMap(app)
         # Sets self._integrated_tool_panel and self._integrated_tool_panel_config_has_contents
@@ -119,6 +131,17 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
     def create_tool(self, config_file, tool_shed_repository=None, guid=None, **kwds):
         raise NotImplementedError()
 
+    def load_tool_source(self, config_file, tool_cache_data_dir=None):
+        """Return the tool source of ``config_file``, must be safe to call from several threads."""
+        raise NotImplementedError()
+
+    def create_tool_stub(self, config_file, tool_shed_repository=None, guid=None, tool_cache_data_dir=None):
+        """Return a lightweight stand-in for the tool at ``config_file`` that creates the full tool on demand.
+
+        Returns ``None`` if lazy tool loading isn't enabled or possible for this tool.
+        """
+        return None
+
     def create_dynamic_tool(self, dynamic_tool):
         raise NotImplementedError()
 
@@ -131,13 +154,10 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
         """
         execution_timer = ExecutionTimer()
         self._tool_tag_manager.reset_tags()
-        config_filenames = listify(config_filenames)
-        for config_filename in config_filenames:
-            if os.path.isdir(config_filename):
-                directory_contents = sorted(os.listdir(config_filename))
-                directory_config_files = [config_file for config_file in directory_contents if config_file.endswith(".xml")]
-                config_filenames.remove(config_filename)
-                config_filenames.extend(directory_config_files)
+        config_filenames = self._expand_config_filenames(config_filenames)
+        workers = self._tool_loading_workers()
+        if workers > 1:
+            self._preload_tools(config_filenames, workers)
         for config_filename in config_filenames:
             if not self.can_load_config_file(config_filename):
                 continue
@@ -154,7 +174,97 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
                     raise
             except Exception:
                 log.exception("Error loading tools defined in config %s", config_filename)
-        log.debug("Reading tools from config files finished %s", execution_timer)
+        self._preloaded_tools = {}
+        self._preloaded_tool_sources = {}
+        tool_count = sum(len(tools) for tools in self._tool_versions_by_id.values())
+        log.debug("Reading tools from config files finished %s, loaded %d tools (%.1f tools/s)",
+                  execution_timer, tool_count, tool_count / max(execution_timer.elapsed, 1e-6))
+
+    def _expand_config_filenames(self, config_filenames):
+        config_filenames = listify(config_filenames)
+        for config_filename in config_filenames:
+            if os.path.isdir(config_filename):
+                directory_contents = sorted(os.listdir(config_filename))
+                directory_config_files = [config_file for config_file in directory_contents if config_file.endswith(".xml")]
+                config_filenames.remove(config_filename)
+                config_filenames.extend(directory_config_files)
+        return config_filenames
+
+    def _tool_loading_workers(self):
+        return getattr(self.app.config, "tool_loading_workers", 1) or 1
+
+    def _preload_tools(self, config_filenames, workers):
+        """Load the sources of the tools referenced by ``config_filenames`` in a pool of ``workers`` threads.
+
+        The workers only parse and macro expand tool files (see ``load_tool_source``).
+        Creating a ``Tool`` uses app state that isn't thread-safe (e.g. the datatypes
+        registry, tool data tables and the tool cache), so tools are created from the
+        sources stored in ``self._preloaded_tool_sources`` by the regular (serial) pass over
+        the tool configs. Tool stubs are created up front and stored in ``self._preloaded_tools``.
+        """
+        execution_timer = ExecutionTimer()
+        tool_loads = []
+        for config_filename in config_filenames:
+            try:
+                tool_loads.extend(self._tool_loads_from_config(config_filename))
+            except Exception:
+                # The serial pass reports problems with the tool config itself.
+                log.debug("Not preloading tools defined in config %s", config_filename, exc_info=True)
+        if not tool_loads:
+            return
+        self._preload_tool_documents(tool_loads, workers)
+        tools_to_load = []
+        for tool_load in tool_loads:
+            config_file, guid, tool_shed_repository, tool_cache_data_dir = tool_load
+            stub = self.create_tool_stub(config_file, tool_shed_repository=tool_shed_repository, guid=guid, tool_cache_data_dir=tool_cache_data_dir)
+            if stub is not None:
+                self._preloaded_tools[(config_file, guid)] = stub
+            else:
+                tools_to_load.append(tool_load)
+
+        def load_tool_source(tool_load):
+            config_file, _, _, tool_cache_data_dir = tool_load
+            try:
+                return self.load_tool_source(config_file, tool_cache_data_dir=tool_cache_data_dir)
+            except Exception:
+                # Leave the tool for the serial pass, which handles and logs broken tools.
+                return None
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for tool_load, tool_source in zip(tools_to_load, executor.map(load_tool_source, tools_to_load)):
+                if tool_source is not None:
+                    self._preloaded_tool_sources[tool_load[0]] = tool_source
+        log.debug("Preloaded %d tool sources using %d workers %s", len(self._preloaded_tool_sources), workers, execution_timer)
+
+    def _preload_tool_documents(self, tool_loads, workers):
+        """Hook allowing subclasses to prepare tool sources before the tools are built."""
+
+    def _tool_loads_from_config(self, config_filename):
+        """Yield a ``(config_file, guid, tool_shed_repository, tool_cache_data_dir)`` tuple for each tool that
+        the serial load of ``config_filename`` would have to build."""
+        tool_conf_source = get_toolbox_parser(config_filename)
+        tool_path = self.__resolve_tool_path(tool_conf_source.parse_tool_path(), config_filename)
+        tool_cache_data_dir = tool_conf_source.parse_tool_cache_data_dir()
+        template_kwds = self._path_template_kwds()
+        items = list(tool_conf_source.parse_items())
+        while items:
+            item = items.pop(0)
+            if item.type == 'section':
+                items[0:0] = item.items
+                continue
+            if item.type != 'tool':
+                continue
+            path = string.Template(item.get("file")).safe_substitute(**template_kwds)
+            concrete_path = os.path.join(tool_path, path)
+            if not os.path.exists(concrete_path) or self.load_tool_from_cache(concrete_path):
+                continue
+            guid = item.get('guid')
+            tool_shed_repository = None
+            if guid:
+                tool_shed_repository = self.get_tool_repository_from_xml_item(item.elem, concrete_path)
+                if not tool_shed_repository:
+                    continue
+            yield concrete_path, guid, tool_shed_repository, tool_cache_data_dir
 
     def _init_tools_from_config(self, config_filename):
         """
@@ -188,10 +298,12 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
                             config_elems=[],
                             create=SHED_TOOL_CONF_XML.format(shed_tools_dir=self.app.config.shed_tools_dir))
                 self._dynamic_tool_confs.append(stcd)
+                self._tool_conf_states[config_filename] = None
                 return
             raise
         tool_path = tool_conf_source.parse_tool_path()
         tool_cache_data_dir = tool_conf_source.parse_tool_cache_data_dir()
+        items = tool_conf_source.parse_items()
         parsing_shed_tool_conf = tool_conf_source.is_shed_tool_conf()
         if parsing_shed_tool_conf:
             # Keep an in-memory list of xml elements to enable persistence of the changing tool config.
@@ -199,9 +311,10 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
         tool_conf_type = 'shed tool' if parsing_shed_tool_conf else 'tool'
         log.debug("Tool path for %s configuration %s is %s", tool_conf_type, config_filename, tool_path)
         tool_path = self.__resolve_tool_path(tool_path, config_filename)
+        self._tool_conf_states[config_filename] = ToolConfState.from_items(config_filename, tool_path, tool_cache_data_dir, items)
         # Only load the panel_dict under certain conditions.
         load_panel_dict = not self._integrated_tool_panel_config_has_contents
-        for item in tool_conf_source.parse_items():
+        for item in items:
             index = self._index
             self._index += 1
             if parsing_shed_tool_conf:
@@ -469,6 +582,23 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
 
     def get_tool(self, tool_id, tool_version=None, get_all_versions=False, exact=False, tool_uuid=None):
         """Attempt to locate a tool in the tool box. Note that `exact` only refers to the `tool_id`, not the `tool_version`."""
+        rval = self._find_tool(tool_id, tool_version=tool_version, get_all_versions=get_all_versions, exact=exact, tool_uuid=tool_uuid)
+        if isinstance(rval, list):
+            tools = (self._materialize_tool(tool) for tool in rval)
+            return [tool for tool in tools if tool is not None]
+        return self._materialize_tool(rval)
+
+    def _materialize_tool(self, tool):
+        """Return the full tool for a tool stub registered by lazy tool loading."""
+        if not getattr(tool, 'is_stub', False):
+            return tool
+        try:
+            return tool.materialize()
+        except Exception:
+            log.exception("Failed to load tool %s from %s", tool.id, tool.config_file)
+            return None
+
+    def _find_tool(self, tool_id, tool_version=None, get_all_versions=False, exact=False, tool_uuid=None):
         if tool_version:
             tool_version = str(tool_version)
 
@@ -544,7 +674,7 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
         return None
 
     def has_tool(self, tool_id, tool_version=None, exact=False):
-        return self.get_tool(tool_id, tool_version=tool_version, exact=exact) is not None
+        return self._find_tool(tool_id, tool_version=tool_version, exact=exact) is not None
 
     def is_missing_shed_tool(self, tool_id):
         """Confirm that the tool ID does reference a shed tool and is not installed."""
@@ -655,11 +785,12 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
                         # The shed tool is in the install database
                         # Only load tools if the repository is not deactivated or uninstalled.
                         can_load_into_panel_dict = not tool_shed_repository.deleted
-                    tool = self.load_tool(concrete_path, guid=guid, tool_shed_repository=tool_shed_repository, use_cached=False, tool_cache_data_dir=tool_cache_data_dir)
+                    tool = self.load_tool(concrete_path, guid=guid, tool_shed_repository=tool_shed_repository, use_cached=False, tool_cache_data_dir=tool_cache_data_dir, lazy=True)
             if not tool:  # tool was not in cache and is not a tool shed tool.
-                tool = self.load_tool(concrete_path, use_cached=False, tool_cache_data_dir=tool_cache_data_dir)
+                tool = self.load_tool(concrete_path, use_cached=False, tool_cache_data_dir=tool_cache_data_dir, lazy=True)
             if string_as_bool(item.get('hidden', False)):
                 tool.hidden = True
+            self._tool_ids_by_path[concrete_path] = tool.id
             key = 'tool_%s' % str(tool.id)
             if can_load_into_panel_dict:
                 if guid and not from_cache:
@@ -845,15 +976,22 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
         if (tool_loaded or force_watch) and self._tool_watcher:
             self._tool_watcher.watch_directory(directory, quick_load)
 
-    def load_tool(self, config_file, guid=None, tool_shed_repository=None, use_cached=False, tool_cache_data_dir=None, **kwds):
-        """Load a single tool from the file named by `config_file` and return an instance of `Tool`."""
+    def load_tool(self, config_file, guid=None, tool_shed_repository=None, use_cached=False, tool_cache_data_dir=None, lazy=False, **kwds):
+        """Load a single tool from the file named by `config_file` and return an instance of `Tool`.
+
+        If `lazy` is set a tool stub (see `create_tool_stub`) may be returned instead.
+        """
         # Parse XML configuration file and get the root element
         tool = None
         if use_cached:
             tool = self.load_tool_from_cache(config_file)
         if not tool or guid and guid != tool.guid:
             try:
-                tool = self.create_tool(config_file=config_file, tool_shed_repository=tool_shed_repository, guid=guid, tool_cache_data_dir=tool_cache_data_dir, **kwds)
+                tool = self._preloaded_tools.pop((config_file, guid), None)
+                if tool is None and lazy:
+                    tool = self.create_tool_stub(config_file, tool_shed_repository=tool_shed_repository, guid=guid, tool_cache_data_dir=tool_cache_data_dir)
+                if tool is None:
+                    tool = self.create_tool(config_file=config_file, tool_shed_repository=tool_shed_repository, guid=guid, tool_cache_data_dir=tool_cache_data_dir, **kwds)
             except Exception:
                 # If the tool is broken but still exists we can load it from the cache
                 tool = self.load_tool_from_cache(config_file, recover_tool=True)
@@ -957,7 +1095,7 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
                 if key == tool_key:
                     self._tool_panel[key] = new_tool
                     break
-                elif key.startswith('section'):
+                elif isinstance(val, ToolSection):
                     if tool_key in val.elems:
                         self._tool_panel[key].elems[tool_key] = new_tool
                         break
@@ -968,6 +1106,152 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
             status = 'done'
         return message, status
 
+    def tool_conf_change_set(self, config_filenames):
+        """Describe the changes to the tool config files ``config_filenames`` since they were loaded.
+
+        Returns a :class:`ToolConfChangeSet` that can be applied using ``apply_change_set``.
+        """
+        new_states = OrderedDict()
+        try:
+            for config_filename in self._expand_config_filenames(config_filenames):
+                if config_filename not in self._tool_conf_states and not self.can_load_config_file(config_filename):
+                    continue
+                new_states[config_filename] = self._parse_tool_conf_state(config_filename)
+        except Exception as e:
+            return ToolConfChangeSet.full_reload(f"reading tool configuration files failed: {unicodify(e)}")
+        return ToolConfChangeSet.compute(self._tool_conf_states, new_states)
+
+    def _parse_tool_conf_state(self, config_filename):
+        try:
+            tool_conf_source = get_toolbox_parser(config_filename)
+        except OSError as exc:
+            if exc.errno == errno.ENOENT and self._tool_conf_states.get(config_filename, False) is None:
+                return None
+            raise
+        tool_path = self.__resolve_tool_path(tool_conf_source.parse_tool_path(), config_filename)
+        return ToolConfState.from_items(config_filename, tool_path, tool_conf_source.parse_tool_cache_data_dir(), tool_conf_source.parse_items())
+
+    def apply_change_set(self, change_set, save_integrated_tool_panel=True):
+        """Update this toolbox in place according to ``change_set``.
+
+        Tools that were removed from the tool config files are removed from the toolbox,
+        added tools are loaded into the tool panel. Returns ``False`` without modifying the
+        toolbox if the changes can't be applied in place, the toolbox has to be rebuilt then.
+        ``False`` is also returned if applying the changes fails, the toolbox may have been
+        partly updated and must be rebuilt.
+        """
+        if change_set.requires_full_reload:
+            log.debug("Can't update toolbox in place, %s", change_set.full_reload_reason)
+            return False
+        with self.app._toolbox_lock:
+            new_states = {}
+            tool_ids_to_remove = []
+            template_kwds = self._path_template_kwds()
+            for change in change_set.config_changes:
+                config_filename = change['config_filename']
+                state = self._tool_conf_states.get(config_filename)
+                if state is None or state.digest != change['base_digest']:
+                    log.debug("Can't update toolbox in place, %s isn't in the state the changes are based on", config_filename)
+                    return False
+                try:
+                    new_states[config_filename] = state.apply(change)
+                except ValueError as e:
+                    log.debug("Can't update toolbox in place, %s", unicodify(e))
+                    return False
+                for key in change['removed']:
+                    tool_id = self._tool_ids_by_path.get(state.tool_file_path(key, template_kwds))
+                    if tool_id is None or tool_id not in self._tools_by_id:
+                        continue
+                    if len(self.get_loaded_tools_by_lineage(tool_id)) > 1:
+                        # Another version of the tool may have to take its place in the tool panel.
+                        log.debug("Can't update toolbox in place, tool %s has multiple versions loaded", tool_id)
+                        return False
+                    tool_ids_to_remove.append(tool_id)
+            try:
+                self._apply_config_changes(change_set.config_changes, new_states, tool_ids_to_remove)
+            except Exception:
+                log.exception("Failed to update toolbox in place, it has to be rebuilt")
+                return False
+        if change_set and save_integrated_tool_panel:
+            self._save_integrated_tool_panel()
+        return True
+
+    def _apply_config_changes(self, config_changes, new_states, tool_ids_to_remove):
+        for tool_id in tool_ids_to_remove:
+            self._remove_tool_from_toolbox(tool_id)
+        for change in config_changes:
+            state = new_states[change['config_filename']]
+            for section_id in change['removed_sections']:
+                for panel in (self._tool_panel, self._integrated_tool_panel):
+                    section = panel.get(section_id)
+                    if isinstance(section, ToolSection) and not section.elems:
+                        del panel[section_id]
+            for section_description in change['added_sections']:
+                self.load_item(item_from_description(section_description), tool_path=state.tool_path, tool_cache_data_dir=state.tool_cache_data_dir)
+            for key, entry in change['added'].items():
+                self._load_added_tool(state, key, entry)
+            self._tool_conf_states[change['config_filename']] = state
+            self._refresh_dynamic_tool_conf(change['config_filename'])
+        self._reload_stale_tools()
+        self._tool_to_dict_cache = {}
+        self._tool_to_dict_cache_admin = {}
+
+    def _load_added_tool(self, state, key, entry):
+        """Load the tool entry ``key`` of a change set, new tools are appended to their section."""
+        panel_dict = integrated_panel_dict = section = None
+        if entry['section']:
+            section_id = entry['section'].get('id')
+            if section_id not in self._tool_panel or section_id not in self._integrated_tool_panel:
+                self.load_item(item_from_description({'type': 'section', 'attributes': entry['section']}), tool_path=state.tool_path, tool_cache_data_dir=state.tool_cache_data_dir)
+            section = self._integrated_tool_panel[section_id]
+            panel_dict = self._tool_panel[section_id].elems
+            integrated_panel_dict = section.elems
+        item = item_from_description(entry['item'])
+        self.load_item(
+            item,
+            tool_path=state.tool_path,
+            panel_dict=panel_dict,
+            integrated_panel_dict=integrated_panel_dict,
+            guid=item.get('guid'),
+            tool_cache_data_dir=state.tool_cache_data_dir,
+        )
+        tool_id = self._tool_ids_by_path.get(state.tool_file_path(key, self._path_template_kwds()))
+        if section and tool_id:
+            self._integrated_section_by_tool[tool_id] = section.id, section.name
+
+    def _remove_tool_from_toolbox(self, tool_id):
+        tool = self._tools_by_id[tool_id]
+        self.remove_tool_by_id(tool_id)
+        tool_key = 'tool_%s' % tool_id
+        for panel_dict in [self._integrated_tool_panel] + [_.elems for _ in self._integrated_tool_panel.values() if isinstance(_, ToolSection)]:
+            panel_dict.pop(tool_key, None)
+        versions = self._tool_versions_by_id.get(tool_id, {})
+        versions.pop(tool.version or None, None)
+        if not versions:
+            self._tool_versions_by_id.pop(tool_id, None)
+        self._integrated_section_by_tool.pop(tool_id, None)
+        self._tool_ids_by_path.pop(tool.config_file, None)
+
+    def _refresh_dynamic_tool_conf(self, config_filename):
+        """Update the in-memory list of config elements of the shed tool config ``config_filename``."""
+        shed_tool_conf_dict = self.get_shed_config_dict_by_filename(config_filename)
+        if shed_tool_conf_dict:
+            tool_conf_source = get_toolbox_parser(config_filename)
+            shed_tool_conf_dict['config_elems'] = [item.elem for item in tool_conf_source.parse_items()]
+
+    def _reload_stale_tools(self):
+        """Reload tools that were dropped from the tool cache because their files changed on disk."""
+        tool_cache = getattr(self.app, 'tool_cache', None)
+        if not tool_cache:
+            return
+        for tool_id in tool_cache._removed_tool_ids & set(self._tools_by_id):
+            tool = self._tools_by_id[tool_id]
+            if tool.config_file and os.path.exists(tool.config_file) and tool_cache.get_tool(tool.config_file) is None:
+                try:
+                    self.reload_tool_by_id(tool_id)
+                except Exception:
+                    log.exception("Failed to reload tool %s", tool_id)
+
     def remove_tool_by_id(self, tool_id, remove_from_panel=True):
         """
         Attempt to remove the tool identified by 'tool_id'. Ignores
@@ -991,7 +1275,7 @@ class AbstractToolBox(Dictifiable, ManagesIntegratedToolPanelMixin):
                     if key == tool_key:
                         del self._tool_panel[key]
                         break
-                    elif key.startswith('section'):
+                    elif isinstance(val, ToolSection):
                         if tool_key in val.elems:
                             del self._tool_panel[key].elems[tool_key]
                             break
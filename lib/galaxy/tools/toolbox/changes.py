@@ -0,0 +1,193 @@
+"""
+Describe changes to tool configuration files.
+
+A toolbox records a :class:`ToolConfState` for every tool configuration file it
+loads. When these files change, the differences are collected in a
+:class:`ToolConfChangeSet` that can be sent to other Galaxy processes, so their
+toolboxes can be updated in place instead of being rebuilt from scratch.
+"""
+import hashlib
+import json
+import logging
+import os
+import string
+
+from galaxy.util import (
+    parse_xml_string,
+    xml_to_string,
+)
+from .parser import (
+    ensure_tool_conf_item,
+    ToolConfItem,
+    ToolConfSection,
+)
+
+log = logging.getLogger(__name__)
+
+
+def describe_item(item):
+    """Return a JSON serializable description of the tool conf ``item``.
+
+    Sections are described without the tools they contain.
+    """
+    description = {'type': item.type, 'attributes': dict(item.attributes)}
+    if item.type == 'section':
+        description['items'] = [describe_item(sub_item) for sub_item in item.items if sub_item.type != 'tool']
+    elif item.has_elem:
+        description['xml'] = xml_to_string(item.elem).strip()
+    return description
+
+
+def item_from_description(description, items=None):
+    """Recreate a tool conf item from the output of :func:`describe_item`.
+
+    For sections ``items`` are added to the items recorded in the description.
+    """
+    if description['type'] == 'section':
+        section_items = [item_from_description(_) for _ in description.get('items', [])]
+        return ToolConfSection(description['attributes'], section_items + list(items or []))
+    if description.get('xml'):
+        return ensure_tool_conf_item(parse_xml_string(description['xml']))
+    return ToolConfItem(description['type'], description['attributes'])
+
+
+class ToolConfState:
+    """The tools and the panel structure (sections, labels, workflows, ...) defined by a tool configuration file."""
+
+    def __init__(self, config_filename, tool_path, tool_cache_data_dir, tools, structure):
+        self.config_filename = config_filename
+        self.tool_path = tool_path
+        self.tool_cache_data_dir = tool_cache_data_dir
+        # Maps a key identifying a tool entry to the description of the entry.
+        self.tools = tools
+        self.structure = structure
+        self.digest = hashlib.sha1(json.dumps(self.to_dict(), sort_keys=True).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def from_items(cls, config_filename, tool_path, tool_cache_data_dir, items):
+        tools = {}
+        structure = []
+
+        def add_tool(item, section=None):
+            key = json.dumps([section and section.get('id'), item.get('file'), item.get('guid')])
+            tools[key] = {'section': section, 'item': describe_item(item)}
+
+        for item in items:
+            if item.type == 'tool':
+                add_tool(item)
+                continue
+            description = describe_item(item)
+            structure.append(description)
+            if item.type == 'section':
+                for sub_item in item.items:
+                    if sub_item.type == 'tool':
+                        add_tool(sub_item, section=description['attributes'])
+        return cls(config_filename, tool_path, tool_cache_data_dir, tools, structure)
+
+    def tool_file_path(self, key, template_kwds=None):
+        """Return the path of the tool file of the tool entry ``key``."""
+        path = self.tools[key]['item']['attributes'].get('file')
+        if path is None:
+            return None
+        path = string.Template(path).safe_substitute(**(template_kwds or {}))
+        return os.path.join(self.tool_path, path)
+
+    def apply(self, change):
+        """Return the state resulting from applying ``change`` (a config change of a :class:`ToolConfChangeSet`)."""
+        tools = {key: entry for key, entry in self.tools.items() if key not in change['removed']}
+        tools.update(change['added'])
+        state = ToolConfState(self.config_filename, self.tool_path, self.tool_cache_data_dir, tools, change['structure'])
+        if state.digest != change['digest']:
+            raise ValueError(f"Applying changes to {self.config_filename} didn't result in the expected state")
+        return state
+
+    def to_dict(self):
+        return {
+            'tool_path': self.tool_path,
+            'tool_cache_data_dir': self.tool_cache_data_dir,
+            'tools': self.tools,
+            'structure': self.structure,
+        }
+
+
+class ToolConfChangeSet:
+    """Changes to the tool configuration files of a toolbox.
+
+    ``config_changes`` contains a dictionary for every changed tool configuration
+    file, with the tool entries that were added and removed (tool entries that
+    changed are both), the new panel structure and the sections that were added
+    and removed. Sections may only be removed or appended, any other structural
+    change is recorded in ``full_reload_reason``, the toolbox then has to be
+    rebuilt.
+    """
+
+    def __init__(self, config_changes=None, full_reload_reason=None):
+        self.config_changes = config_changes or []
+        self.full_reload_reason = full_reload_reason
+
+    @classmethod
+    def full_reload(cls, reason):
+        return cls(full_reload_reason=reason)
+
+    @classmethod
+    def compute(cls, old_states, new_states):
+        """Compare two mappings of tool configuration file names to :class:`ToolConfState` objects.
+
+        States of ``None`` represent tool configuration files that don't exist (yet).
+        """
+        if list(old_states) != list(new_states):
+            return cls.full_reload("the list of tool configuration files changed")
+        config_changes = []
+        for config_filename, new_state in new_states.items():
+            old_state = old_states[config_filename]
+            if old_state is None or new_state is None:
+                if old_state is not new_state:
+                    return cls.full_reload(f"{config_filename} has been created or removed")
+                continue
+            if old_state.digest == new_state.digest:
+                continue
+            if (old_state.tool_path, old_state.tool_cache_data_dir) != (new_state.tool_path, new_state.tool_cache_data_dir):
+                return cls.full_reload(f"the tool path of {config_filename} changed")
+            kept = [_ for _ in old_state.structure if _ in new_state.structure]
+            removed_sections = [_ for _ in old_state.structure if _ not in new_state.structure]
+            added_sections = new_state.structure[len(kept):]
+            removed_ids = {_['attributes'].get('id') for _ in removed_sections}
+            if (new_state.structure[:len(kept)] != kept
+                    or any(_['type'] != 'section' for _ in removed_sections + added_sections)
+                    or any(_['attributes'].get('id') in removed_ids for _ in added_sections)):
+                return cls.full_reload(f"the panel structure of {config_filename} changed")
+            config_changes.append({
+                'config_filename': config_filename,
+                'base_digest': old_state.digest,
+                'digest': new_state.digest,
+                'removed': [key for key, entry in old_state.tools.items() if new_state.tools.get(key) != entry],
+                'added': {key: entry for key, entry in new_state.tools.items() if old_state.tools.get(key) != entry},
+                'structure': new_state.structure,
+                'added_sections': added_sections,
+                'removed_sections': sorted(removed_ids),
+            })
+        return cls(config_changes)
+
+    @property
+    def requires_full_reload(self):
+        return self.full_reload_reason is not None
+
+    def __bool__(self):
+        return self.requires_full_reload or bool(self.config_changes)
+
+    def __str__(self):
+        if self.requires_full_reload:
+            return f"full reload required, {self.full_reload_reason}"
+        added = sum(len(change['added']) for change in self.config_changes)
+        removed = sum(len(change['removed']) for change in self.config_changes)
+        return f"{added} tool entries added, {removed} removed in {len(self.config_changes)} tool configuration files"
+
+    def to_dict(self):
+        return {
+            'config_changes': self.config_changes,
+            'full_reload_reason': self.full_reload_reason,
+        }
+
+    @classmethod
+    def from_dict(cls, as_dict):
+        return cls(config_changes=as_dict.get('config_changes'), full_reload_reason=as_dict.get('full_reload_reason'))
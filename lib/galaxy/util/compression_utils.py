@@ -1,10 +1,15 @@
+import bisect
 import gzip
 import io
 import logging
 import os
+import struct
 import tarfile
+import threading
 import zipfile
+import zlib
 
+from galaxy.util.lru_cache import LRUCache
 from galaxy.util.path import safe_relpath
 from .checkers import (
     bz2,
@@ -79,6 +84,239 @@ def file_iter(fname, sep=None):
                 yield line.split(sep)
 
 
+def get_seekable_fileobj(filename, mode="r"):
+    """
+    Returns a fileobj supporting random access in the uncompressed data of a file.
+
+    Unlike :func:`get_fileobj`, seeking into a gzip (or BGZF) compressed file does not
+    decompress all the data before the target offset: decompression restarts from the
+    closest access point of a :class:`GzipIndex` that is cached for the file. Other files
+    are opened with :func:`get_fileobj`, so bz2 and zip files are still decompressed (but
+    seek by decompressing from the start). In text mode, always use 'utf-8' encoding.
+
+    :param filename: path to file that should be opened
+    :param mode: 'r' or 'rb'
+    """
+    mode = mode.replace('t', '')
+    if is_gzip(filename):
+        fh = io.BufferedReader(SeekableGzipReader(filename), buffer_size=GZIP_READ_SIZE)
+        if 'b' not in mode:
+            return io.TextIOWrapper(fh, encoding='utf-8')
+        return fh
+    return get_fileobj(filename, mode)
+
+
+GZIP_READ_SIZE = 2 ** 16
+# Spacing (in uncompressed bytes) of access points recorded while reading plain gzip files,
+# it doubles each time the number of stored decompressor states exceeds GZIP_INDEX_MAX_STATES.
+GZIP_INDEX_SPAN = 2 ** 22
+GZIP_INDEX_MAX_STATES = 128
+BGZF_MAGIC = b"\x1f\x8b\x08\x04"
+
+_gzip_indexes = LRUCache(maxsize=16)
+
+
+def get_gzip_index(filename):
+    """
+    Return the (cached) :class:`GzipIndex` of a gzip file.
+
+    Indexes are cached per process and keyed on the path, size and modification
+    time of the file, so a modified file gets a new index.
+    """
+    stat = os.stat(filename)
+    key = (os.path.realpath(filename), stat.st_size, stat.st_mtime)
+    index = _gzip_indexes.get(key)
+    if index is None:
+        index = GzipIndex.for_file(filename)
+        _gzip_indexes.put(key, index)
+    return index
+
+
+class GzipIndex:
+    """
+    Access points of a gzip file.
+
+    An access point maps an uncompressed offset to a compressed offset and the
+    decompressor state required to resume decompression from there. Decompressor
+    states are only needed inside gzip members, points at the start of a member
+    (e.g. every block of a BGZF file) store None instead.
+
+    BGZF files are fully indexed up front from their block headers, without
+    decompressing anything. Plain gzip files are indexed incrementally, as they are
+    read past the last known access point.
+    """
+
+    def __init__(self, span=GZIP_INDEX_SPAN, complete=False):
+        self.span = span
+        self.complete = complete
+        self.uncompressed_offsets = [0]
+        self.points = [(0, None)]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_file(cls, filename):
+        with open(filename, 'rb') as fh:
+            if fh.read(4) == BGZF_MAGIC:
+                index = cls._bgzf_index(fh)
+                if index is not None:
+                    return index
+        return cls()
+
+    @classmethod
+    def _bgzf_index(cls, fh):
+        index = cls(complete=True)
+        compressed_offset = uncompressed_offset = 0
+        while True:
+            fh.seek(compressed_offset)
+            header = fh.read(18)
+            if not header:
+                break
+            # A BGZF block is a gzip member carrying its total size in a 'BC' extra subfield.
+            if len(header) < 18 or header[:4] != BGZF_MAGIC or header[12:14] != b"BC":
+                # Not BGZF after all, fall back to incremental indexing.
+                return None
+            block_size = struct.unpack("<H", header[16:18])[0] + 1
+            fh.seek(compressed_offset + block_size - 4)
+            isize = fh.read(4)
+            if len(isize) < 4:
+                return None
+            compressed_offset += block_size
+            uncompressed_offset += struct.unpack("<I", isize)[0]
+            index.add_point(uncompressed_offset, compressed_offset, None)
+        return index
+
+    @property
+    def frontier(self):
+        return self.uncompressed_offsets[-1]
+
+    def add_point(self, uncompressed_offset, compressed_offset, decompressor):
+        with self._lock:
+            if uncompressed_offset <= self.uncompressed_offsets[-1]:
+                return
+            self.uncompressed_offsets.append(uncompressed_offset)
+            self.points.append((compressed_offset, decompressor))
+            if not self.complete and sum(1 for _, d in self.points if d is not None) > GZIP_INDEX_MAX_STATES:
+                self._thin()
+
+    def wants_point(self, uncompressed_offset):
+        return not self.complete and uncompressed_offset >= self.uncompressed_offsets[-1] + self.span
+
+    def closest_point(self, uncompressed_offset):
+        """Return (uncompressed offset, compressed offset, decompressor) of the last access point before an offset."""
+        with self._lock:
+            i = bisect.bisect_right(self.uncompressed_offsets, uncompressed_offset) - 1
+            return (self.uncompressed_offsets[i], ) + self.points[i]
+
+    def _thin(self):
+        # Keep the first point and every other point after it, then space new points further apart.
+        self.uncompressed_offsets = self.uncompressed_offsets[::2]
+        self.points = self.points[::2]
+        self.span *= 2
+
+
+class SeekableGzipReader(io.RawIOBase):
+    """
+    Raw reader of the decompressed content of a (possibly multi-member) gzip file.
+
+    Offsets passed to :meth:`seek` and returned by :meth:`tell` are uncompressed offsets.
+    """
+
+    def __init__(self, filename, index=None):
+        self.name = filename
+        self._fh = open(filename, 'rb')
+        self._index = index or get_gzip_index(filename)
+        self._pos = 0
+        self._restart(*self._index.closest_point(0))
+
+    def _restart(self, uncompressed_offset, compressed_offset, decompressor):
+        self._fh.seek(compressed_offset)
+        self._compressed_offset = compressed_offset
+        # No decompressor means decompression restarts at the start of a gzip member.
+        self._decompressor = decompressor and decompressor.copy()
+        self._buffer = b""
+        self._buffer_offset = uncompressed_offset
+        self._eof = False
+
+    def _fill(self):
+        """Decompress the next chunk of compressed data into the buffer."""
+        data = self._fh.read(GZIP_READ_SIZE)
+        if not data:
+            self._eof = True
+            return
+        self._compressed_offset += len(data)
+        # Drop data well before the read position, it would only be read again after a seek.
+        # A little is kept so that the short backward seeks done by io.TextIOWrapper.tell() stay cheap.
+        keep_from = self._pos - 2 * GZIP_READ_SIZE
+        if keep_from > self._buffer_offset:
+            drop = min(keep_from - self._buffer_offset, len(self._buffer))
+            self._buffer = self._buffer[drop:]
+            self._buffer_offset += drop
+        end = self._buffer_offset + len(self._buffer)
+        out = []
+        while data:
+            if self._decompressor is None:
+                # Start of a new member, skipping the zero padding allowed after the last one.
+                data = data.lstrip(b"\x00")
+                if not data:
+                    break
+                if self._index.wants_point(end):
+                    self._index.add_point(end, self._compressed_offset - len(data), None)
+                self._decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            decompressed = self._decompressor.decompress(data)
+            out.append(decompressed)
+            end += len(decompressed)
+            if self._decompressor.eof:
+                data = self._decompressor.unused_data
+                self._decompressor = None
+            else:
+                data = b""
+                if self._index.wants_point(end):
+                    self._index.add_point(end, self._compressed_offset, self._decompressor.copy())
+        self._buffer += b"".join(out)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            while not self._eof:
+                self._pos = self._buffer_offset + len(self._buffer)
+                self._fill()
+            offset += self._buffer_offset + len(self._buffer)
+        elif whence != io.SEEK_SET:
+            raise ValueError("Invalid whence (%r, should be 0, 1 or 2)" % whence)
+        if offset < 0:
+            raise ValueError("Negative seek position %d" % offset)
+        point = self._index.closest_point(offset)
+        # Restart from an access point unless we can get to the target faster by reading on.
+        if offset < self._buffer_offset or point[0] > self._buffer_offset + len(self._buffer):
+            self._restart(*point)
+        self._pos = offset
+        return self._pos
+
+    def readinto(self, b):
+        while self._pos >= self._buffer_offset + len(self._buffer) and not self._eof:
+            self._fill()
+        start = self._pos - self._buffer_offset
+        data = self._buffer[start:start + len(b)]
+        b[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._fh.close()
+        super().close()
+
+
 class CompressedFile:
 
     @staticmethod
@@ -0,0 +1,77 @@
+"""
+A small thread safe, size bounded, least recently used cache.
+"""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Mapping of keys to values holding at most ``maxsize`` entries.
+
+    When full, the least recently used entry is discarded to make room for a new one.
+    Hits and misses of :meth:`get` are counted so callers can report cache efficiency.
+
+    >>> cache = LRUCache(maxsize=2)
+    >>> cache.put('a', 1)
+    >>> cache.put('b', 2)
+    >>> cache.get('a')
+    1
+    >>> cache.put('c', 3)
+    >>> 'b' in cache
+    False
+    >>> cache.get('b') is None
+    True
+    >>> sorted(cache.stats().items())
+    [('hits', 1), ('maxsize', 2), ('misses', 1), ('size', 2)]
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -1,5 +1,6 @@
 import abc
 import itertools
+import operator
 import re
 
 import yaml
@@ -57,6 +58,62 @@ def apply_regex(regex, target, data, replacement=None, group_count=None):
     return new_data
 
 
+def apply_regex_columns(regex, column, replacement=None, group_count=None):
+    """Column-wise :func:`apply_regex`, return the list of new columns for ``column``."""
+    pattern = re.compile(regex)
+    search = pattern.search
+    if replacement is not None:
+        # Match.expand parses the replacement template on every call, substituting the (same) first
+        # match with Pattern.sub reuses the parsed template - slice the expansion out of the result.
+        sub = pattern.sub
+        new_column = []
+        for source in column:
+            match = search(source)
+            if match is None:
+                # fail like apply_regex
+                match.expand(replacement)
+            replaced = sub(replacement, source, 1)
+            new_column.append(replaced[match.start():len(replaced) - len(source) + match.end()])
+        return [new_column]
+
+    wrong_group_count = group_count and pattern.groups != group_count
+    matches = list(map(search, column))
+    if wrong_group_count or not all(matches):
+        # raise the error apply_regex raises for the first row
+        for source, match in zip(column, matches):
+            if not match:
+                raise Exception(f"Problem applying regular expression [{regex}] to [{source}].")
+            if wrong_group_count:
+                raise Exception("Problem applying regular expression, wrong number of groups found.")
+
+    if group_count:
+        if not matches:
+            return [[] for _ in range(group_count)]
+        return [list(new_column) for new_column in zip(*(match.groups() for match in matches))]
+    return [[match.group(0) for match in matches]]
+
+
+def _rows_to_columns(data, sources):
+    """Return the columns of the rows of ``data`` or None if they do not form a non-empty table."""
+    if not data or len(data) != len(sources):
+        return None
+    width = len(data[0])
+    for row in data:
+        if len(row) != width:
+            return None
+    return [list(column) for column in zip(*data)]
+
+
+def _columns_to_rows(columns, num_rows):
+    if not columns:
+        return [[] for _ in range(num_rows)]
+    return [list(row) for row in zip(*columns)]
+
+
+def _compress_columns(selectors, columns, sources):
+    return [list(itertools.compress(column, selectors)) for column in columns], list(itertools.compress(sources, selectors))
+
+
 class BaseRuleDefinition(metaclass=abc.ABCMeta):
 
     @abc.abstractproperty
@@ -71,6 +128,13 @@ class BaseRuleDefinition(metaclass=abc.ABCMeta):
     def apply(self, rule, data, sources):
         """Apply validated, dictified rule definition to supplied data."""
 
+    @abc.abstractmethod
+    def apply_columns(self, rule, columns, sources):
+        """Apply validated, dictified rule definition to supplied columns of data.
+
+        Return None if the resulting rows would not all have the same length.
+        """
+
 
 class AddColumnMetadataRuleDefinition(BaseRuleDefinition):
     rule_type = "add_column_metadata"
@@ -99,6 +163,17 @@ class AddColumnMetadataRuleDefinition(BaseRuleDefinition):
 
         return new_rows, sources
 
+    def apply_columns(self, rule, columns, sources):
+        rule_value = rule["value"]
+        if rule_value.startswith("identifier"):
+            identifier_index = int(rule_value[len("identifier"):])
+            new_column = [source["identifiers"][identifier_index] for source in sources]
+
+        elif rule_value == "tags":
+            new_column = [",".join(sorted(source["tags"])) for source in sources]
+
+        return columns + [new_column], sources
+
 
 class AddColumnGroupTagValueRuleDefinition(BaseRuleDefinition):
     rule_type = "add_column_group_tag_value"
@@ -127,6 +202,21 @@ class AddColumnGroupTagValueRuleDefinition(BaseRuleDefinition):
 
         return new_rows, sources
 
+    def apply_columns(self, rule, columns, sources):
+        tag_prefix = "group:%s:" % rule["value"]
+        default_value = rule.get("default_value", "")
+
+        new_column = []
+        for source in sources:
+            group_tag_value = default_value
+            for tag in sorted(source["tags"]):
+                if tag.startswith(tag_prefix):
+                    group_tag_value = tag[len(tag_prefix):]
+                    break
+            new_column.append(group_tag_value)
+
+        return columns + [new_column], sources
+
 
 class AddColumnConcatenateRuleDefinition(BaseRuleDefinition):
     rule_type = "add_column_concatenate"
@@ -144,6 +234,10 @@ class AddColumnConcatenateRuleDefinition(BaseRuleDefinition):
 
         return new_rows, sources
 
+    def apply_columns(self, rule, columns, sources):
+        new_column = [a + b for a, b in zip(columns[rule["target_column_0"]], columns[rule["target_column_1"]])]
+        return columns + [new_column], sources
+
 
 class AddColumnBasenameRuleDefinition(BaseRuleDefinition):
     rule_type = "add_column_basename"
@@ -156,6 +250,9 @@ class AddColumnBasenameRuleDefinition(BaseRuleDefinition):
         re = r"[^/]*$"
         return apply_regex(re, column, data), sources
 
+    def apply_columns(self, rule, columns, sources):
+        return columns + apply_regex_columns(r"[^/]*$", columns[rule["target_column"]]), sources
+
 
 class AddColumnRegexRuleDefinition(BaseRuleDefinition):
     rule_type = "add_column_regex"
@@ -172,6 +269,11 @@ class AddColumnRegexRuleDefinition(BaseRuleDefinition):
 
         return apply_regex(expression, target, data, replacement, group_count), sources
 
+    def apply_columns(self, rule, columns, sources):
+        column = columns[rule["target_column"]]
+        new_columns = apply_regex_columns(rule["expression"], column, rule.get("replacement"), rule.get("group_count"))
+        return columns + new_columns, sources
+
 
 class AddColumnRownumRuleDefinition(BaseRuleDefinition):
     rule_type = "add_column_rownum"
@@ -188,6 +290,10 @@ class AddColumnRownumRuleDefinition(BaseRuleDefinition):
 
         return new_rows, sources
 
+    def apply_columns(self, rule, columns, sources):
+        start = rule["start"]
+        return columns + [["%d" % (index + start) for index in range(len(sources))]], sources
+
 
 class AddColumnValueRuleDefinition(BaseRuleDefinition):
     rule_type = "add_column_value"
@@ -204,6 +310,9 @@ class AddColumnValueRuleDefinition(BaseRuleDefinition):
 
         return new_rows, sources
 
+    def apply_columns(self, rule, columns, sources):
+        return columns + [[str(rule["value"])] * len(sources)], sources
+
 
 class AddColumnSubstrRuleDefinition(BaseRuleDefinition):
     rule_type = "add_column_substr"
@@ -243,6 +352,22 @@ class AddColumnSubstrRuleDefinition(BaseRuleDefinition):
 
         return list(map(new_row, data)), sources
 
+    def apply_columns(self, rule, columns, sources):
+        column = columns[rule["target_column"]]
+        length = rule["length"]
+        substr_type = rule["substr_type"]
+
+        if substr_type == "keep_prefix":
+            new_column = [value[0:length] for value in column]
+        elif substr_type == "drop_prefix":
+            new_column = [value[length:len(value)] for value in column]
+        elif substr_type == "keep_suffix":
+            new_column = [value[max(len(value) - length, 0):] for value in column]
+        else:
+            new_column = [value[0:max(len(value) - length, 0)] for value in column]
+
+        return columns + [new_column], sources
+
 
 class RemoveColumnsRuleDefinition(BaseRuleDefinition):
     rule_type = "remove_columns"
@@ -264,6 +389,10 @@ class RemoveColumnsRuleDefinition(BaseRuleDefinition):
 
         return list(map(new_row, data)), sources
 
+    def apply_columns(self, rule, columns, sources):
+        target_columns = rule["target_columns"]
+        return [column for index, column in enumerate(columns) if index not in target_columns], sources
+
 
 def _filter_index(func, iterable):
     result = []
@@ -298,6 +427,12 @@ class AddFilterRegexRuleDefinition(BaseRuleDefinition):
 
         return _filter_index(_filter, data), _filter_index(_filter, sources)
 
+    def apply_columns(self, rule, columns, sources):
+        invert = rule["invert"]
+        search = re.compile(rule["expression"]).search
+        selectors = [(search(val) is not None) != invert for val in columns[rule["target_column"]]]
+        return _compress_columns(selectors, columns, sources)
+
 
 class AddFilterCountRuleDefinition(BaseRuleDefinition):
     rule_type = "add_filter_count"
@@ -325,6 +460,16 @@ class AddFilterCountRuleDefinition(BaseRuleDefinition):
 
         return _filter_index(_filter, data), _filter_index(_filter, sources)
 
+    def apply_columns(self, rule, columns, sources):
+        num_rows = len(sources)
+        invert = rule["invert"]
+        n = rule["count"]
+        if rule["which"] == "first":
+            selectors = [(index >= n) != invert for index in range(num_rows)]
+        else:
+            selectors = [(index < (num_rows - n)) != invert for index in range(num_rows)]
+        return _compress_columns(selectors, columns, sources)
+
 
 class AddFilterEmptyRuleDefinition(BaseRuleDefinition):
     rule_type = "add_filter_empty"
@@ -345,6 +490,11 @@ class AddFilterEmptyRuleDefinition(BaseRuleDefinition):
 
         return _filter_index(_filter, data), _filter_index(_filter, sources)
 
+    def apply_columns(self, rule, columns, sources):
+        invert = rule["invert"]
+        selectors = [(len(val) != 0) != invert for val in columns[rule["target_column"]]]
+        return _compress_columns(selectors, columns, sources)
+
 
 class AddFilterMatchesRuleDefinition(BaseRuleDefinition):
     rule_type = "add_filter_matches"
@@ -368,6 +518,20 @@ class AddFilterMatchesRuleDefinition(BaseRuleDefinition):
 
         return _filter_index(_filter, data), _filter_index(_filter, sources)
 
+    def apply_columns(self, rule, columns, sources):
+        invert = rule["invert"]
+        value = rule["value"]
+        selectors = [(val == value) != invert for val in columns[rule["target_column"]]]
+        return _compress_columns(selectors, columns, sources)
+
+
+COMPARE_OPERATORS = {
+    "less_than": operator.lt,
+    "less_than_equal": operator.le,
+    "greater_than": operator.gt,
+    "greater_than_equal": operator.ge,
+}
+
 
 class AddFilterCompareRuleDefinition(BaseRuleDefinition):
     rule_type = "add_filter_compare"
@@ -401,6 +565,12 @@ class AddFilterCompareRuleDefinition(BaseRuleDefinition):
 
         return _filter_index(_filter, data), _filter_index(_filter, sources)
 
+    def apply_columns(self, rule, columns, sources):
+        compare = COMPARE_OPERATORS[rule["compare_type"]]
+        value = rule["value"]
+        selectors = [compare(float(val), value) for val in columns[rule["target_column"]]]
+        return _compress_columns(selectors, columns, sources)
+
 
 class SortRuleDefinition(BaseRuleDefinition):
     rule_type = "sort"
@@ -434,6 +604,15 @@ class SortRuleDefinition(BaseRuleDefinition):
 
         return new_data, new_sources
 
+    def apply_columns(self, rule, columns, sources):
+        keys = columns[rule["target_column"]]
+        if rule["numeric"]:
+            keys = [float(key) for key in keys]
+
+        # sorted is stable, rows with equal keys keep their order as with apply
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return [[column[i] for i in order] for column in columns], [sources[i] for i in order]
+
 
 class SwapColumnsRuleDefinition(BaseRuleDefinition):
     rule_type = "swap_columns"
@@ -456,6 +635,15 @@ class SwapColumnsRuleDefinition(BaseRuleDefinition):
 
         return list(map(new_row, data)), sources
 
+    def apply_columns(self, rule, columns, sources):
+        target_column_0 = rule["target_column_0"]
+        target_column_1 = rule["target_column_1"]
+
+        new_columns = columns[:]
+        new_columns[target_column_0] = columns[target_column_1]
+        new_columns[target_column_1] = columns[target_column_0]
+        return new_columns, sources
+
 
 class SplitColumnsRuleDefinition(BaseRuleDefinition):
     rule_type = "split_columns"
@@ -489,6 +677,24 @@ class SplitColumnsRuleDefinition(BaseRuleDefinition):
 
         return data, sources
 
+    def apply_columns(self, rule, columns, sources):
+        target_columns_0 = rule["target_columns_0"]
+        target_columns_1 = rule["target_columns_1"]
+
+        indices_0 = [index for index in range(len(columns)) if index in target_columns_0 or index not in target_columns_1]
+        indices_1 = [index for index in range(len(columns)) if index not in target_columns_0]
+        if len(indices_0) != len(indices_1):
+            return None
+
+        def interleave(items_0, items_1):
+            items = [None] * (2 * len(items_0))
+            items[0::2] = items_0
+            items[1::2] = items_1
+            return items
+
+        new_columns = [interleave(columns[index_0], columns[index_1]) for index_0, index_1 in zip(indices_0, indices_1)]
+        return new_columns, interleave(sources, sources)
+
 
 def flat_map(f, items):
     return list(itertools.chain.from_iterable(map(f, items)))
@@ -509,7 +715,38 @@ class RuleSet:
             yield (rule, RULES_DEFINITIONS[rule["type"]])
 
     def apply(self, data, sources):
-        for rule, rule_definition in self._rules_with_definitions():
+        """Apply the rules to the rows of ``data`` and their ``sources``.
+
+        The rules are applied to the columns of the table formed by the rows,
+        this yields the same rows and sources as :meth:`apply_rows` in a
+        fraction of the time on large tables. Tables whose rows differ in
+        length, e.g. after splitting columns unevenly, and empty tables are
+        processed row by row.
+        """
+        rules = self._rules_with_definitions()
+        columns = _rows_to_columns(data, sources)
+        if columns is not None:
+            for rule, rule_definition in rules:
+                rule_definition.validate_rule(rule)
+                result = rule_definition.apply_columns(rule, columns, sources)
+                if result is None:
+                    data, sources = rule_definition.apply(rule, _columns_to_rows(columns, len(sources)), sources)
+                    break
+                columns, sources = result
+                if not sources:
+                    data = []
+                    break
+            else:
+                return _columns_to_rows(columns, len(sources)), sources
+
+        return self._apply_rows(rules, data, sources)
+
+    def apply_rows(self, data, sources):
+        """Apply the rules to ``data`` and ``sources`` row by row."""
+        return self._apply_rows(self._rules_with_definitions(), data, sources)
+
+    def _apply_rows(self, rules, data, sources):
+        for rule, rule_definition in rules:
             rule_definition.validate_rule(rule)
             data, sources = rule_definition.apply(rule, data, sources)
 
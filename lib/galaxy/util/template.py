@@ -1,5 +1,10 @@
 """Entry point for the usage of Cheetah templating within Galaxy."""
 
+import hashlib
+import json
+import logging
+import os
+import tempfile
 import traceback
 from lib2to3.refactor import RefactoringTool
 
@@ -11,6 +16,9 @@ from Cheetah.Template import Template
 from past.translation import myfixes
 
 from . import unicodify
+from .lru_cache import LRUCache
+
+log = logging.getLogger(__name__)
 
 # Skip libpasteurize fixers, which make sure code is py2 and py3 compatible.
 # This is not needed, we only translate code on py3.
@@ -37,6 +45,76 @@ def create_compiler_class(module_code):
     return CustomCompilerClass
 
 
+class CompiledTemplateCache:
+    """
+    Bounded cache of compiled Cheetah template classes.
+
+    Entries are keyed by a key supplied by the caller (e.g. the id and version
+    of a tool), the python template version and the hash of the template text.
+    The classes that were successfully filled are cached, so templates that
+    needed to be translated from python 2 aren't translated again. If
+    ``cache_dir`` is set the generated module code is also written to disk,
+    it is used to recreate the classes after a restart without parsing the
+    templates again.
+    """
+
+    def __init__(self, maxsize=1000, cache_dir=None):
+        self._cache = LRUCache(maxsize)
+        self.cache_dir = cache_dir
+        self.disk_hits = 0
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_key(self, template_text, key, python_template_version):
+        return hashlib.sha1(json.dumps([key, str(python_template_version), template_text]).encode('utf-8')).hexdigest()
+
+    def get(self, cache_key):
+        """Return the compiled template class for ``cache_key`` and whether its code has been futurized."""
+        entry = self._cache.get(cache_key)
+        if entry is None and self.cache_dir:
+            entry = self._load(cache_key)
+            if entry is not None:
+                self.disk_hits += 1
+                self._cache.put(cache_key, entry)
+        return entry
+
+    def put(self, cache_key, klass, futurized=False):
+        self._cache.put(cache_key, (klass, futurized))
+        if self.cache_dir:
+            self._save(cache_key, klass._CHEETAH_generatedModuleCode, futurized)
+        log.debug("Cached compiled template %s, template cache stats: %s", cache_key, self.stats())
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats['disk_hits'] = self.disk_hits
+        return stats
+
+    def _path(self, cache_key):
+        return os.path.join(self.cache_dir, "%s.json" % cache_key)
+
+    def _load(self, cache_key):
+        path = self._path(cache_key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                as_dict = json.load(f)
+            compiler_class = create_compiler_class(as_dict['module_code'])
+            klass = Template.compile(source=as_dict['module_code'], compilerClass=compiler_class, cacheCompilationResults=False)
+            return klass, as_dict['futurized']
+        except Exception:
+            log.exception("Failed to load compiled template from %s", path)
+            return None
+
+    def _save(self, cache_key, module_code, futurized):
+        try:
+            with tempfile.NamedTemporaryFile('w', dir=self.cache_dir, delete=False) as f:
+                json.dump({'module_code': module_code, 'futurized': futurized}, f)
+            os.replace(f.name, self._path(cache_key))
+        except Exception:
+            log.exception("Failed to write compiled template to %s", self.cache_dir)
+
+
 def fill_template(template_text,
                   context=None,
                   retry=10,
@@ -44,12 +122,16 @@ def fill_template(template_text,
                   first_exception=None,
                   futurized=False,
                   python_template_version='3',
+                  template_cache=None,
+                  template_cache_key=None,
                   **kwargs):
     """Fill a cheetah template out for specified context.
 
     If template_text is None, an exception will be thrown, if context
     is None (the default) - keyword arguments to this function will be used
-    as the context.
+    as the context. If a :class:`CompiledTemplateCache` is passed in as
+    ``template_cache`` compiled templates are looked up in and added to the
+    cache, using ``template_cache_key`` as part of the key.
     """
     if template_text is None:
         raise TypeError("Template text specified as None to fill_template.")
@@ -57,8 +139,17 @@ def fill_template(template_text,
         context = kwargs
     if isinstance(python_template_version, str):
         python_template_version = packaging.version.parse(python_template_version)
+    cache_kwds = dict(template_cache=template_cache, template_cache_key=template_cache_key)
+    cache_key = cached = None
+    if template_cache is not None:
+        cache_key = template_cache.cache_key(template_text, template_cache_key, python_template_version)
+        if first_exception is None:
+            cached = template_cache.get(cache_key)
     try:
-        klass = Template.compile(source=template_text, compilerClass=compiler_class)
+        if cached:
+            klass, futurized = cached
+        else:
+            klass = Template.compile(source=template_text, compilerClass=compiler_class, cacheCompilationResults=template_cache is None)
     except ParseError as e:
         # Might happen on invalid syntax within a cheetah statement, like `#if $smxsize <> 128.0`
         if first_exception is None:
@@ -74,11 +165,15 @@ def fill_template(template_text,
                 compiler_class=compiler_class,
                 first_exception=first_exception,
                 python_template_version=python_template_version,
+                **cache_kwds
             )
         raise first_exception or e
     t = klass(searchList=[context])
     try:
-        return unicodify(t)
+        filled = unicodify(t)
+        if cache_key and not cached:
+            template_cache.put(cache_key, klass, futurized=futurized)
+        return filled
     except NotFound as e:
         if first_exception is None:
             first_exception = e
@@ -104,6 +199,7 @@ def fill_template(template_text,
                                      compiler_class=compiler_class,
                                      first_exception=first_exception,
                                      python_template_version=python_template_version,
+                                     **cache_kwds
                                      )
         raise first_exception or e
     except Exception as e:
@@ -123,6 +219,7 @@ def fill_template(template_text,
                                  first_exception=first_exception,
                                  futurized=True,
                                  python_template_version=python_template_version,
+                                 **cache_kwds
                                  )
         raise first_exception or e
 
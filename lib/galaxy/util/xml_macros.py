@@ -1,10 +1,25 @@
+import hashlib
 import os
 from copy import deepcopy
 
-from galaxy.util import parse_xml
+from galaxy.util import (
+    etree,
+    parse_xml,
+)
+from galaxy.util.lru_cache import LRUCache
 
 REQUIRED_PARAMETER = object()
 
+# Macro files are shared by many tools of a suite, their parsed trees are
+# cached keyed on their path and modification time.
+MACRO_FILE_CACHE = LRUCache(maxsize=1000)
+# The macros of tools, with imported macros loaded and macros and tokens
+# expanded, keyed on the directory and <macros> element of the tools.
+LOADED_MACROS_CACHE = LRUCache(maxsize=1000)
+# Nested tokens and expanded macros keyed on the macros and tokens of a tool.
+EXPANDED_TOKENS_CACHE = LRUCache(maxsize=1000)
+EXPANDED_MACROS_CACHE = LRUCache(maxsize=10000)
+
 
 def load_with_references(path):
     """Load XML documentation from file system and preprocesses XML macros.
@@ -15,17 +30,53 @@ def load_with_references(path):
     tree = raw_xml_tree(path)
     root = tree.getroot()
 
-    macro_paths = _import_macros(root, path)
+    macros_el = _macros_el(root)
+    if macros_el is None:
+        return tree, None
+
+    loaded_macros_key = (os.path.dirname(path), _el_key(macros_el))
+    loaded_macros = _loaded_macros(loaded_macros_key)
+    if loaded_macros is None:
+        macros_digest = hashlib.sha1(loaded_macros_key[1])
+        macro_paths = _import_macros(root, path)
+        file_keys = [_file_key(macro_path) for macro_path in macro_paths]
+        macros_digest.update(repr(file_keys).encode())
+
+        # Collect tokens
+        tokens = _macros_of_type(root, 'token', lambda el: el.text or '')
+        tokens = _expand_nested_tokens_cached(tokens)
+        macros_digest.update(repr(list(tokens.items())).encode())
+        macros_key = macros_digest.hexdigest()
+
+        # Expand xml macros
+        macro_dict = _macros_of_type(root, 'xml', lambda el: XmlMacroDef(el))
+        _expand_macros([root], macro_dict, tokens, macros_key)
+        LOADED_MACROS_CACHE.put(loaded_macros_key, (deepcopy(list(macros_el)), macro_paths, file_keys, tokens, macros_key))
+    else:
+        macro_els, macro_paths, _, tokens, macros_key = loaded_macros
+        _xml_set_children(macros_el, deepcopy(macro_els))
+        macro_dict = _macros_of_type(root, 'xml', lambda el: XmlMacroDef(el))
+        # Macros and tokens in the <macros> element are expanded already,
+        # expand the remainder of the tool only.
+        macros_index = list(root).index(macros_el)
+        root.remove(macros_el)
+        _expand_macros([root], macro_dict, tokens, macros_key)
+        root.insert(macros_index, macros_el)
 
-    # Collect tokens
-    tokens = _macros_of_type(root, 'token', lambda el: el.text or '')
-    tokens = expand_nested_tokens(tokens)
+    return tree, macro_paths
 
-    # Expand xml macros
-    macro_dict = _macros_of_type(root, 'xml', lambda el: XmlMacroDef(el))
-    _expand_macros([root], macro_dict, tokens)
 
-    return tree, macro_paths
+def _loaded_macros(key):
+    loaded_macros = LOADED_MACROS_CACHE.get(key)
+    if loaded_macros is not None:
+        macro_paths, file_keys = loaded_macros[1], loaded_macros[2]
+        try:
+            if [_file_key(macro_path) for macro_path in macro_paths] == file_keys:
+                return loaded_macros
+        except OSError:
+            pass
+        LOADED_MACROS_CACHE.pop(key)
+    return None
 
 
 def load(path):
@@ -33,6 +84,14 @@ def load(path):
     return tree
 
 
+def clear_macro_caches():
+    """Clear the caches of parsed macro files and expanded tokens and macros."""
+    MACRO_FILE_CACHE.clear()
+    LOADED_MACROS_CACHE.clear()
+    EXPANDED_TOKENS_CACHE.clear()
+    EXPANDED_MACROS_CACHE.clear()
+
+
 def template_macro_params(root):
     """
     Look for template macros and populate param_dict (for cheetah)
@@ -83,6 +142,15 @@ def _macros_of_type(root, type, el_func):
     return macro_dict
 
 
+def _expand_nested_tokens_cached(tokens):
+    key = tuple(tokens.items())
+    expanded_tokens = EXPANDED_TOKENS_CACHE.get(key)
+    if expanded_tokens is None:
+        expanded_tokens = expand_nested_tokens(dict(tokens))
+        EXPANDED_TOKENS_CACHE.put(key, expanded_tokens)
+    return dict(expanded_tokens)
+
+
 def expand_nested_tokens(tokens):
     for token_name in tokens.keys():
         for current_token_name, current_token_value in tokens.items():
@@ -93,25 +161,38 @@ def expand_nested_tokens(tokens):
     return tokens
 
 
-def _expand_tokens(elements, tokens):
+def _expand_tokens(elements, tokens, expanded=None):
     if not tokens or elements is None:
         return
 
     for element in elements:
-        _expand_tokens_for_el(element, tokens)
+        _expand_tokens_for_el(element, tokens, expanded)
 
 
-def _expand_tokens_for_el(element, tokens):
+def _expand_tokens_for_el(element, tokens, expanded=None):
+    # Texts and attribute values repeat a lot in a tree, ``expanded`` maps
+    # the ones seen so far to their expanded value (or None if unchanged).
+    if expanded is None:
+        expanded = {}
     value = element.text
     if value:
-        new_value = _expand_tokens_str(element.text, tokens)
+        new_value = _expand_tokens_str_memoized(value, tokens, expanded)
         if not (new_value is value):
             element.text = new_value
     for key, value in element.attrib.items():
-        new_value = _expand_tokens_str(value, tokens)
+        new_value = _expand_tokens_str_memoized(value, tokens, expanded)
         if not (new_value is value):
             element.attrib[key] = new_value
-    _expand_tokens(list(element), tokens)
+    _expand_tokens(list(element), tokens, expanded)
+
+
+def _expand_tokens_str_memoized(s, tokens, expanded):
+    try:
+        new_s = expanded[s]
+    except KeyError:
+        new_s = _expand_tokens_str(s, tokens)
+        expanded[s] = new_s if new_s != s else None
+    return s if new_s is None else new_s
 
 
 def _expand_tokens_str(s, tokens):
@@ -121,7 +202,12 @@ def _expand_tokens_str(s, tokens):
     return s
 
 
-def _expand_macros(elements, macros, tokens):
+def _expand_macros(elements, macros, tokens, macros_key=None):
+    """Expand macros and tokens of ``elements`` in place.
+
+    If ``macros_key`` - identifying the macros and tokens - is supplied, the
+    results of expanding macros are cached and reused across tools.
+    """
     if not macros and not tokens:
         return
 
@@ -130,30 +216,58 @@ def _expand_macros(elements, macros, tokens):
             expand_el = element.find('.//expand')
             if expand_el is None:
                 break
-            _expand_macro(element, expand_el, macros, tokens)
+            _expand_macro(element, expand_el, macros, tokens, macros_key)
 
         _expand_tokens_for_el(element, tokens)
 
 
-def _expand_macro(element, expand_el, macros, tokens):
-    macro_name = expand_el.get('macro')
-    macro_def = macros[macro_name]
-    expanded_elements = deepcopy(macro_def.elements)
+def _expand_macro(element, expand_el, macros, tokens, macros_key=None):
+    cache_key = None
+    expanded_elements = None
+    if macros_key is not None:
+        cache_key = (macros_key, _el_key(expand_el))
+        expanded_elements = EXPANDED_MACROS_CACHE.get(cache_key)
+
+    if expanded_elements is None:
+        macro_name = expand_el.get('macro')
+        macro_def = macros[macro_name]
+        expanded_elements = deepcopy(macro_def.elements)
+
+        _expand_yield_statements(expanded_elements, expand_el)
+
+        # Recursively expand contained macros.
+        _expand_macros(expanded_elements, macros, tokens, macros_key)
+        macro_tokens = macro_def.macro_tokens(expand_el)
+        if macro_tokens:
+            _expand_tokens(expanded_elements, macro_tokens)
+        if cache_key is not None:
+            # Cached elements are never modified, they are copied into the tree below.
+            EXPANDED_MACROS_CACHE.put(cache_key, expanded_elements)
 
-    _expand_yield_statements(expanded_elements, expand_el)
+    _xml_replace(expand_el, expanded_elements, _parent_map(element, expand_el))
 
-    # Recursively expand contained macros.
-    _expand_macros(expanded_elements, macros, tokens)
-    macro_tokens = macro_def.macro_tokens(expand_el)
-    if macro_tokens:
-        _expand_tokens(expanded_elements, macro_tokens)
 
-    # HACK for elementtree, newer implementations (etree/lxml) won't
-    # require this parent_map data structure but elementtree does not
-    # track parents or recognize .find('..').
-    # TODO fix this now that we're not using elementtree
-    parent_map = {c: p for p in element.iter() for c in p}
-    _xml_replace(expand_el, expanded_elements, parent_map)
+def _parent_map(element, child):
+    if hasattr(child, 'getparent'):
+        # lxml tracks parents
+        return {child: child.getparent()}
+    # HACK for elementtree, which does not track parents or recognize .find('..').
+    return {c: p for p in element.iter() for c in p}
+
+
+def _el_key(el):
+    """Serialize an element, without its tail, to key caches on it."""
+    tail = el.tail
+    el.tail = None
+    try:
+        return etree.tostring(el)
+    finally:
+        el.tail = tail
+
+
+def _file_key(path):
+    stat = os.stat(path)
+    return (path, stat.st_mtime_ns, stat.st_size)
 
 
 def _expand_yield_statements(macro_def, expand_el):
@@ -244,8 +358,13 @@ def _imported_macro_paths_from_el(macros_el):
 
 
 def _load_macro_file(path, xml_base_dir):
-    tree = parse_xml(path, strip_whitespace=False)
-    root = tree.getroot()
+    key = _file_key(path)
+    cached_root = MACRO_FILE_CACHE.get(key)
+    if cached_root is None:
+        cached_root = parse_xml(path, strip_whitespace=False).getroot()
+        MACRO_FILE_CACHE.put(key, cached_root)
+    # Loading macros modifies the tree and moves macros into the tool.
+    root = deepcopy(cached_root)
     return _load_macros(root, xml_base_dir)
 
 
@@ -306,6 +425,7 @@ class XmlMacroDef:
 
 
 __all__ = (
+    "clear_macro_caches",
     "imported_macro_paths",
     "load",
     "load_with_references",
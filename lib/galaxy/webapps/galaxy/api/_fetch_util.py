@@ -71,6 +71,9 @@ def validate_and_normalize_targets(trans, payload):
     purge_ftp_source = getattr(trans.app.config, 'ftp_upload_purge', True) and not run_as_real_user
 
     payload["check_content"] = trans.app.config.check_upload_content
+    payload["fetch_concurrency"] = trans.app.config.data_fetch_concurrency
+    payload["fetch_timeout"] = trans.app.config.data_fetch_url_timeout
+    payload["fetch_retries"] = trans.app.config.data_fetch_url_retries
 
     def check_src(item):
         if "object_id" in item:
@@ -352,6 +352,8 @@ class DatasetsController(BaseAPIController, UsesVisualizationMixin):
 
             elif dataset.datatype.has_dataprovider(provider):
                 kwargs = dataset.datatype.dataproviders[provider].parse_query_string_settings(kwargs)
+                # batch providers must provide plain lists here to be serialized
+                kwargs.pop('array_type', None)
                 # use dictionary to allow more than the data itself to be returned (data totals, other meta, etc.)
                 return {
                     'data': list(dataset.datatype.dataprovider(dataset, provider, **kwargs))
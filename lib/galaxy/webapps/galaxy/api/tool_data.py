@@ -41,6 +41,8 @@ class ToolData(BaseAPIController):
         decoded_tool_data_id = id
         data_table = trans.app.tool_data_tables.data_tables.get(decoded_tool_data_id)
         data_table.reload_from_files()
+        if trans.app.dynamic_options_cache:
+            trans.app.dynamic_options_cache.invalidate_data_tables([decoded_tool_data_id])
         trans.app.queue_worker.send_control_task(
             'reload_tool_data_tables',
             noop_self=True,
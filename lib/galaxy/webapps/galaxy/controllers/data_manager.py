@@ -172,6 +172,8 @@ class DataManager(BaseUIController):
             table_name = table_name.split(",")
         # Reload the tool data tables
         table_names = self.app.tool_data_tables.reload_tables(table_names=table_name)
+        if self.app.dynamic_options_cache:
+            self.app.dynamic_options_cache.invalidate_data_tables(table_names)
         trans.app.queue_worker.send_control_task(
             'reload_tool_data_tables',
             noop_self=True,
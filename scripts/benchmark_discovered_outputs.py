@@ -0,0 +1,111 @@
+"""
+Measure the throughput of persisting files discovered into an output collection.
+
+``--elements`` tabular files are written to a temporary job working directory
+and discovered into a list collection of a job, using a temporary SQLite
+database and disk object store. The collection is populated once for every
+number of ``--workers``. Example::
+
+    python scripts/benchmark_discovered_outputs.py --elements 10000 --workers 1 4
+"""
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'lib')))
+
+import galaxy.model
+from galaxy.datatypes.registry import Registry
+from galaxy.job_execution.output_collect import (
+    dataset_collector,
+    JobContext,
+    MetadataSourceProvider,
+    PermissionProvider,
+)
+from galaxy.model import mapping
+from galaxy.model.dataset_collections import builder
+from galaxy.model.security import GalaxyRBACAgent
+from galaxy.model.tags import GalaxyTagHandler
+from galaxy.objectstore import DiskObjectStore
+from galaxy.tool_util.parser.output_collection_def import FilePatternDatasetCollectionDescription
+from galaxy.util.bunch import Bunch
+
+DESCRIPTION = "Measure the throughput of persisting files discovered into an output collection."
+GALAXY_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+DATATYPES_CONF = os.path.join(GALAXY_ROOT, 'lib', 'galaxy', 'config', 'sample', 'datatypes_conf.xml.sample')
+
+
+def write_elements(job_working_directory, elements, lines):
+    for i in range(elements):
+        with open(os.path.join(job_working_directory, f'element_{i}.tabular'), 'w') as out:
+            for line in range(lines):
+                out.write(f"chr{i % 22 + 1}\t{line * 100}\t{line * 100 + 50}\tfeature_{line}\t{line % 1000}\n")
+
+
+def create_job(app, run):
+    sa_session = app.model.context
+    user = galaxy.model.User(email=f"benchmark{run}@example.org", password="password")
+    history = galaxy.model.History(name="Benchmark history", user=user)
+    job = galaxy.model.Job()
+    job.user = user
+    job.history = history
+    sa_session.add_all([user, history, job])
+    sa_session.flush()
+    role = app.security_agent.create_private_user_role(user)
+    app.security_agent.history_set_default_permissions(history, {app.security_agent.permitted_actions.DATASET_MANAGE_PERMISSIONS: [role]})
+    return job
+
+
+def populate(app, job, job_working_directory, workers):
+    sa_session = app.model.context
+    app.config.discovered_outputs_workers = workers
+    tool = Bunch(app=app, sa_session=sa_session)
+    permission_provider = PermissionProvider({}, app.security_agent, job)
+    job_context = JobContext(tool, None, job, job_working_directory, permission_provider,
+                             MetadataSourceProvider({}), '?', app.object_store, 'ok')
+    collection = galaxy.model.DatasetCollection(collection_type='list', populated=False)
+    sa_session.add(collection)
+    collection_builder = builder.BoundCollectionBuilder(collection)
+    dataset_collectors = [dataset_collector(FilePatternDatasetCollectionDescription(pattern="__name__"))]
+    filenames = job_context.find_files('output', collection, dataset_collectors)
+    start = time.perf_counter()
+    job_context.populate_collection_elements(collection, collection_builder, filenames, name='output')
+    collection_builder.populate()
+    sa_session.flush()
+    return len(filenames), time.perf_counter() - start
+
+
+def main(argv=None):
+    """Entry point for script."""
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--elements", default=5000, type=int, help="Number of files discovered into the collection")
+    arg_parser.add_argument("--lines", default=100, type=int, help="Number of lines of every file")
+    arg_parser.add_argument("--workers", default=[1, 4], type=int, nargs='+', help="Numbers of workers to compare")
+    args = arg_parser.parse_args(argv)
+
+    registry = Registry()
+    registry.load_datatypes(root_dir=GALAXY_ROOT, config=DATATYPES_CONF)
+    galaxy.model.set_datatypes_registry(registry)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        model = mapping.init(tmpdir, f"sqlite:///{os.path.join(tmpdir, 'benchmark.sqlite')}", create_tables=True)
+        files_dir = os.path.join(tmpdir, 'files')
+        object_store = DiskObjectStore(Bunch(umask=0o077, jobs_directory=tmpdir, new_file_path=tmpdir, object_store_check_old_style=False),
+                                       dict(files_dir=files_dir))
+        model.Dataset.object_store = object_store
+        app = Bunch(model=model, object_store=object_store, security_agent=GalaxyRBACAgent(model),
+                    tag_handler=GalaxyTagHandler(model.context), config=Bunch(defer_dataset_peeks=False))
+        job_working_directory = os.path.join(tmpdir, 'working')
+        os.mkdir(job_working_directory)
+        write_elements(job_working_directory, args.elements, args.lines)
+        print(f"Discovering {args.elements} files of {args.lines} lines")
+        for run, workers in enumerate(args.workers):
+            job = create_job(app, run)
+            elements, elapsed = populate(app, job, job_working_directory, workers)
+            print("  %2d workers - %d elements in %.1f s, %.0f elements/s" % (workers, elements, elapsed, elements / elapsed))
+            model.context.expunge_all()
+
+
+if __name__ == "__main__":
+    main()
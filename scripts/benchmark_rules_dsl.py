@@ -0,0 +1,78 @@
+"""
+Measure applying a rule set of the rules DSL to large collections, column by column and row by row.
+
+A synthetic table of ``--rows`` paired-end reads is processed with a rule set
+typical of the rule-based uploader and ``__APPLY_RULES__`` - regular
+expressions extracting sample and read identifiers, filters, a sort and a
+column split - or with the rule set of the ``--rules`` JSON file (a rules
+definition as saved from the rule builder). Both engines are checked to
+produce the same rows and sources. Example::
+
+    python scripts/benchmark_rules_dsl.py --rows 100000
+"""
+import json
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'lib')))
+
+from galaxy.util.rules_dsl import RuleSet
+
+DESCRIPTION = "Measure applying a rule set of the rules DSL to large collections, column by column and row by row."
+RULES = [
+    {"type": "add_column_basename", "target_column": 0},
+    {"type": "add_column_regex", "target_column": 1, "expression": r"(.*)_(R[12])\.fastq\.gz", "group_count": 2},
+    {"type": "add_column_regex", "target_column": 1, "expression": r"^(\w+?)_", "replacement": r"cell \1"},
+    {"type": "add_column_metadata", "value": "tags"},
+    {"type": "add_filter_regex", "target_column": 0, "expression": "/excluded/", "invert": True},
+    {"type": "add_filter_empty", "target_column": 2, "invert": False},
+    {"type": "sort", "target_column": 2, "numeric": False},
+    {"type": "swap_columns", "target_column_0": 0, "target_column_1": 4},
+    {"type": "remove_columns", "target_columns": [0, 5]},
+    {"type": "split_columns", "target_columns_0": [2], "target_columns_1": [3]},
+]
+
+
+def table(rows):
+    data = []
+    sources = []
+    for i in range(rows):
+        cell = f"cell{i // 2:06d}"
+        read = "R1" if i % 2 == 0 else "R2"
+        directory = "excluded" if i % 1000 == 0 else f"lane{i % 4}"
+        data.append([f"/data/{directory}/{cell}_{read}.fastq.gz"])
+        sources.append({"identifiers": [f"{cell}_{read}"], "tags": [f"group:lane:{i % 4}"], "dataset": i})
+    return data, sources
+
+
+def time_apply(apply, data, sources):
+    start = time.perf_counter()
+    result = apply(data, sources)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    """Entry point for script."""
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--rows", default=100000, type=int, help="Number of elements of the synthetic collection")
+    arg_parser.add_argument("--rules", default=None, help="JSON file of a rules definition to apply instead of the default rule set")
+    args = arg_parser.parse_args(argv)
+
+    if args.rules:
+        with open(args.rules) as f:
+            rule_set = RuleSet(json.load(f))
+    else:
+        rule_set = RuleSet({"rules": RULES})
+    data, sources = table(args.rows)
+    print(f"Applying {len(rule_set.rules)} rules to {args.rows} rows")
+    columns_elapsed, columns_result = time_apply(rule_set.apply, data, sources)
+    rows_elapsed, rows_result = time_apply(rule_set.apply_rows, data, sources)
+    assert columns_result == rows_result, "Rules applied column by column and row by row differ"
+    print("  %-10s %.2f s" % ("columns", columns_elapsed))
+    print("  %-10s %.2f s" % ("rows", rows_elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Measure loading and lookups of a large tabular tool data table.
+
+A ``.loc`` file with ``--rows`` entries is generated in a temporary directory
+and loaded into a ``TabularToolDataTable``. Example::
+
+    python scripts/benchmark_tool_data_table.py --rows 100000 --lookups 1000
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'lib')))
+
+from galaxy.tools.data import (
+    TabularToolDataTable,
+    ToolDataPathFiles,
+)
+from galaxy.util import (
+    ExecutionTimer,
+    parse_xml_string,
+)
+
+DESCRIPTION = "Measure loading and lookups of a large tabular tool data table."
+TABLE_XML = """<table name="benchmark_indexes" comment_char="#" allow_duplicate_entries="%s">
+    <columns>value, dbkey, name, path</columns>
+    <file path="%s" />
+</table>"""
+
+
+def write_loc_file(path, rows, duplicates):
+    with open(path, 'w') as f:
+        f.write("#value\tdbkey\tname\tpath\n")
+        for i in range(rows):
+            # Several builds share a dbkey, like indexes of different versions of a genome.
+            f.write(f"build{i}\tdbkey{i // 10}\tBuild {i}\t${{__HERE__}}/build{i}/build{i}.fa\n")
+        for i in range(duplicates):
+            f.write(f"build{i}\tdbkey{i // 10}\tBuild {i}\t${{__HERE__}}/build{i}/build{i}.fa\n")
+
+
+def time_calls(function, arguments):
+    times = []
+    for argument in arguments:
+        start = time.perf_counter()
+        function(argument)
+        times.append((time.perf_counter() - start) * 1000)
+    return "Mean: %.4f ms, Median: %.4f ms, Max: %.4f ms" % (statistics.mean(times), statistics.median(times), max(times))
+
+
+def main(argv=None):
+    """Entry point for script."""
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--rows", default=100000, type=int, help="Number of entries in the .loc file")
+    arg_parser.add_argument("--duplicates", default=1000, type=int, help="Number of duplicated entries in the .loc file")
+    arg_parser.add_argument("--lookups", default=1000, type=int, help="Number of lookups to time")
+    args = arg_parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tool_data_path:
+        loc_path = os.path.join(tool_data_path, 'benchmark_indexes.loc')
+        write_loc_file(loc_path, args.rows, args.duplicates)
+        tool_data_path_files = ToolDataPathFiles(tool_data_path)
+        for allow_duplicate_entries in (True, False):
+            config_element = parse_xml_string(TABLE_XML % (allow_duplicate_entries, loc_path))
+            load_timer = ExecutionTimer()
+            table = TabularToolDataTable(config_element, tool_data_path, tool_data_path_files=tool_data_path_files)
+            print(f"Loaded {len(table.data)} entries (allow_duplicate_entries={allow_duplicate_entries}) {load_timer}")
+
+        rng = random.Random(0)
+        values = [f"build{rng.randrange(args.rows)}" for _ in range(args.lookups)]
+        dbkeys = [f"dbkey{rng.randrange(args.rows // 10)}" for _ in range(args.lookups)]
+        print("Linear scan on value:  " + time_calls(lambda value: [fields for fields in table.data if fields[0] == value], values))
+        index_timer = ExecutionTimer()
+        table.get_entry('value', values[0], 'path')
+        table.get_entry('dbkey', dbkeys[0], 'path')
+        print(f"Built value and dbkey indexes {index_timer}")
+        print("get_entry on value:    " + time_calls(lambda value: table.get_entry('value', value, 'path'), values))
+        print("get_entries on dbkey:  " + time_calls(lambda dbkey: table.get_entries('dbkey', dbkey, 'value'), dbkeys))
+        print("get_field:             " + time_calls(table.get_field, values))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Measure building the options of data parameters of a tool form for large histories.
+
+A synthetic history with ``--datasets`` datasets of various extensions is
+created in a temporary SQLite database. Options are built once from the
+datasets of the history loaded as a whole and once using the datasets of
+matching extensions only. Example::
+
+    python scripts/benchmark_tool_form.py --datasets 20000 --repeat 5
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'lib')))
+
+import galaxy.model
+from galaxy.datatypes.registry import Registry
+from galaxy.model import mapping
+from galaxy.security.idencoding import IdEncodingHelper
+from galaxy.tools.parameters.basic import DataToolParameter
+from galaxy.tools.parameters.dataset_matcher import DatasetMatcherFactory
+from galaxy.util import XML
+from galaxy.util.bunch import Bunch
+
+DESCRIPTION = "Measure building the options of data parameters of a tool form for large histories."
+GALAXY_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+DATATYPES_CONF = os.path.join(GALAXY_ROOT, 'lib', 'galaxy', 'config', 'sample', 'datatypes_conf.xml.sample')
+EXTENSIONS = ['fastqsanger', 'fastqsanger.gz', 'bam', 'sam', 'vcf', 'bed', 'interval', 'gff3', 'tabular', 'txt',
+              'fasta', 'json', 'html', 'pdf', 'png', 'csv', 'bigwig', 'h5', 'qname_sorted.bam', 'vcf_bgzip']
+DEFAULT_FORMATS = ['bam', 'fastqsanger,fastqsanger.gz', 'tabular', 'bed', 'data']
+
+
+def load_registry():
+    registry = Registry()
+    registry.load_datatypes(root_dir=GALAXY_ROOT, config=DATATYPES_CONF)
+    # Converters are registered when the toolbox loads their tools, only their
+    # source and target extensions are needed to find conversion destinations.
+    for converter_config, source, target in registry.converters:
+        registry.datatype_converters.setdefault(source, {})[target] = converter_config
+    return registry
+
+
+def create_history(sa_session, datasets):
+    history = galaxy.model.History(name="Benchmark history")
+    sa_session.add(history)
+    for hid in range(1, datasets + 1):
+        state = galaxy.model.Dataset.states.ERROR if hid % 50 == 0 else galaxy.model.Dataset.states.OK
+        hda = galaxy.model.HistoryDatasetAssociation(name=f"dataset {hid}", extension=EXTENSIONS[hid % len(EXTENSIONS)],
+                                                     visible=hid % 20 != 0, history=history, create_dataset=True,
+                                                     sa_session=sa_session)
+        hda.hid = hid
+        hda.dataset.state = state
+        sa_session.add(hda)
+    sa_session.flush()
+    return history.id
+
+
+def time_form(model, app, history_id, param, repeat, load_all):
+    times = []
+    option_count = 0
+    for _ in range(repeat):
+        model.context.expunge_all()
+        history = model.context.query(galaxy.model.History).get(history_id)
+        trans = Bunch(app=app, history=history, security=app.security, workflow_building_mode=False, user=None)
+        # Like when building a tool form, the matcher factory is shared by all parameters.
+        trans.dataset_matcher_factory = DatasetMatcherFactory(trans)
+        start = time.perf_counter()
+        if load_all:
+            history.active_visible_datasets_and_roles
+        option_count = len(param.to_dict(trans)['options']['hda'])
+        times.append((time.perf_counter() - start) * 1000)
+    return option_count, times
+
+
+def main(argv=None):
+    """Entry point for script."""
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--datasets", default=20000, type=int, help="Number of datasets in the history")
+    arg_parser.add_argument("--repeat", default=3, type=int, help="Number of times every form is built")
+    arg_parser.add_argument("formats", nargs='*', default=DEFAULT_FORMATS, help="Formats of the data parameters")
+    args = arg_parser.parse_args(argv)
+
+    registry = load_registry()
+    galaxy.model.set_datatypes_registry(registry)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        model = mapping.init(tmpdir, f"sqlite:///{os.path.join(tmpdir, 'benchmark.sqlite')}", create_tables=True)
+        app = Bunch(name='galaxy', model=model, datatypes_registry=registry, security=IdEncodingHelper(id_secret='benchmark'))
+        history_id = create_history(model.context, args.datasets)
+        print(f"History with {args.datasets} datasets, building every form {args.repeat} times")
+        for formats in args.formats:
+            param = DataToolParameter(None, XML(f'<param name="input" type="data" format="{formats}"/>'), Bunch(app=app))
+            for load_all in (True, False):
+                option_count, times = time_form(model, app, history_id, param, args.repeat, load_all)
+                template = "  %-30s %-14s %5d options - Mean: %.1f ms, Min: %.1f ms"
+                print(template % (formats, "all datasets" if load_all else "indexed", option_count, statistics.mean(times), min(times)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Measure loading tool XML files that share macro files, with and without the macro caches.
+
+Tools are loaded from ``--tool-dir`` (e.g. a checkout of a tool suite
+repository) or, by default, from a synthetic suite of ``--tools`` tools
+importing a shared macro file with ``--macros`` xml macros. Tools are loaded
+once clearing the caches of parsed macro files and expanded tokens and macros
+before every tool and once keeping them. Example::
+
+    python scripts/benchmark_tool_macros.py --tools 500 --macros 100
+    python scripts/benchmark_tool_macros.py --tool-dir ~/tools-iuc/tools/bedtools
+"""
+import glob
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'lib')))
+
+from galaxy.tool_util.loader import load_tool
+from galaxy.util.xml_macros import clear_macro_caches
+
+DESCRIPTION = "Measure loading tool XML files that share macro files, with and without the macro caches."
+TOKENS = 40
+
+
+def write_macros(path, macros):
+    lines = ['<macros>', '    <token name="@TOOL_VERSION@">2.30.0</token>']
+    lines.extend(f'    <token name="@TOKEN_{i}@">value {i} @TOOL_VERSION@</token>' for i in range(TOKENS))
+    lines.append('    <xml name="requirements"><requirements><requirement type="package" version="@TOOL_VERSION@">suite</requirement><yield/></requirements></xml>')
+    lines.append('    <xml name="citations"><citations><citation type="doi">10.1093/bioinformatics/btq033</citation></citations></xml>')
+    options = ''.join(f'<option value="o{i}">Option {i}</option>' for i in range(10))
+    for i in range(macros):
+        lines.append(f'''    <xml name="param_{i}" tokens="argument" token_label="Option {i}">
+        <conditional name="cond_{i}">
+            <param name="select" type="select" label="@LABEL@ @TOKEN_{i % TOKENS}@">{options}</param>
+            <when value="o0"><param name="value" argument="@ARGUMENT@" type="integer" value="{i}" label="Value"/><yield/></when>
+            <when value="o1"><expand macro="text_{i % 10}"/></when>
+        </conditional>
+    </xml>''')
+    lines.extend(f'    <xml name="text_{i}"><param name="text" type="text" value="@TOKEN_{i}@" label="Text {i}"/></xml>' for i in range(10))
+    lines.append('</macros>')
+    with open(path, 'w') as out:
+        out.write('\n'.join(lines))
+
+
+def write_tool(path, index, macros):
+    expands = '\n'.join(f'        <expand macro="param_{(index + i) % macros}" argument="--arg{i}"><param name="flag_{i}" type="boolean" label="Flag"/></expand>' for i in range(8))
+    with open(path, 'w') as out:
+        out.write(f'''<tool id="tool_{index}" name="Tool {index}" version="@TOOL_VERSION@">
+    <macros>
+        <import>macros.xml</import>
+    </macros>
+    <expand macro="requirements"/>
+    <command>tool_{index} @TOKEN_3@</command>
+    <inputs>
+{expands}
+    </inputs>
+    <outputs><data name="output" format="txt"/></outputs>
+    <expand macro="citations"/>
+</tool>''')
+
+
+def time_loading(paths, cached):
+    clear_macro_caches()
+    start = time.perf_counter()
+    for path in paths:
+        if not cached:
+            clear_macro_caches()
+        load_tool(path)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    """Entry point for script."""
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--tool-dir", default=None, help="Directory of tool XML files to load instead of a synthetic suite")
+    arg_parser.add_argument("--tools", default=200, type=int, help="Number of tools of the synthetic suite")
+    arg_parser.add_argument("--macros", default=80, type=int, help="Number of xml macros of the shared macro file of the synthetic suite")
+    args = arg_parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if args.tool_dir:
+            paths = [path for path in sorted(glob.glob(os.path.join(args.tool_dir, '**', '*.xml'), recursive=True))
+                     if 'macros' not in os.path.basename(path) and os.sep + 'test-data' + os.sep not in path]
+        else:
+            write_macros(os.path.join(tmpdir, 'macros.xml'), args.macros)
+            paths = []
+            for i in range(args.tools):
+                paths.append(os.path.join(tmpdir, f'tool_{i}.xml'))
+                write_tool(paths[-1], i, args.macros)
+        print(f"Loading {len(paths)} tools")
+        for cached in (False, True):
+            elapsed = time_loading(paths, cached)
+            print("  %-10s %.2f s, %.1f ms per tool" % ("cached" if cached else "uncached", elapsed, elapsed * 1000 / len(paths)))
+
+
+if __name__ == "__main__":
+    main()
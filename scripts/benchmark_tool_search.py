@@ -0,0 +1,119 @@
+"""
+Compare the query latency of the Whoosh and the in-memory toolbox search engines.
+
+Documents are built from the tool XML files found in a directory (Galaxy's
+``tools`` directory by default), ``--copies`` allows simulating larger toolboxes.
+Example::
+
+    python scripts/benchmark_tool_search.py --copies 20 --repeat 50
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+sys.path.insert(1, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'lib')))
+
+from galaxy.tool_util.parser import get_tool_source
+from galaxy.tools.search import ToolBoxSearch
+from galaxy.tools.search.memory import InMemoryToolBoxSearch
+from galaxy.util import ExecutionTimer
+
+DESCRIPTION = "Compare the query latency of the Whoosh and the in-memory toolbox search engines."
+DEFAULT_QUERIES = ['bowtie', 'fastq', 'sort', 'concatenate datasets', 'filter', 'bam to sam', 'fasta',
+                   'convert', 'join', 'bed', 'interval', 'text manipulation', 'grop', 'upload']
+SEARCH_KWDS = dict(tool_name_boost=9, tool_id_boost=9, tool_section_boost=3, tool_description_boost=2,
+                   tool_label_boost=1, tool_stub_boost=5, tool_help_boost=0.5, tool_search_limit=20,
+                   tool_ngram_minsize=3, tool_ngram_maxsize=4)
+
+
+class BenchmarkTool:
+    """The attributes of a tool used to build its search document."""
+
+    guid = None
+    labels = []
+    tool_type = 'default'
+    hidden = False
+    lineage = None
+    is_latest_version = True
+
+    def __init__(self, tool_id, tool_source, section):
+        self.id = tool_id
+        self.name = tool_source.parse_name()
+        self.description = tool_source.parse_description()
+        self.raw_help = tool_source.parse_help()
+        self.edam_operations = tool_source.parse_edam_operations()
+        self.edam_topics = tool_source.parse_edam_topics()
+        self.section = section
+
+    def get_panel_section(self):
+        return (self.section, self.section)
+
+
+class BenchmarkToolCache:
+
+    def __init__(self, tools):
+        self.tools = {tool.id: tool for tool in tools}
+        self._tool_paths_by_id = {tool_id: tool_id for tool_id in self.tools}
+
+    def get_tool_by_id(self, tool_id):
+        return self.tools.get(tool_id)
+
+
+def load_tools(tools_dir, copies):
+    tools = []
+    for root, _, files in os.walk(tools_dir):
+        for filename in sorted(files):
+            if not filename.endswith('.xml'):
+                continue
+            try:
+                tool_source = get_tool_source(os.path.join(root, filename))
+                tool_id = tool_source.parse_id()
+            except Exception:
+                continue
+            if tool_source.root.tag != 'tool' or not tool_id or not tool_source.parse_name():
+                continue
+            for copy in range(copies):
+                tools.append(BenchmarkTool(f"{tool_id}_{copy}" if copy else tool_id, tool_source, os.path.basename(root)))
+    return tools
+
+
+def time_queries(search, queries, repeat, ngrams):
+    times = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            search.search(query, tool_enable_ngram_search=ngrams, **SEARCH_KWDS)
+            times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main(argv=None):
+    """Entry point for script."""
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--tools-dir", default=os.path.join(os.path.dirname(__file__), os.pardir, 'tools'))
+    arg_parser.add_argument("--copies", default=1, type=int, help="Index every tool this many times")
+    arg_parser.add_argument("--repeat", default=20, type=int, help="Number of times every query is run")
+    arg_parser.add_argument("--no-help", dest="index_help", default=True, action="store_false")
+    arg_parser.add_argument("queries", nargs='*', default=DEFAULT_QUERIES)
+    args = arg_parser.parse_args(argv)
+
+    tool_cache = BenchmarkToolCache(load_tools(args.tools_dir, args.copies))
+    print(f"Indexing {len(tool_cache.tools)} tools, running {len(args.queries)} queries {args.repeat} times")
+    with tempfile.TemporaryDirectory() as index_dir:
+        for search_class in (ToolBoxSearch, InMemoryToolBoxSearch):
+            search = search_class(toolbox=None, index_dir=index_dir, index_help=args.index_help)
+            build_timer = ExecutionTimer()
+            search.build_index(tool_cache, index_help=args.index_help)
+            print(f"{search_class.__name__}: index built {build_timer}")
+            for ngrams in (False, True):
+                times = time_queries(search, args.queries, args.repeat, ngrams)
+                template = "  ngrams %-5s - Mean: %.3f ms, Median: %.3f ms, 95th percentile: %.3f ms, Max: %.3f ms"
+                print(template % (ngrams, statistics.mean(times), statistics.median(times),
+                                  sorted(times)[int(len(times) * 0.95) - 1], max(times)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Measure loading the toolbox with different numbers of tool loading workers.
+
+Tools are loaded from ``--tool-dir`` (e.g. a checkout of a tool suite
+repository) or, by default, from the synthetic suite of
+``benchmark_tool_macros.py``. A toolbox is built for every number of
+``--workers`` and ``--executor``, once with an empty tool cache (tool files
+are parsed and macro expanded) and once with the cache filled by that first
+load. The toolbox is built against the mock app of the unit tests. Example::
+
+    python scripts/benchmark_toolbox_loading.py --tools 500 --workers 1 4
+    python scripts/benchmark_toolbox_loading.py --tool-dir ~/tools-iuc/tools --executor process
+"""
+import glob
+import logging
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+GALAXY_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(1, os.path.join(GALAXY_ROOT, 'lib'))
+sys.path.insert(1, os.path.join(GALAXY_ROOT, 'test'))
+
+from benchmark_tool_macros import (
+    write_macros,
+    write_tool,
+)
+from galaxy.config_watchers import ConfigWatchers
+from galaxy.model.tool_shed_install import mapping
+from galaxy.tools import ToolBox
+from galaxy.tools.cache import ToolCache
+from galaxy.util.bunch import Bunch
+from galaxy.util.xml_macros import clear_macro_caches
+from unit.unittest_utils import galaxy_mock
+
+DESCRIPTION = "Measure loading the toolbox with different numbers of tool loading workers."
+
+
+def write_tool_conf(path, tool_paths):
+    with open(path, 'w') as out:
+        out.write('<toolbox>\n    <section id="benchmark" name="Benchmark">\n')
+        out.writelines(f'        <tool file="{tool_path}" />\n' for tool_path in tool_paths)
+        out.write('    </section>\n</toolbox>\n')
+
+
+def mock_app(tmpdir, tool_cache_data_dir, workers, executor):
+    app = galaxy_mock.MockApp()
+    app.config.tool_cache_data_dir = tool_cache_data_dir
+    app.config.integrated_tool_panel_config = os.path.join(tmpdir, 'integrated_tool_panel.xml')
+    app.config.update_integrated_tool_panel = False
+    app.config.tool_loading_workers = workers
+    app.config.tool_loading_executor = executor
+    app.config.schema.defaults = {'tool_dependency_dir': 'dependencies'}
+    app.install_model = mapping.init("sqlite:///:memory:", create_tables=True)
+    app.tool_cache = ToolCache()
+    app.job_config["get_job_tool_configurations"] = lambda ids: [Bunch(handler=Bunch())]
+    app.job_config.get_tool_resource_parameters = lambda tool_id: None
+    app.watchers = ConfigWatchers(app)
+    return app
+
+
+def time_loading(tool_conf, tmpdir, tool_cache_data_dir, workers, executor):
+    app = mock_app(tmpdir, tool_cache_data_dir, workers, executor)
+    clear_macro_caches()
+    start = time.perf_counter()
+    toolbox = ToolBox([tool_conf], os.path.dirname(tool_conf), app)
+    elapsed = time.perf_counter() - start
+    toolbox.persist_cache()
+    return elapsed, len(toolbox._tools_by_id)
+
+
+def main(argv=None):
+    """Entry point for script."""
+    arg_parser = ArgumentParser(description=DESCRIPTION)
+    arg_parser.add_argument("--tool-dir", default=None, help="Directory of tool XML files to load instead of a synthetic suite")
+    arg_parser.add_argument("--tools", default=200, type=int, help="Number of tools of the synthetic suite")
+    arg_parser.add_argument("--macros", default=80, type=int, help="Number of xml macros of the shared macro file of the synthetic suite")
+    arg_parser.add_argument("--workers", default=[1, 4], type=int, nargs="+", help="Numbers of tool loading workers to compare")
+    arg_parser.add_argument("--executor", default="thread", choices=["thread", "process"], help="Kind of tool loading workers")
+    args = arg_parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if args.tool_dir:
+            tool_paths = [path for path in sorted(glob.glob(os.path.join(os.path.abspath(args.tool_dir), '**', '*.xml'), recursive=True))
+                          if 'macros' not in os.path.basename(path) and os.sep + 'test-data' + os.sep not in path]
+        else:
+            write_macros(os.path.join(tmpdir, 'macros.xml'), args.macros)
+            tool_paths = []
+            for i in range(args.tools):
+                tool_paths.append(os.path.join(tmpdir, f'tool_{i}.xml'))
+                write_tool(tool_paths[-1], i, args.macros)
+        tool_conf = os.path.join(tmpdir, 'tool_conf.xml')
+        write_tool_conf(tool_conf, tool_paths)
+        print(f"Loading {len(tool_paths)} tools with {args.executor} workers")
+        for workers in args.workers:
+            tool_cache_data_dir = tempfile.mkdtemp(dir=tmpdir)
+            for cache in ("cold cache", "warm cache"):
+                elapsed, tool_count = time_loading(tool_conf, tmpdir, tool_cache_data_dir, workers, args.executor)
+                print("  %2d workers, %-10s %.2f s, %d tools, %.1f tools/s" % (workers, cache, elapsed, tool_count, tool_count / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Unit tests for column DataProviders.
+.. seealso:: galaxy.datatypes.dataproviders.column
+"""
+import array
+import unittest
+from io import StringIO
+
+from galaxy.datatypes.dataproviders import column
+from galaxy.util import clean_multiline_string
+
+CONTENTS = clean_multiline_string("""
+    # chrom	start	score	name
+    chr1	10	0.5	a
+    chr1	20	1.5	b
+    chr2	30	nan	c
+    chr2	x	2.5	d
+    chr3	50	3.5
+    chr3	60	4.5	f
+""")
+COLUMN_TYPES = ['str', 'int', 'float', 'str']
+
+
+class Test_ColumnarBatchDataProvider(unittest.TestCase):
+
+    def rows(self, **kwargs):
+        return list(column.ColumnarDataProvider(StringIO(CONTENTS), **kwargs))
+
+    def batches(self, provider_class=column.ColumnarBatchDataProvider, **kwargs):
+        return list(provider_class(StringIO(CONTENTS), **kwargs))
+
+    def assert_same_as_rows(self, **kwargs):
+        rows = self.rows(**kwargs)
+        for batch_size in (1, 2, 4, 100):
+            batches = self.batches(batch_size=batch_size, **kwargs)
+            assert all(len(batch[0]) <= batch_size for batch in batches)
+            transposed = [list(values) for batch in batches for values in zip(*batch)]
+            # the str representation compares nans
+            assert str(transposed) == str(rows), (kwargs, batch_size)
+
+    def test_same_rows_as_columnar(self):
+        self.assert_same_as_rows(column_types=COLUMN_TYPES)
+        self.assert_same_as_rows(column_types=COLUMN_TYPES, indeces=[3, 1, 5])
+        self.assert_same_as_rows(column_types=COLUMN_TYPES, offset=1, limit=3)
+        self.assert_same_as_rows(column_types=COLUMN_TYPES, filters=['2-ge-1', '0-eq-chr2'])
+        self.assert_same_as_rows(column_types=COLUMN_TYPES, filters=['2-gt-1'], offset=1, limit=2)
+        self.assert_same_as_rows(column_types=COLUMN_TYPES, parse_columns=False)
+
+    def test_unequal_rows_padded(self):
+        batch = self.batches(batch_size=100)[0]
+        assert len(batch) == 4
+        assert batch[3] == ['a', 'b', 'c', 'd', None, 'f']
+
+    def test_typed_arrays(self):
+        batch = self.batches(column_types=COLUMN_TYPES, array_type='array', offset=4)[0]
+        assert batch[1] == array.array('q', [50, 60])
+        assert batch[2] == array.array('d', [3.5, 4.5])
+        # missing values are kept as lists
+        assert batch[3] == [None, 'f']
+        batch = self.batches(column_types=COLUMN_TYPES, array_type='array', limit=4)[0]
+        assert batch[1] == [10, 20, 30, None]
+
+    def test_numpy_arrays(self):
+        numpy = column.numpy
+        if numpy is None:
+            raise unittest.SkipTest("numpy not installed")
+        batch = self.batches(column_types=COLUMN_TYPES, array_type='numpy', limit=3)[0]
+        assert batch[1].dtype == numpy.int64
+        assert batch[1].tolist() == [10, 20, 30]
+        assert batch[2].dtype == numpy.float64
+        assert batch[0] == ['chr1', 'chr1', 'chr2']
+
+    def test_dict_batches(self):
+        batches = self.batches(column.DictBatchDataProvider, column_types=COLUMN_TYPES,
+                               column_names=['chrom', 'start'], indeces=[0, 1], batch_size=4)
+        assert batches == [
+            {'chrom': ['chr1', 'chr1', 'chr2', 'chr2'], 'start': [10, 20, 30, None]},
+            {'chrom': ['chr3', 'chr3'], 'start': [50, 60]},
+        ]
@@ -1,5 +1,13 @@
+import logging
+import os
+
 from galaxy.datatypes import sniff
-from galaxy.datatypes.registry import example_datatype_registry_for_sample
+from galaxy.datatypes.registry import (
+    example_datatype_registry_for_sample,
+    Registry,
+)
+from galaxy.util import galaxy_directory
+from galaxy.util.bunch import Bunch
 
 
 def test_matches_any():
@@ -114,3 +122,103 @@ def test_sniff_compressed_dynamic_datatypes_default_off():
     assert 'fastq' not in sniff.guess_ext(fname, sniff_order)
     fname = sniff.get_test_fname('1.fastqsanger.bz2')
     assert 'fastq' not in sniff.guess_ext(fname, sniff_order)
+
+
+def test_lazy_registry_matches_eager():
+    eager_registry = _registry_for_sample()
+    lazy_registry = _registry_for_sample(lazy=True)
+
+    # Extensions are known without loading any datatype.
+    assert list(lazy_registry.datatypes_by_extension.keys()) == list(eager_registry.datatypes_by_extension.keys())
+    assert lazy_registry.datatypes_by_extension.is_deferred('fastqsanger.gz')
+
+    # Looking up an auto compressed datatype loads it along with its uncompressed datatype.
+    fastqsangergz_datatype = lazy_registry.get_datatype_by_extension('fastqsanger.gz')
+    assert fastqsangergz_datatype.__class__.__name__ == eager_registry.get_datatype_by_extension("fastqsanger.gz").__class__.__name__
+    assert not lazy_registry.datatypes_by_extension.is_deferred('fastqsanger')
+    assert lazy_registry.get_datatype_by_extension('mz5').matches_any([lazy_registry.get_datatype_by_extension('h5')])
+    assert lazy_registry.get_datatype_by_extension('not_a_datatype') is None
+
+    # Accessing the sniff order loads everything and results in the same order.
+    lazy_sniff_order = [type(d).__name__ for d in lazy_registry.sniff_order]
+    assert not lazy_registry.datatypes_by_extension.is_deferred('fasta')
+    assert lazy_sniff_order == [type(d).__name__ for d in eager_registry.sniff_order]
+
+
+def test_lazy_registry_mutators(caplog):
+    lazy_registry = _registry_for_sample(lazy=True)
+    datatypes_by_extension = lazy_registry.datatypes_by_extension
+
+    # Deferred loads don't count as overriding a datatype.
+    with caplog.at_level(logging.DEBUG, logger="galaxy.datatypes.registry"):
+        assert lazy_registry.get_datatype_by_extension('fasta') is not None
+    assert "Overriding conflicting datatype" not in caplog.text
+
+    assert datatypes_by_extension.pop('bam').__class__.__name__ == 'Bam'
+    assert 'bam' not in datatypes_by_extension and not datatypes_by_extension.is_deferred('bam')
+    assert datatypes_by_extension.pop('bam', None) is None
+    assert datatypes_by_extension.setdefault('tabular', None) is not None
+    datatypes_by_extension.update({'vcf': None})
+    assert not datatypes_by_extension.is_deferred('vcf')
+    assert datatypes_by_extension['vcf'] is None
+    # Copies are plain dictionaries of loaded datatypes.
+    copy = datatypes_by_extension.copy()
+    assert copy['fastqsanger'] is not None
+    assert not datatypes_by_extension.is_deferred('fastqsanger')
+    datatypes_by_extension.clear()
+    assert not datatypes_by_extension.is_deferred('fastqsanger')
+    assert len(datatypes_by_extension) == 0
+
+
+def test_converter_graph():
+    datatypes_registry = _registry_for_sample()
+    datatypes_registry.converter_deps = {'sqlite': {'json': ['tabular']}}
+    toolbox = _converter_toolbox()
+    _load_converters(datatypes_registry, toolbox, [('fasta', 'tabular'), ('tabular', 'sqlite'), ('sqlite', 'json')])
+    converter_graph = datatypes_registry.converter_graph
+
+    # Converters of datatypes are inherited by their subclasses
+    assert list(converter_graph.converters('bed')) == ['sqlite']
+    assert converter_graph.conversion_path('fasta', 'sqlite') is None
+    assert converter_graph.conversion_path('fasta', 'sqlite', max_steps=2) == ['tabular', 'sqlite']
+    assert converter_graph.conversion_targets('fasta', max_steps=3) == ['tabular', 'sqlite']
+    # Converters with dependencies are only used on their own
+    assert converter_graph.conversion_path('sqlite', 'json') == ['json']
+    assert not converter_graph.can_convert('fasta', 'json', max_steps=3)
+
+    # Conversions in multiple steps are only used if allowed
+    sqlite_datatype = datatypes_registry.get_datatype_by_extension('sqlite')
+    assert datatypes_registry.find_conversion_destination_for_dataset_by_extensions('fasta', [sqlite_datatype]) == (None, None)
+    assert datatypes_registry.get_conversion_path('fasta', 'sqlite') is None
+    datatypes_registry.config.implicit_conversion_max_steps = 2
+    assert datatypes_registry.find_conversion_destination_for_dataset_by_extensions('fasta', [sqlite_datatype]) == ('sqlite', None)
+    assert datatypes_registry.get_conversion_path('fasta', 'sqlite') == ['tabular', 'sqlite']
+
+    # Adding and removing converters updates the graph
+    _load_converters(datatypes_registry, toolbox, [('fasta', 'sqlite')])
+    assert converter_graph.conversion_path('fasta', 'sqlite', max_steps=2) == ['sqlite']
+    _load_converters(datatypes_registry, toolbox, [('tabular', 'sqlite')], deactivate=True)
+    assert list(converter_graph.converters('bed')) == []
+    assert converter_graph.conversion_path('tabular', 'sqlite', max_steps=3) is None
+
+
+def _converter_toolbox():
+    return Bunch(
+        load_tool=lambda path, use_cached=False: Bunch(id=os.path.basename(path)),
+        register_tool=lambda tool: None,
+        remove_tool_by_id=lambda tool_id, remove_from_panel=False: None,
+        app=Bunch(),
+    )
+
+
+def _load_converters(datatypes_registry, toolbox, conversions, deactivate=False):
+    datatypes_registry.converters = [(f"{source}_to_{target}.xml", source, target) for source, target in conversions]
+    datatypes_registry.load_datatype_converters(toolbox, deactivate=deactivate)
+
+
+def _registry_for_sample(lazy=False):
+    galaxy_dir = galaxy_directory()
+    sample_conf = os.path.join(galaxy_dir, "lib", "galaxy", "config", "sample", "datatypes_conf.xml.sample")
+    datatypes_registry = Registry(Bunch(sniff_compressed_dynamic_datatypes_default=True))
+    datatypes_registry.load_datatypes(root_dir=galaxy_dir, config=sample_conf, lazy=lazy)
+    return datatypes_registry
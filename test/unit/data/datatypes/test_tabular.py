@@ -0,0 +1,46 @@
+"""
+Unit tests for tabular DataTypes.
+.. seealso:: galaxy.datatypes.tabular
+"""
+import bz2
+import gzip
+import json
+import zipfile
+
+from galaxy.datatypes.dataproviders.dataset import DatasetDataProvider
+from galaxy.datatypes.tabular import Tabular
+from galaxy.util.bunch import Bunch
+
+LINES = ["chr%d\t%d\t%d\n" % (i % 3, i * 100, i * 100 + 50) for i in range(1000)]
+
+
+def _compressed_files(tmp_path):
+    contents = "".join(LINES).encode()
+    plain = tmp_path / "1.tabular"
+    plain.write_bytes(contents)
+    gzipped = tmp_path / "1.tabular.gz"
+    gzipped.write_bytes(gzip.compress(contents))
+    bzipped = tmp_path / "1.tabular.bz2"
+    bzipped.write_bytes(bz2.compress(contents))
+    zipped = tmp_path / "1.tabular.zip"
+    with zipfile.ZipFile(zipped, "w") as zh:
+        zh.writestr("1.tabular", contents)
+    return [str(path) for path in (plain, gzipped, bzipped, zipped)]
+
+
+def test_get_chunk_of_compressed_datasets(tmp_path):
+    for file_name in _compressed_files(tmp_path):
+        dataset = Bunch(file_name=file_name)
+        chunk = json.loads(Tabular().get_chunk(None, dataset, ck_size=20))
+        # chunks are decompressed and extended to the end of the line
+        assert chunk['ck_data'] == "".join(LINES[:2]).rstrip("\n"), file_name
+        offset = len("".join(LINES[:500]))
+        chunk = json.loads(Tabular().get_chunk(None, dataset, offset=offset, ck_size=20))
+        assert chunk['ck_data'] == "".join(LINES[500:502]).rstrip("\n"), file_name
+        assert chunk['offset'] == offset + len("".join(LINES[500:502])), file_name
+
+
+def test_dataset_dataprovider_of_compressed_datasets(tmp_path):
+    for file_name in _compressed_files(tmp_path):
+        dataset = Bunch(file_name=file_name, datatype=Tabular())
+        assert list(DatasetDataProvider(dataset)) == LINES, file_name
@@ -6,6 +6,7 @@ from sqlalchemy import inspect
 import galaxy.datatypes.registry
 import galaxy.model
 import galaxy.model.mapping as mapping
+from galaxy.util.bunch import Bunch
 
 datatypes_registry = galaxy.datatypes.registry.Registry()
 datatypes_registry.load_datatypes()
@@ -298,6 +299,155 @@ class MappingTests(unittest.TestCase):
         assert hist1.name == "History 2b"
         # gvk TODO need to ad test for GalaxySessions, but not yet sure what they should look like.
 
+    def test_deferred_peek(self):
+        model = self.model
+
+        h = model.History(name="History for deferred peek")
+        self.persist(h)
+        d = self.new_hda(h, name="1", extension="data", blurb="done")
+        d.defer_peek()
+        self.persist(d)
+        d_id = d.id
+        self.expunge()
+
+        d = model.session.query(model.HistoryDatasetAssociation).get(d_id)
+        assert d.peek_deferred
+        assert d.peek is None
+        assert d.blurb == "done"
+        # copies stay deferred
+        assert d.copy(flush=False).peek_deferred
+        # reading the peek doesn't set it ...
+        assert d.peek is None
+        # ... serializers do, using ensure_peek()
+        assert d.ensure_peek()
+        assert d.peek == ""
+        assert d.blurb == "data"
+        assert not d.ensure_peek()
+        self.persist(d)
+        self.expunge()
+        # ... and it is stored
+        d = model.session.query(model.HistoryDatasetAssociation).get(d_id)
+        assert not d.peek_deferred
+        assert d.blurb == "data"
+
+    def test_bulk_dataset_permissions(self):
+        model = self.model
+        security_agent = model.security_agent
+        u = model.User(email="bulkpermissions@foo.bar.baz", password="password")
+        h = model.History(name="History for bulk permissions", user=u)
+        self.persist(u, h)
+        role = security_agent.get_private_user_role(u, auto_create=True)
+        datasets = [self.new_hda(h, name=str(i)).dataset for i in range(3)]
+        self.persist(*datasets)
+        manage_action = security_agent.permitted_actions.DATASET_MANAGE_PERMISSIONS
+        access_action = security_agent.permitted_actions.DATASET_ACCESS
+        security_agent.set_new_dataset_permissions_in_bulk([
+            (datasets[0], {manage_action: [role], access_action: [role]}),
+            (datasets[1], {manage_action: [role]}),
+            # Permissions without a managing role are skipped
+            (datasets[2], {access_action: [role]}),
+        ])
+        dataset_ids = [d.id for d in datasets]
+        role_id = role.id
+        self.expunge()
+
+        datasets = [model.session.query(model.Dataset).get(dataset_id) for dataset_id in dataset_ids]
+        security_agent.prefetch_dataset_permissions(datasets)
+        assert all('actions' in d.__dict__ for d in datasets)
+        assert sorted(p.action for p in datasets[0].actions) == sorted([manage_action.action, access_action.action])
+        assert [p.role.id for p in datasets[1].actions] == [role_id]
+        assert datasets[2].actions == []
+        assert not security_agent.can_access_dataset([], datasets[0])
+        assert security_agent.can_access_dataset([], datasets[1])
+
+    def test_shared_implicit_conversion(self):
+        model = self.model
+        security_agent = model.security_agent
+        u = model.User(email="sharedconversion@foo.bar.baz", password="password")
+        h1 = model.History(name="History with conversion", user=u)
+        h2 = model.History(name="History with copy", user=u)
+        self.persist(u, h1, h2)
+        hda = self.new_hda(h1, name="1.bam", extension="bam")
+        copied_hda = h2.add_dataset(hda.copy(flush=False))
+        converted = self.new_hda(h1, name="1.bai", extension="bai", visible=False)
+        converted.dataset.state = model.Dataset.states.OK
+        job = model.Job()
+        job.tool_id = "CONVERTER_Bam_Bai_0"
+        job.tool_version = "1.0.0"
+        job.add_output_dataset("output1", converted)
+        self.persist(hda, copied_hda, converted, job)
+        self.persist(model.ImplicitlyConvertedDatasetAssociation(parent=hda, file_type="bai", dataset=converted, metadata_safe=False))
+
+        def set_converter_version(version):
+            datatypes_registry.datatype_converters["bam"] = {"bai": Bunch(id="CONVERTER_Bam_Bai_0", version=version)}
+            datatypes_registry.converter_graph.converters_changed("bam")
+
+        # Other test modules may have installed their own registry
+        previous_datatypes_registry = galaxy.model._get_datatypes_registry()
+        galaxy.model.set_datatypes_registry(datatypes_registry)
+        set_converter_version("1.0.0")
+        trans = Bunch(sa_session=model.session, history=h2, app=Bunch(security_agent=security_agent), get_current_user_roles=lambda: [])
+        try:
+            # The conversion of the dataset in another history is reused
+            reused = copied_hda.get_converted_dataset(trans, "bai")
+            assert reused.id != converted.id
+            assert reused.dataset == converted.dataset
+            assert reused.history == h2
+            assert not reused.visible
+            assert copied_hda.get_converted_files_by_type("bai") == reused
+
+            # Conversions by another converter version or inaccessible to the user are not reused
+            other_copy = h2.add_dataset(hda.copy(flush=False))
+            self.persist(other_copy)
+            set_converter_version("1.0.1")
+            assert other_copy._get_shared_converted_dataset(trans, "bai") is None
+            set_converter_version("1.0.0")
+            role = security_agent.get_private_user_role(u, auto_create=True)
+            security_agent.set_dataset_permission(converted.dataset, {security_agent.permitted_actions.DATASET_ACCESS: [role]})
+            assert other_copy._get_shared_converted_dataset(trans, "bai") is None
+            trans.get_current_user_roles = lambda: [role]
+            assert other_copy._get_shared_converted_dataset(trans, "bai").dataset == converted.dataset
+        finally:
+            datatypes_registry.datatype_converters.pop("bam")
+            datatypes_registry.converter_graph.converters_changed("bam")
+            galaxy.model.set_datatypes_registry(previous_datatypes_registry)
+
+    def test_implicit_conversion_in_steps(self):
+        model = self.model
+        h = model.History(name="History with conversion in steps")
+        self.persist(h)
+        hda = self.new_hda(h, name="1.fasta", extension="fasta")
+        intermediate = self.new_hda(h, name="1.tabular", extension="tabular", visible=False)
+        converted = self.new_hda(h, name="1.sqlite", extension="sqlite", visible=False)
+        self.persist(hda, intermediate, converted)
+        self.persist(model.ImplicitlyConvertedDatasetAssociation(parent=hda, file_type="tabular", dataset=intermediate, metadata_safe=False))
+        self.persist(model.ImplicitlyConvertedDatasetAssociation(parent=intermediate, file_type="sqlite", dataset=converted, metadata_safe=False))
+
+        previous_datatypes_registry = galaxy.model._get_datatypes_registry()
+        galaxy.model.set_datatypes_registry(datatypes_registry)
+        previous_config = datatypes_registry.config
+        datatypes_registry.config = Bunch(implicit_conversion_max_steps=2)
+        datatypes_registry.datatype_converters["fasta"] = {"tabular": Bunch(id="CONVERTER_fasta_to_tabular")}
+        datatypes_registry.datatype_converters["tabular"] = {"sqlite": Bunch(id="CONVERTER_tabular_to_sqlite")}
+        for ext in ("fasta", "tabular"):
+            datatypes_registry.converter_graph.converters_changed(ext)
+        trans = Bunch(sa_session=model.session, history=h)
+        try:
+            assert hda.get_converted_dataset(trans, "sqlite") == converted
+            # The result is recorded as a conversion of the original dataset only
+            parents = [assoc.parent_hda for assoc in converted.implicitly_converted_parent_datasets]
+            assert parents == [hda]
+            assert hda.get_converted_files_by_type("sqlite") == converted
+            assert intermediate.get_converted_files_by_type("sqlite") is None
+            assert hda.get_converted_dataset(trans, "sqlite") == converted
+            assert len(converted.implicitly_converted_parent_datasets) == 1
+        finally:
+            for ext in ("fasta", "tabular"):
+                datatypes_registry.datatype_converters.pop(ext)
+                datatypes_registry.converter_graph.converters_changed(ext)
+            datatypes_registry.config = previous_config
+            galaxy.model.set_datatypes_registry(previous_datatypes_registry)
+
     def test_jobs(self):
         model = self.model
         u = model.User(email="jobtest@foo.bar.baz", password="password")
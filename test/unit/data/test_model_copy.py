@@ -5,7 +5,10 @@ import threading
 import galaxy.datatypes.registry
 import galaxy.model
 import galaxy.model.mapping as mapping
-from galaxy.model.metadata import MetadataTempFile
+from galaxy.model.metadata import (
+    MetadataTempFile,
+    SPILLED_METADATA_FILE_KEY,
+)
 from galaxy.util import ExecutionTimer
 from ..unittest_utils.objectstore_helpers import DISK_TEST_CONFIG, TestConfig
 
@@ -132,3 +135,30 @@ def _check_metadata_file(hda):
     with open(copied_index) as f:
         assert f.read() == "moo"
     assert copied_index.endswith("metadata_%d.dat" % hda.id)
+
+
+def test_spilled_metadata():
+    with _setup_mapping_and_user() as (test_config, object_store, model, history):
+        galaxy.model.metadata.SpillableParameter.spill_threshold = 1000
+        try:
+            hda = _create_hda(model, object_store, history, test_config.write("moo", "test_metadata_spilled"))
+            reference_names = ["chr%d" % i for i in range(1000)]
+            hda.metadata.from_JSON_dict(json_dict={"reference_names": reference_names, "reference_lengths": [1000, 2000]})
+            # Only the large value is stored in a metadata file
+            assert list(hda._metadata["reference_names"]) == [SPILLED_METADATA_FILE_KEY]
+            assert hda._metadata["reference_lengths"] == [1000, 2000]
+            hda.metadata.sort_order = "coordinate"
+            hda.metadata.read_groups = ["rg%d" % i for i in range(500)]
+            assert list(hda._metadata["read_groups"]) == [SPILLED_METADATA_FILE_KEY]
+            model.context.flush()
+            hda_id = hda.id
+            model.context.expunge_all()
+
+            hda = model.context.query(model.HistoryDatasetAssociation).get(hda_id)
+            assert hda.metadata.reference_names == reference_names
+            assert hda.metadata.read_groups[-1] == "rg499"
+            copied_hda = hda.copy()
+            assert copied_hda.metadata.reference_names == reference_names
+            assert copied_hda._metadata["reference_names"] != hda._metadata["reference_names"]
+        finally:
+            galaxy.model.metadata.SpillableParameter.spill_threshold = 0
@@ -1,5 +1,6 @@
 import os
 import tempfile
+import threading
 
 from galaxy import model
 from galaxy.job_execution.output_collect import (
@@ -15,10 +16,14 @@ class PermissionProvider:
 
     def __init__(self):
         self.permissions = []
+        self.datasets_with_default_permissions = []
 
     def set_default_hda_permissions(self, primary_data):
         pass
 
+    def set_default_hda_permissions_in_bulk(self, datasets):
+        self.datasets_with_default_permissions.extend(datasets)
+
     def copy_dataset_permissions(self, init_from, primary_data):
         pass
 
@@ -42,10 +47,8 @@ def setup_data(job_working_directory):
             out.write(str(i))
 
 
-def test_job_context_discover_outputs_flushes_once(mocker):
-    app = _mock_app()
+def _setup_job_context(app):
     sa_session = app.model.context
-    # mocker is a pytest-mock fixture
 
     u = model.User(email="collection@example.com", password="password")
     h = model.History(name="Test History", user=u)
@@ -62,16 +65,32 @@ def test_job_context_discover_outputs_flushes_once(mocker):
     object_store = app.object_store
     input_dbkey = '?'
     final_job_state = 'ok'
+    return JobContext(tool, tool_provided_metadata, job, job_working_directory, permission_provider, metadata_source_provider, input_dbkey, object_store, final_job_state)
+
+
+def test_job_context_discover_outputs_flushes_once(mocker):
+    app = _mock_app()
+    sa_session = app.model.context
+    # mocker is a pytest-mock fixture
+
+    job_context = _setup_job_context(app)
     collection_description = FilePatternDatasetCollectionDescription(pattern="__name__")
     collection = model.DatasetCollection(collection_type='list', populated=False)
     sa_session.add(collection)
-    job_context = JobContext(tool, tool_provided_metadata, job, job_working_directory, permission_provider, metadata_source_provider, input_dbkey, object_store, final_job_state)
     collection_builder = builder.BoundCollectionBuilder(collection)
     dataset_collectors = [dataset_collector(collection_description)]
     output_name = 'output'
     filenames = job_context.find_files(output_name, collection, dataset_collectors)
     assert len(filenames) == 10
     spy = mocker.spy(sa_session, 'flush')
+    metadata_threads = []
+    set_dataset_metadata = job_context.set_dataset_metadata
+
+    def record_metadata_thread(*args, **kwds):
+        metadata_threads.append(threading.current_thread())
+        return set_dataset_metadata(*args, **kwds)
+
+    job_context.set_dataset_metadata = record_metadata_thread
     job_context.populate_collection_elements(
         collection,
         collection_builder,
@@ -84,3 +103,49 @@ def test_job_context_discover_outputs_flushes_once(mocker):
     assert spy.call_count == 1
     assert len(collection.dataset_instances) == 10
     assert collection.dataset_instances[0].dataset.file_size == 1
+
+
+def test_job_context_discover_outputs_in_batches(mocker):
+    app = _mock_app()
+    app.config.discovered_outputs_workers = 3
+    sa_session = app.model.context
+
+    job_context = _setup_job_context(app)
+    job_context.discovered_elements_batch_size = 4
+    collection_description = FilePatternDatasetCollectionDescription(pattern="__name__")
+    collection = model.DatasetCollection(collection_type='list', populated=False)
+    sa_session.add(collection)
+    collection_builder = builder.BoundCollectionBuilder(collection)
+    dataset_collectors = [dataset_collector(collection_description)]
+    output_name = 'output'
+    filenames = job_context.find_files(output_name, collection, dataset_collectors)
+    spy = mocker.spy(sa_session, 'flush')
+    metadata_threads = []
+    set_dataset_metadata = job_context.set_dataset_metadata
+
+    def record_metadata_thread(*args, **kwds):
+        metadata_threads.append(threading.current_thread())
+        return set_dataset_metadata(*args, **kwds)
+
+    job_context.set_dataset_metadata = record_metadata_thread
+    job_context.populate_collection_elements(
+        collection,
+        collection_builder,
+        filenames,
+        name=output_name,
+        metadata_source_name='',
+        final_job_state=job_context.final_job_state,
+    )
+    collection_builder.populate()
+    # a flush for each batch of 4 elements
+    assert spy.call_count == 3
+    # only files are copied by worker threads, metadata is set by the thread owning the session
+    assert metadata_threads == [threading.current_thread()] * 10
+    sa_session.flush()
+    hdas = collection.dataset_instances
+    assert [hda.name for hda in hdas] == [f"datasets_{i}.txt" for i in range(10)]
+    assert [hda.hid for hda in hdas] == list(range(hdas[0].hid, hdas[0].hid + 10))
+    assert job_context.permission_provider.datasets_with_default_permissions == hdas
+    for hda in hdas:
+        assert hda.dataset.file_size == 1
+        assert len(hda.creating_job_associations) == 1
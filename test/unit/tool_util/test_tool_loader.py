@@ -329,3 +329,39 @@ def test_loader():
         assert input_els[0].find("cow").text == "hello"
         assert input_els[1].find("cow").text == "world"
         assert input_els[2].find("cow").text == "the_default"
+
+    # Test macros shared by tools are expanded with the tokens of every tool
+    # and changes to macro files are picked up.
+    with TestToolDirectory() as tool_dir:
+        tool_dir.write('''
+<macros>
+    <xml name="inputs">
+        <inputs><param name="input" label="@LABEL@ @VERSION@" /></inputs>
+    </xml>
+    <token name="@VERSION@">1.0</token>
+</macros>
+''', name="external.xml")
+        for label in ["first", "second"]:
+            tool_dir.write(f'''
+<tool version="@VERSION@">
+    <macros>
+        <import>external.xml</import>
+        <token name="@LABEL@">{label}</token>
+    </macros>
+    <expand macro="inputs" />
+</tool>
+''', name=f"{label}.xml")
+        for _ in range(2):
+            assert tool_dir.load("first.xml").find("inputs/param").get("label") == "first 1.0"
+            assert tool_dir.load("second.xml").find("inputs/param").get("label") == "second 1.0"
+        tool_dir.write('''
+<macros>
+    <xml name="inputs">
+        <inputs><param name="input" label="@LABEL@ (@VERSION@)" /></inputs>
+    </xml>
+    <token name="@VERSION@">1.1</token>
+</macros>
+''', name="external.xml")
+        xml = tool_dir.load("first.xml")
+        assert xml.getroot().get("version") == "1.1"
+        assert xml.find("inputs/param").get("label") == "first (1.1)"
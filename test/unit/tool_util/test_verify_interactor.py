@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from galaxy.tool_util.verify import interactor
+from galaxy.util.bunch import Bunch
+
+
+class MockResponse:
+
+    def __init__(self, json_obj, status_code=200):
+        self._json = json_obj
+        self.status_code = status_code
+
+    def json(self):
+        return self._json
+
+
+class MockGalaxyInteractor(interactor.GalaxyInteractorApi):
+
+    def __init__(self, **kwds):
+        super().__init__(galaxy_url="http://localhost:8080", master_api_key=None, api_key="key", keep_outputs_dir=None, **kwds)
+        self.submitted = []
+        self.job_states = {}
+        self._lock = threading.Lock()
+
+    def test_data_download(self, tool_id, filename, mode='file'):
+        return ("contents of %s" % filename).encode()
+
+    def _post(self, path, data=None, files=None, key=None, admin=False, anon=False, json=False):
+        assert path == "tools"
+        with self._lock:
+            self.submitted.append(data)
+            dataset_id = "dataset%d" % len(self.submitted)
+            job_id = "job%d" % len(self.submitted)
+        self.job_states[job_id] = ["queued", "running", "ok"]
+        return MockResponse({"outputs": [{"id": dataset_id}], "jobs": [{"id": job_id}]})
+
+    def _get(self, path, data=None, key=None, admin=False, anon=False):
+        job_states = self.job_states[path.split("/")[-1]]
+        state = job_states.pop(0) if len(job_states) > 1 else job_states[0]
+        return MockResponse({"state": state})
+
+
+def _test_data(fname, ftype="txt"):
+    return {"fname": fname, "ftype": ftype, "dbkey": "?", "metadata": {}, "composite_data": []}
+
+
+def test_upload_cache_reuses_datasets_across_tests():
+    galaxy_interactor = MockGalaxyInteractor(cache_uploads=True)
+
+    def stage(test_data):
+        wait = galaxy_interactor.stage_data_async(test_data, "history", "cat1")
+        wait()
+        return dict(galaxy_interactor.uploads)
+
+    test_datas = [_test_data("1.bed"), _test_data("1.bed"), _test_data("1.bed", ftype="bed"), _test_data("2.bed")]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        uploads = list(executor.map(stage, test_datas))
+    # The same data with the same upload parameters is uploaded once
+    assert len(galaxy_interactor.submitted) == 3
+    assert uploads[0]["1.bed"] == uploads[1]["1.bed"]
+    assert uploads[0]["1.bed"] != uploads[2]["1.bed"]
+    assert "1.bed" not in uploads[3]
+
+
+def test_uploads_not_cached_by_default():
+    galaxy_interactor = MockGalaxyInteractor()
+    for _ in range(2):
+        galaxy_interactor.stage_data_async(_test_data("1.bed"), "history", "cat1")()
+    assert len(galaxy_interactor.submitted) == 2
+    assert galaxy_interactor.uploads["1.bed"] == {"src": "hda", "id": "dataset2"}
+
+
+def test_test_timings():
+    galaxy_interactor = Bunch(job_state_times=lambda job_id: {"running": 13, "finished": 17})
+    timings = interactor._test_timings(galaxy_interactor, [{"id": "job1"}], 10, 12, 20)
+    assert timings == {"upload": 2, "queue": 1, "run": 4, "verify": 3}
+    # The test failed before the tool ran
+    assert interactor._test_timings(galaxy_interactor, None, 10, None, 12) == {"upload": 2}
+
+
+def test_job_state_times_recorded_while_waiting(monkeypatch):
+    galaxy_interactor = MockGalaxyInteractor()
+    galaxy_interactor.stage_data_async(_test_data("1.bed"), "history", "cat1")
+    clock = iter(range(100))
+    monkeypatch.setattr(interactor.time, "time", lambda: next(clock))
+    monkeypatch.setattr(interactor.time, "sleep", lambda delta: None)
+    galaxy_interactor.wait_for_job("job1")
+    assert galaxy_interactor.job_state_times("job1") == {"running": 1, "finished": 2}
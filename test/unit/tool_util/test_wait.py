@@ -89,3 +89,11 @@ def test_timeout_backoff():
     assert sleeper.sleeps[1] == 3  # delta of 2 + 1 backoff
     assert sleeper.sleeps[2] == 4  # delta of 2 + 2 backoff
     assert exception_called
+
+
+def test_backoff_max_delta():
+    condition = WaitCondition(after_call_count=4, return_value="fifth")
+    sleeper = Sleeper()
+
+    assert "fifth" == wait_on(condition, "condition", 100, delta=1, polling_backoff=1, max_delta=2.5, sleep_=sleeper.sleep)
+    assert sleeper.sleeps == [1, 2, 2.5, 2.5]
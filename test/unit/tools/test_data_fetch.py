@@ -0,0 +1,93 @@
+import os
+from urllib.error import (
+    HTTPError,
+    URLError,
+)
+
+import pytest
+
+from galaxy.datatypes.registry import Registry
+from galaxy.tools import data_fetch
+
+GALAXY_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir))
+DATATYPES_CONF = os.path.join(GALAXY_ROOT, 'lib', 'galaxy', 'config', 'sample', 'datatypes_conf.xml.sample')
+
+
+@pytest.fixture(scope="module")
+def registry():
+    registry = Registry()
+    registry.load_datatypes(root_dir=GALAXY_ROOT, config=DATATYPES_CONF)
+    return registry
+
+
+def _request(elements, **kwd):
+    request = {"targets": [{"destination": {"type": "hdca"}, "collection_type": "list:list", "elements": elements}]}
+    request.update(kwd)
+    return request
+
+
+def _pasted(i):
+    return {"src": "pasted", "paste_content": f"line {i}\n", "name": f"pasted_{i}", "ext": "txt"}
+
+
+@pytest.mark.parametrize("fetch_concurrency", [1, 4])
+def test_fetch_concurrently_keeps_element_order(registry, tmp_path, monkeypatch, fetch_concurrency):
+    monkeypatch.chdir(tmp_path)
+    elements = [
+        {"name": "outer", "elements": [_pasted(i) for i in range(10)]},
+        {"name": "empty", "elements": []},
+        {"name": "last", "elements": [_pasted(10)]},
+    ]
+    request = _request(elements, fetch_concurrency=fetch_concurrency)
+    galaxy_json = data_fetch._request_to_galaxy_json(data_fetch.UploadConfig(request, registry), request)
+    fetched_target = galaxy_json["__unnamed_outputs"][0]
+    outer, empty, last = fetched_target["elements"]
+    assert [element["name"] for element in outer["elements"]] == [f"pasted_{i}" for i in range(10)]
+    assert empty["elements"] == []
+    assert last["elements"][0]["name"] == "pasted_10"
+    for i, element in enumerate(outer["elements"]):
+        with open(element["filename"]) as f:
+            assert f.read() == f"line {i}\n"
+    # Every element is staged to a distinct path in the working directory
+    filenames = [element["filename"] for element in outer["elements"] + last["elements"]]
+    assert len(set(filenames)) == 11
+
+
+def test_fetch_url_retries(registry, tmp_path, monkeypatch):
+    upload_config = data_fetch.UploadConfig({"fetch_retries": 2, "fetch_timeout": 5}, registry)
+    upload_config.fetch_retry_delay = 0
+    attempts = []
+
+    def stream_url_to_file(url, file_sources=None, timeout=None):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise URLError("connection refused")
+        return "downloaded"
+
+    monkeypatch.setattr(data_fetch, "get_file_sources", lambda: None)
+    monkeypatch.setattr(data_fetch.sniff, "stream_url_to_file", stream_url_to_file)
+    assert data_fetch._fetch_url(upload_config, "http://example.org/1.txt") == "downloaded"
+    assert attempts == [5, 5, 5]
+
+    # Gives up after the configured number of retries
+    attempts.clear()
+    upload_config.fetch_retries = 1
+    with pytest.raises(URLError):
+        data_fetch._fetch_url(upload_config, "http://example.org/1.txt")
+    assert len(attempts) == 2
+
+
+def test_fetch_url_does_not_retry_client_errors(registry, monkeypatch):
+    upload_config = data_fetch.UploadConfig({"fetch_retries": 2}, registry)
+    upload_config.fetch_retry_delay = 0
+    attempts = []
+
+    def stream_url_to_file(url, file_sources=None, timeout=None):
+        attempts.append(url)
+        raise HTTPError(url, 404, "Not Found", None, None)
+
+    monkeypatch.setattr(data_fetch, "get_file_sources", lambda: None)
+    monkeypatch.setattr(data_fetch.sniff, "stream_url_to_file", stream_url_to_file)
+    with pytest.raises(HTTPError):
+        data_fetch._fetch_url(upload_config, "http://example.org/missing.txt")
+    assert len(attempts) == 1
@@ -1,4 +1,5 @@
 from galaxy import model
+from galaxy.tools.parameters import dataset_matcher
 from .util import BaseParameterTestCase
 from ..unittest_utils import galaxy_mock
 
@@ -136,6 +137,32 @@ class DataToolParameterTestCase(BaseParameterTestCase):
         self.stub_active_datasets(hda1)
         assert hda1 == self.param.get_initial_value(self.trans, {}), hda1
 
+    def test_history_datasets_queried_by_extension_and_state(self):
+        self._new_history_hda('txt', hid=1)
+        self._new_history_hda('tabular', hid=2)
+        self._new_history_hda('bam', hid=3)
+        self._new_history_hda('txt', hid=4, state=model.Dataset.states.ERROR)
+        self._new_history_hda('txt', hid=5, visible=False)
+        self._new_history_hda('txt', hid=6, deleted=True)
+        field = self._simple_field()
+        assert [option['hid'] for option in field['options']['hda']] == [2, 1]
+        assert self.param.get_initial_value(self.trans, {}).hid == 2
+        # Datasets are only loaded for the matching extensions
+        dataset_matcher_factory = dataset_matcher.DatasetMatcherFactory(self.trans)
+        assert [hda.hid for hda in dataset_matcher_factory.history_datasets(self.test_history, self.param)] == [1, 2]
+        history_dataset_index = dataset_matcher_factory._history_dataset_indexes[self.test_history.id]
+        assert sorted(history_dataset_index.extensions) == ['bam', 'tabular', 'txt']
+        assert sorted(history_dataset_index._datasets_by_extension) == ['tabular', 'txt']
+
+    def _new_history_hda(self, extension, hid, state=model.Dataset.states.OK, visible=True, deleted=False):
+        hda = model.HistoryDatasetAssociation(extension=extension, visible=visible, history=self.test_history)
+        hda.hid = hid
+        hda.deleted = deleted
+        hda.dataset = model.Dataset(state=state)
+        self.app.model.context.add(hda)
+        self.app.model.context.flush()
+        return hda
+
     def _new_hda(self):
         hda = model.HistoryDatasetAssociation()
         hda.visible = True
@@ -5,6 +5,7 @@ import unittest
 from galaxy import model
 from galaxy.job_execution.datasets import DatasetPath
 from galaxy.metadata import get_metadata_compute_strategy
+from galaxy.model import store
 from galaxy.objectstore import ObjectStorePopulator
 from galaxy.util import safe_makedirs
 from .. import tools_support
@@ -66,6 +67,59 @@ class MetadataTestCase(unittest.TestCase, tools_support.UsesApp, tools_support.U
         assert output_dataset.metadata.data_lines == 2
         assert output_dataset.metadata.sequences == 1
 
+    def test_deferred_peek_extended(self):
+        self.app.config.metadata_strategy = "extended"
+        source_file_name = os.path.join(os.getcwd(), "test/functional/tools/for_workflows/cat.xml")
+        self._init_tool_for_path(source_file_name)
+        output_dataset = self._create_output_dataset(
+            extension="fasta",
+        )
+        sa_session = self.app.model.session
+        sa_session.flush()
+        output_datasets = {
+            "out_file1": output_dataset,
+        }
+        command = self.metadata_command(output_datasets, defer_peeks=True)
+        self._write_output_dataset_contents(output_dataset, ">seq1\nGCTGCATG\n")
+        # Legacy tools fail if they write to stderr, failed outputs aren't peeked.
+        self._write_job_files(stderr="")
+        self.exec_metadata_command(command)
+        metadata_set_successfully = self.metadata_compute_strategy.external_metadata_set_successfully(output_dataset, "out_file1", sa_session, working_directory=self.job_working_directory)
+        assert metadata_set_successfully
+        # Import the outputs like the job handler does when the job finishes
+        import_options = store.ImportOptions(allow_dataset_object_edit=True, allow_edit=True)
+        import_model_store = store.get_import_model_store_for_directory(os.path.join(self.job_working_directory, "metadata", "outputs_populated"), app=self.app, import_options=import_options)
+        import_model_store.perform_import(history=self.history)
+        sa_session.refresh(output_dataset)
+        assert output_dataset.metadata.sequences == 1
+        assert output_dataset.peek_deferred
+        assert output_dataset.peek is None
+        assert output_dataset.ensure_peek()
+        assert not output_dataset.peek_deferred
+        assert "GCTGCATG" in output_dataset.peek
+
+    def test_multiple_outputs_directory_parallel(self):
+        self.app.config.metadata_strategy = "directory"
+        source_file_name = os.path.join(os.getcwd(), "test/functional/tools/for_workflows/cat.xml")
+        self._init_tool_for_path(source_file_name)
+        output_datasets = {}
+        for i in range(4):
+            output_dataset = self._create_output_dataset(
+                extension="fasta",
+            )
+            self._write_output_dataset_contents(output_dataset, ">seq1\nGCTGCATG\n" * (i + 1))
+            output_datasets["out_file%d" % i] = output_dataset
+        sa_session = self.app.model.session
+        sa_session.flush()
+        command = self.metadata_command(output_datasets, parallelize=True)
+        self._write_job_files()
+        self.exec_metadata_command(command, env={"GALAXY_SLOTS": "2"})
+        for i, (name, output_dataset) in enumerate(output_datasets.items()):
+            metadata_set_successfully = self.metadata_compute_strategy.external_metadata_set_successfully(output_dataset, name, sa_session, working_directory=self.job_working_directory)
+            assert metadata_set_successfully
+            self.metadata_compute_strategy.load_metadata(output_dataset, name, sa_session, working_directory=self.job_working_directory)
+            assert output_dataset.metadata.sequences == i + 1
+
     def test_primary_dataset_output_extension_legacy(self):
         self.app.config.metadata_strategy = "legacy"
         self._test_primary_dataset_output_extension()
@@ -191,7 +245,7 @@ class MetadataTestCase(unittest.TestCase, tools_support.UsesApp, tools_support.U
         with open(os.path.join(self.job_working_directory, "tool_stderr"), "wb") as f:
             f.write(stderr.encode("utf-8"))
 
-    def metadata_command(self, output_datasets, output_collections=None):
+    def metadata_command(self, output_datasets, output_collections=None, parallelize=False, defer_peeks=False):
         output_collections = output_collections or {}
         metadata_compute_strategy = get_metadata_compute_strategy(self.app.config, self.job.id)
         self.metadata_compute_strategy = metadata_compute_strategy
@@ -219,12 +273,15 @@ class MetadataTestCase(unittest.TestCase, tools_support.UsesApp, tools_support.U
                                                                     tool=self.tool,
                                                                     job=self.job,
                                                                     object_store_conf=self.app.object_store.to_dict(),
-                                                                    max_metadata_value_size=10000)
+                                                                    max_metadata_value_size=10000,
+                                                                    parallelize=parallelize,
+                                                                    defer_peeks=defer_peeks)
         return command
 
-    def exec_metadata_command(self, command):
+    def exec_metadata_command(self, command, env=None):
         with open(self.stdout_path, "wb") as stdout_file, open(self.stderr_path, "wb") as stderr_file:
             _environ = os.environ.copy()
+            _environ.update(env or {})
             _environ["PYTHONPATH"] = os.path.abspath("lib")
             proc = subprocess.Popen(args=command,
                                     shell=True,
@@ -1,5 +1,6 @@
 from galaxy import model
 from galaxy.tools.parameters import basic
+from galaxy.tools.parameters.dynamic_options import DynamicOptionsCache
 from galaxy.util import bunch
 from .util import BaseParameterTestCase
 
@@ -56,6 +57,27 @@ class SelectToolParameterTestCase(BaseParameterTestCase):
         assert ("testname2", "testpath2", False) in self.param.get_options(self.trans, {"input_bam": "testpath2"})
         assert len(self.param.get_options(self.trans, {"input_bam": "testpath3"})) == 0
 
+    def test_cached_options(self):
+        cache = self.app.dynamic_options_cache = DynamicOptionsCache()
+        table = self.app.tool_data_tables["test_table"]
+        self.options_xml = '''<options from_data_table="test_table"><filter type="param_value" ref="input_bam" column="0" /></options>'''
+        assert self.param.get_options(self.trans, {"input_bam": "testname1"}) == [("testname1", "testpath1", False)]
+        assert self.param.get_options(self.trans, {"input_bam": "testname1"}) == [("testname1", "testpath1", False)]
+        assert self.param.get_options(self.trans, {"input_bam": "testname2"}) == [("testname2", "testpath2", False)]
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 2
+        # Adding entries changes the version of the table
+        table.fields.append(["testname1", "testpath3"])
+        table._loaded_content_version += 1
+        assert len(self.param.get_options(self.trans, {"input_bam": "testname1"})) == 2
+        # Reloading the table invalidates the options
+        table.fields.pop()
+        cache.invalidate_data_tables(["test_table"])
+        assert len(self.param.get_options(self.trans, {"input_bam": "testname1"})) == 1
+        # Options aren't shared with the callers
+        self.param.options.get_fields(self.trans, {"input_bam": "testname1"}).pop()
+        assert len(self.param.get_options(self.trans, {"input_bam": "testname1"})) == 1
+
     # TODO: Good deal of overlap here with DataToolParameterTestCase,
     # refactor.
     def setUp(self):
@@ -106,6 +128,8 @@ class MockToolDataTable:
             value=1,
         )
         self.missing_index_file = None
+        self.fields = [["testname1", "testpath1"], ["testname2", "testpath2"]]
+        self._loaded_content_version = 1
 
     def get_fields(self):
-        return [["testname1", "testpath1"], ["testname2", "testpath2"]]
+        return self.fields
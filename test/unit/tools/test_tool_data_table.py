@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+from galaxy.tools.data import (
+    TabularToolDataTable,
+    ToolDataPathFiles,
+)
+from galaxy.util import parse_xml_string
+
+TABLE_XML = """<table name="all_fasta" comment_char="#" allow_duplicate_entries="%s">
+    <columns>value, dbkey, name, path</columns>
+    <file path="%s" />
+</table>"""
+LOC_CONTENTS = """#value	dbkey	name	path
+hg19	hg19	Human (hg19)	${__HERE__}/hg19.fa
+mm10	mm10	Mouse (mm10)	/data/mm10.fa
+hg19_alt	hg19	Human (hg19, alt)	/data/hg19_alt.fa
+mm10	mm10	Mouse (mm10)	/data/mm10.fa
+invalid line
+"""
+
+
+def load_table(allow_duplicate_entries=True):
+    tool_data_path = tempfile.mkdtemp()
+    loc_path = os.path.join(tool_data_path, 'all_fasta.loc')
+    with open(loc_path, 'w') as f:
+        f.write(LOC_CONTENTS)
+    config_element = parse_xml_string(TABLE_XML % (allow_duplicate_entries, loc_path))
+    return TabularToolDataTable(config_element, tool_data_path, tool_data_path_files=ToolDataPathFiles(tool_data_path))
+
+
+def test_tabular_tool_data_table_lookups():
+    table = load_table()
+    assert len(table.get_fields()) == 4
+    assert table.get_fields()[0][3] == os.path.join(table.tool_data_path, 'hg19.fa')
+    assert table.get_entry('value', 'mm10', 'path') == '/data/mm10.fa'
+    assert table.get_entries('dbkey', 'hg19', 'value') == ['hg19', 'hg19_alt']
+    assert table.get_entries('dbkey', 'hg19', None, limit=1) == [
+        {'value': 'hg19', 'dbkey': 'hg19', 'name': 'Human (hg19)', 'path': os.path.join(table.tool_data_path, 'hg19.fa')}]
+    assert table.get_entry('dbkey', 'hg38', 'value') is None
+    assert table.get_entry('unknown_column', 'hg19', 'value') is None
+    assert table.get_field('hg19_alt').get_base_path() == '/data/hg19_alt.fa'
+    assert table.get_field('hg38') is None
+
+    # Indexes are updated when entries are added ...
+    table.add_entry({'value': 'hg38', 'dbkey': 'hg38', 'name': 'Human (hg38)', 'path': '/data/hg38.fa'})
+    assert table.get_entry('dbkey', 'hg38', 'value') == 'hg38'
+    assert table.get_field('hg38').get_base_path() == '/data/hg38.fa'
+    # ... and rebuilt when the table is reloaded
+    table.reload_from_files()
+    assert table.get_entry('dbkey', 'hg38', 'value') is None
+    assert table.get_entries('dbkey', 'hg19', 'value') == ['hg19', 'hg19_alt']
+
+
+def test_tabular_tool_data_table_duplicates():
+    table = load_table(allow_duplicate_entries=False)
+    assert table.get_entries('value', 'mm10', 'path') == ['/data/mm10.fa']
+    table.add_entry(['mm10', 'mm10', 'Mouse (mm10)', '/data/mm10.fa'], allow_duplicates=False)
+    table.add_entry(['rn6', 'rn6', 'Rat (rn6)', '/data/rn6.fa'], allow_duplicates=False)
+    assert [fields[0] for fields in table.get_fields()] == ['hg19', 'mm10', 'hg19_alt', 'rn6']
@@ -12,8 +12,16 @@ from galaxy import model
 from galaxy.config_watchers import ConfigWatchers
 from galaxy.model import tool_shed_install
 from galaxy.model.tool_shed_install import mapping
-from galaxy.tools import ToolBox
-from galaxy.tools.cache import ToolCache
+from galaxy.tools import (
+    ToolBox,
+    ToolStub,
+)
+from galaxy.tools.cache import (
+    ToolCache,
+    ToolSourceSnapshot,
+)
+from galaxy.tools.toolbox.changes import ToolConfChangeSet
+from galaxy.tools.toolbox.panel import panel_item_types
 from .test_toolbox_filters import mock_trans
 from ..tools_support import UsesApp, UsesTools
 from ..unittest_utils.sample_data import SIMPLE_MACRO, SIMPLE_TOOL_WITH_MACRO
@@ -347,6 +355,219 @@ class ToolBoxTestCase(BaseToolBoxTestCase):
         assert toolbox.get_tool("test_tool") is not None
         assert toolbox.get_tool("not_a_test_tool") is None
 
+    def test_parallel_tool_loading(self):
+        self._init_tool(filename="tool_with_macro.xml",
+                        tool_contents=SIMPLE_TOOL_WITH_MACRO,
+                        extra_file_contents=SIMPLE_MACRO.substitute(tool_version="2.0"),
+                        extra_file_path="external.xml")
+        for i in range(6):
+            self._init_tool(filename="tool_%d.xml" % i, tool_id="test_tool_%d" % i)
+        self._add_config("""<toolbox>
+    <tool file="tool_5.xml" />
+    <section id="s1" name="Section 1">
+        <tool file="tool_3.xml" />
+        <tool file="tool_with_macro.xml" />
+        <tool file="tool_0.xml" />
+    </section>
+    <tool file="tool_4.xml" />
+    <tool file="missing.xml" />
+    <section id="s2" name="Section 2">
+        <tool file="tool_1.xml" />
+        <tool file="tool_2.xml" />
+    </section>
+</toolbox>""")
+        serial_panel = self.__panel_tool_ids(self.toolbox)
+        for executor in ("thread", "process"):
+            self.app.config.tool_loading_workers = 4
+            self.app.config.tool_loading_executor = executor
+            self.app.tool_cache = ToolCache()
+            self._toolbox = None
+            toolbox = self.toolbox
+            assert self.__panel_tool_ids(toolbox) == serial_panel
+            assert toolbox._preloaded_tools == {}
+            assert toolbox._preloaded_tool_sources == {}
+            assert len(toolbox.get_tool("tool_with_macro")._macro_paths) == 1
+        cache = toolbox.get_cache_region(self.app.config.tool_cache_data_dir)
+        assert cache.get(os.path.join(self.test_directory, "tool_3.xml")) is not None
+
+    def test_tool_source_snapshot(self):
+        self._init_tool(filename="tool_with_macro.xml",
+                        tool_contents=SIMPLE_TOOL_WITH_MACRO,
+                        extra_file_contents=SIMPLE_MACRO.substitute(tool_version="2.0"),
+                        extra_file_path="external.xml")
+        self._add_config("""<toolbox><tool file="tool_with_macro.xml"/></toolbox>""")
+        tool = self.toolbox.get_tool("tool_with_macro")
+        assert not isinstance(tool.tool_source, ToolSourceSnapshot)
+        self.toolbox.persist_cache()
+
+        # A new toolbox is created from the snapshot, without parsing the tool XML
+        self.app.tool_cache = ToolCache()
+        self._toolbox = None
+        cached_tool = self.toolbox.get_tool("tool_with_macro")
+        tool_source = cached_tool.tool_source
+        assert isinstance(tool_source, ToolSourceSnapshot)
+        assert not tool_source.is_parsed
+        for attribute in ("id", "name", "version", "profile", "command", "requirements", "_macro_paths"):
+            assert getattr(cached_tool, attribute) == getattr(tool, attribute), attribute
+        for attribute in ("stdio_exit_codes", "stdio_regexes"):
+            assert [e.to_dict() for e in getattr(cached_tool, attribute)] == [e.to_dict() for e in getattr(tool, attribute)], attribute
+        cached_tool.assert_finalized()
+        assert tool_source.is_parsed
+        assert list(cached_tool.inputs.keys()) == list(tool.inputs.keys())
+
+        # Snapshots are plain data recorded for the running Galaxy version, anything else is a cache miss
+        config_file = os.path.join(self.test_directory, "tool_with_macro.xml")
+        cache = self.toolbox.get_cache_region(self.app.config.tool_cache_data_dir)
+        tool_document = cache.get(config_file)
+        assert json.loads(json.dumps(tool_document)) == tool_document
+        (version, snapshot), = tool_document["snapshots"].items()
+        assert cache.get_snapshot({**tool_document, "snapshots": {"0.1": snapshot}}, None) is None
+        assert cache.get_snapshot({**tool_document, "snapshots": {version: "gAR9lC4="}}, None) is None
+
+        # Modifying a macro invalidates the cached document and its snapshot
+        macro_path = os.path.join(self.test_directory, "external.xml")
+        os.utime(macro_path, (time.time(), os.path.getmtime(macro_path) + 10))
+        cache = self.toolbox.get_cache_region(self.app.config.tool_cache_data_dir)
+        assert cache.get(os.path.join(self.test_directory, "tool_with_macro.xml"), modtimes={}) is None
+
+    def test_lazy_tool_loading(self):
+        self._init_tool(filename="tool_with_macro.xml",
+                        tool_contents=SIMPLE_TOOL_WITH_MACRO,
+                        extra_file_contents=SIMPLE_MACRO.substitute(tool_version="2.0"),
+                        extra_file_path="external.xml")
+        self._add_config("""<toolbox><section id="t" name="T"><tool file="tool_with_macro.xml"/></section></toolbox>""")
+        self.app.config.lazy_tool_loading = True
+        # Tools that aren't cached yet are loaded right away
+        assert not getattr(self.toolbox._tools_by_id["tool_with_macro"], "is_stub", False)
+        panel = self.__panel_tool_ids(self.toolbox)
+        self.toolbox.persist_cache()
+
+        self.app.tool_cache = ToolCache()
+        self._toolbox = None
+        stub = self.toolbox._tools_by_id["tool_with_macro"]
+        assert isinstance(stub, ToolStub)
+        assert stub._tool is None
+        assert self.__panel_tool_ids(self.toolbox) == panel
+        assert self.toolbox.has_tool("tool_with_macro")
+        assert stub._tool is None
+        assert stub.version == "2.0"
+        assert stub.tool_versions == ["2.0"]
+
+        # The tool is created on first access and keeps values assigned to the stub
+        stub.labels = ["new"]
+        tool = self.toolbox.get_tool("tool_with_macro")
+        assert not isinstance(tool, ToolStub)
+        assert tool is stub._tool
+        assert tool.labels == ["new"]
+        assert tool.lineage is stub.lineage
+        assert stub.inputs is tool.inputs
+        assert self.toolbox.get_tool("tool_with_macro", get_all_versions=True) == [tool]
+
+    def test_incremental_reload(self):
+        for i in range(5):
+            self._init_tool(filename="tool_%d.xml" % i, tool_id="test_tool_%d" % i)
+        self._add_config("""<toolbox>
+    <tool file="tool_0.xml" />
+    <section id="s1" name="Section 1">
+        <tool file="tool_1.xml" />
+    </section>
+    <section id="s2" name="Section 2">
+        <tool file="tool_2.xml" />
+    </section>
+</toolbox>""")
+        toolbox = self.toolbox
+        self.app.watchers.tool_config_watcher.reload_callback = lambda: None
+        with open(self._tool_conf_path(), "w") as f:
+            f.write("""<toolbox>
+    <section id="s1" name="Section 1">
+        <tool file="tool_1.xml" />
+        <tool file="tool_3.xml" />
+    </section>
+    <section id="s3" name="Section 3">
+        <tool file="tool_4.xml" />
+    </section>
+</toolbox>""")
+        change_set = toolbox.tool_conf_change_set(self.config_files)
+        assert not change_set.requires_full_reload, change_set.full_reload_reason
+        # Change sets are sent to other processes as JSON
+        change_set = ToolConfChangeSet.from_dict(json.loads(json.dumps(change_set.to_dict())))
+        assert toolbox.apply_change_set(change_set)
+        panel = self.__panel_tool_ids(toolbox)
+        assert panel == [("s1", ["test_tool_1", "test_tool_3"]), ("s3", ["test_tool_4"])]
+        assert not toolbox.has_tool("test_tool_0")
+        assert not toolbox.has_tool("test_tool_2")
+        assert not toolbox.tool_conf_change_set(self.config_files)
+        # A rebuilt toolbox has the same tool panel
+        self.app.tool_cache = ToolCache()
+        self._toolbox = None
+        assert self.__panel_tool_ids(self.toolbox) == panel
+
+        # Other changes to the panel structure require rebuilding the toolbox
+        toolbox = self.toolbox
+        self.app.watchers.tool_config_watcher.reload_callback = lambda: None
+        with open(self._tool_conf_path(), "w") as f:
+            f.write("""<toolbox>
+    <label id="l1" text="Label 1" />
+    <section id="s1" name="Section 1">
+        <tool file="tool_1.xml" />
+    </section>
+</toolbox>""")
+        change_set = toolbox.tool_conf_change_set(self.config_files)
+        assert change_set.requires_full_reload
+        assert not toolbox.apply_change_set(change_set)
+        assert toolbox.has_tool("test_tool_3")
+
+    def test_incremental_reload_of_broken_tools(self):
+        for i in range(3):
+            self._init_tool(filename="tool_%d.xml" % i, tool_id="test_tool_%d" % i)
+        with open(self._tool_path("broken.xml"), "w") as f:
+            f.write("<tool id=\"broken\"")
+        self._add_config("""<toolbox>
+    <section id="s1" name="Section 1">
+        <tool file="tool_0.xml" />
+        <tool file="tool_1.xml" />
+    </section>
+</toolbox>""")
+        toolbox = self.toolbox
+        self.app.watchers.tool_config_watcher.reload_callback = lambda: None
+        with open(self._tool_conf_path(), "w") as f:
+            f.write("""<toolbox>
+    <section id="s1" name="Section 1">
+        <tool file="tool_1.xml" />
+        <tool file="broken.xml" />
+        <tool file="tool_2.xml" />
+    </section>
+</toolbox>""")
+        # Tools that can't be parsed are skipped, like when the toolbox is rebuilt
+        change_set = toolbox.tool_conf_change_set(self.config_files)
+        assert toolbox.apply_change_set(change_set)
+        assert self.__panel_tool_ids(toolbox) == [("s1", ["test_tool_1", "test_tool_2"])]
+
+        # The toolbox has to be rebuilt if loading added tools fails
+        with open(self._tool_conf_path(), "w") as f:
+            f.write("""<toolbox>
+    <section id="s1" name="Section 1">
+        <tool file="tool_0.xml" />
+        <tool file="broken.xml" />
+    </section>
+</toolbox>""")
+        change_set = toolbox.tool_conf_change_set(self.config_files)
+
+        def load_added_tool(state, key, entry):
+            raise Exception("Failed to load tool")
+
+        toolbox._load_added_tool = load_added_tool
+        assert not toolbox.apply_change_set(change_set)
+
+    def __panel_tool_ids(self, toolbox):
+        panel = []
+        for key, item_type, item in toolbox._tool_panel.panel_items_iter():
+            if item_type == panel_item_types.SECTION:
+                panel.append((key, [tool.id for tool in item.elems.values()]))
+            else:
+                panel.append(item.id)
+        return panel
+
     def test_writes_integrate_tool_panel(self):
         self._init_tool()
         self._add_config("""<toolbox><tool file="tool.xml" /></toolbox>""")
@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+
+from galaxy.tools.search import ToolBoxSearch
+from galaxy.tools.search.memory import InMemoryToolBoxSearch
+from galaxy.util.bunch import Bunch
+
+SEARCH_KWDS = dict(tool_name_boost=9, tool_id_boost=9, tool_section_boost=3, tool_description_boost=2,
+                   tool_label_boost=1, tool_stub_boost=5, tool_help_boost=0.5, tool_search_limit=20,
+                   tool_enable_ngram_search=False, tool_ngram_minsize=3, tool_ngram_maxsize=4)
+
+
+class MockToolCache:
+
+    def __init__(self, tools):
+        self.tools = {tool.id: tool for tool in tools}
+
+    @property
+    def _tool_paths_by_id(self):
+        return {tool_id: f"{tool_id}.xml" for tool_id in self.tools}
+
+    def get_tool_by_id(self, tool_id):
+        return self.tools.get(tool_id)
+
+
+def mock_tool(tool_id, name, description='', raw_help=None, hidden=False, edam_operations=None):
+    return Bunch(
+        id=tool_id,
+        name=name,
+        description=description,
+        raw_help=raw_help,
+        hidden=hidden,
+        guid=None,
+        labels=[],
+        tool_type='default',
+        lineage=None,
+        is_latest_version=True,
+        edam_operations=edam_operations or [],
+        edam_topics=[],
+        get_panel_section=lambda: ('filters', 'Filter and Sort'),
+    )
+
+
+def indexed_hashes(search):
+    with search.index.reader() as reader:
+        return {f['id']: f['content_hash'] for f in reader.all_stored_fields() if f}
+
+
+def test_incremental_index_updates():
+    index_dir = tempfile.mkdtemp()
+    try:
+        tools = [mock_tool('sort1', 'Sort', raw_help='sort a dataset'), mock_tool('cat1', 'Concatenate')]
+        tool_cache = MockToolCache(tools)
+        search = ToolBoxSearch(toolbox=None, index_dir=index_dir)
+        search.build_index(tool_cache)
+        hashes = indexed_hashes(search)
+        assert set(hashes) == {'sort1', 'cat1'}
+        assert search.search('concatenate', **SEARCH_KWDS) == ['cat1']
+        assert search.search('dataset', **SEARCH_KWDS) == ['sort1']
+
+        # Unchanged tools aren't written again, this is also the case for another
+        # process sharing the index directory.
+        generation = search.index.latest_generation()
+        ToolBoxSearch(toolbox=None, index_dir=index_dir).build_index(tool_cache)
+        search.build_index(tool_cache)
+        assert search.index.latest_generation() == generation
+
+        tool_cache.tools['cat1'] = mock_tool('cat1', 'Concatenate', description='tail-to-head')
+        del tool_cache.tools['sort1']
+        tool_cache.tools['sort2'] = mock_tool('sort2', 'Sort', hidden=True)
+        search.build_index(tool_cache)
+        new_hashes = indexed_hashes(search)
+        assert set(new_hashes) == {'cat1'}
+        assert new_hashes['cat1'] != hashes['cat1']
+        assert search.search('tail', **SEARCH_KWDS) == ['cat1']
+        assert search.search('dataset', **SEARCH_KWDS) == []
+    finally:
+        shutil.rmtree(index_dir)
+
+
+def test_in_memory_search():
+    tools = [
+        mock_tool('sort1', 'Sort', description='data in ascending or descending order', raw_help='sort a dataset'),
+        mock_tool('cat1', 'Concatenate', description='datasets tail-to-head'),
+        mock_tool('bowtie2', 'Bowtie2', description='map reads', edam_operations=['operation_3198']),
+    ]
+    tool_cache = MockToolCache(tools)
+    search = InMemoryToolBoxSearch(toolbox=None)
+    assert search.search('sort', **SEARCH_KWDS) == []
+    search.build_index(tool_cache)
+    assert search.search('concat', **SEARCH_KWDS) == ['cat1']
+    assert search.search('bowtie', **SEARCH_KWDS) == ['bowtie2']
+    assert search.search('operation_3198', **SEARCH_KWDS) == ['bowtie2']
+    # The name is boosted more than the help and description
+    assert search.search('datasets sort', **SEARCH_KWDS)[0] == 'sort1'
+    # Typos are tolerated using ngrams
+    assert search.search('concatanate', **dict(SEARCH_KWDS, tool_enable_ngram_search=True))[0] == 'cat1'
+
+    analyzed_sort = search._analyzed_documents['sort1']
+    tool_cache.tools['cat1'] = mock_tool('cat1', 'Concatenate', description='paste datasets')
+    search.build_index(tool_cache)
+    assert search._analyzed_documents['sort1'] is analyzed_sort
+    assert search.search('tail', **SEARCH_KWDS) == []
+    assert search.search('paste', **SEARCH_KWDS) == ['cat1']
@@ -0,0 +1,91 @@
+from galaxy.tools.actions import upload_common
+from galaxy.util.bunch import Bunch
+from ..unittest_utils import galaxy_mock
+
+
+class MockLibraryTrans(galaxy_mock.MockTrans):
+    user_is_admin = True
+
+    def get_current_user_roles(self):
+        return self.user.all_roles()
+
+
+def _setup_library(trans):
+    model = trans.app.model
+    security_agent = trans.app.security_agent
+    user = model.User(email="libraryupload@example.org", password="password")
+    trans.sa_session.add(user)
+    trans.sa_session.flush()
+    trans.set_user(user)
+    role = security_agent.create_private_user_role(user)
+    security_agent.user_set_default_permissions(user, history=False, dataset=True)
+    library = model.Library(name="Library")
+    library.root_folder = model.LibraryFolder(name="Library")
+    trans.sa_session.add(library)
+    trans.sa_session.flush()
+    security_agent.set_all_library_permissions(trans, library.root_folder, {
+        security_agent.permitted_actions.LIBRARY_ADD: [role],
+        security_agent.permitted_actions.LIBRARY_MODIFY: [role],
+        security_agent.permitted_actions.LIBRARY_ACCESS: [role],
+    })
+    library_bunch = Bunch(replace_dataset=None, message="imported", template=None, template_field_contents={},
+                          folder=library.root_folder, roles=[], tags=None)
+    return library_bunch
+
+
+def _uploaded_datasets(prefix):
+    uploaded_datasets = []
+    for i in range(3):
+        uploaded_dataset = Bunch(name=f"{prefix}_{i}.txt", path=f"/import/{prefix}_{i}.txt", file_type="txt", dbkey="hg19",
+                                 tags=None, link_data_only="link_to_files" if i == 2 else "copy_files")
+        if i == 1:
+            uploaded_dataset.in_folder = "sub/dir"
+        uploaded_datasets.append(uploaded_dataset)
+    return uploaded_datasets
+
+
+def _describe(trans, ldda):
+    security_agent = trans.app.security_agent
+    ld = ldda.library_dataset
+    folders = []
+    folder = ld.folder
+    while folder:
+        folders.append(folder.name)
+        folder = folder.parent
+    return dict(
+        folders=folders,
+        current=ld.library_dataset_dataset_association == ldda,
+        state=ldda.state,
+        message=ldda.message,
+        dbkey=ldda.dbkey,
+        linked=ldda.dataset.external_filename is not None,
+        ld_permissions=sorted((a.action, a.role.name) for a in ld.actions),
+        ldda_permissions=sorted((a.action, a.role.name) for a in ldda.actions),
+        dataset_permissions=sorted((action.action, role.name) for action, roles in security_agent.get_permissions(ldda.dataset).items() for role in roles),
+    )
+
+
+def test_new_library_uploads_match_single_uploads():
+    trans = MockLibraryTrans()
+    library_bunch = _setup_library(trans)
+    single_uploads = _uploaded_datasets("single")
+    for uploaded_dataset in single_uploads:
+        uploaded_dataset.data = upload_common.new_upload(trans, 'api', uploaded_dataset, library_bunch)
+        if uploaded_dataset.link_data_only == "link_to_files":
+            uploaded_dataset.data.link_to(uploaded_dataset.path)
+    bulk_uploads = _uploaded_datasets("bulk")
+    upload_common.new_library_uploads(trans, 'api', bulk_uploads, library_bunch, chunk_size=2)
+    trans.sa_session.flush()
+    ldda_ids = [(single_upload.data.id, bulk_upload.data.id) for single_upload, bulk_upload in zip(single_uploads, bulk_uploads)]
+    root_folder_id = library_bunch.folder.id
+    trans.sa_session.expunge_all()
+
+    LDDA = trans.app.model.LibraryDatasetDatasetAssociation
+    for i, (single_ldda_id, bulk_ldda_id) in enumerate(ldda_ids):
+        single_ldda = trans.sa_session.query(LDDA).get(single_ldda_id)
+        bulk_ldda = trans.sa_session.query(LDDA).get(bulk_ldda_id)
+        assert bulk_ldda.name == f"bulk_{i}.txt"
+        assert _describe(trans, bulk_ldda) == _describe(trans, single_ldda)
+    # Subfolders are created once
+    root_folder = trans.sa_session.query(trans.app.model.LibraryFolder).get(root_folder_id)
+    assert [folder.name for folder in root_folder.folders] == ["sub"]
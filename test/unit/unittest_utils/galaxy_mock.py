@@ -95,7 +95,7 @@ class MockApp:
         model.set_datatypes_registry(datatypes_registry)
         self.datatypes_registry = datatypes_registry
 
-    def wait_for_toolbox_reload(self, toolbox):
+    def wait_for_toolbox_reload(self, old_reload_count):
         # TODO: If the tpm test case passes, does the operation really
         # need to wait.
         return True
@@ -132,6 +132,7 @@ class MockAppConfig(Bunch):
         self.tool_data_path = os.path.join(root, 'tool-data')
         self.tool_dependency_dir = None
         self.metadata_strategy = 'legacy'
+        self.defer_dataset_peeks = False
 
         self.object_store_config_file = ''
         self.object_store = 'disk'
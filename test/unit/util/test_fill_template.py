@@ -3,7 +3,10 @@ import sys
 import pytest
 from Cheetah.NameMapper import NotFound
 
-from galaxy.util.template import fill_template
+from galaxy.util.template import (
+    CompiledTemplateCache,
+    fill_template,
+)
 
 SIMPLE_TEMPLATE = """#for item in $a_list:
     echo $item
@@ -86,3 +89,22 @@ def test_fix_template_two_to_three():
 def test_fix_template_invalid_cheetah():
     template_str = fill_template(INVALID_CHEETAH_SYNTAX, python_template_version='2', retry=1)
     assert template_str == "1 is 1\n"
+
+
+def test_compiled_template_cache(tmp_path):
+    template_cache = CompiledTemplateCache(maxsize=2, cache_dir=str(tmp_path))
+    for a_list in ([1, 2], [3]):
+        template_str = fill_template(SIMPLE_TEMPLATE, {'a_list': a_list}, template_cache=template_cache, template_cache_key=['tool', '1.0'])
+        assert template_str == "".join("    echo %s\n" % item for item in a_list)
+    assert template_cache.stats()['hits'] == 1
+    assert template_cache.stats()['size'] == 1
+    # The translated python 2 template is cached
+    for _ in range(2):
+        template_str = fill_template(TWO_TO_THREE_TEMPLATE, python_template_version='2', retry=1, template_cache=template_cache, template_cache_key=['tool', '1.0'])
+        assert template_str == 'a a 1'
+    assert template_cache.stats()['hits'] == 2
+    # A new process uses the compiled templates written to disk
+    template_cache = CompiledTemplateCache(maxsize=2, cache_dir=str(tmp_path))
+    template_str = fill_template(TWO_TO_THREE_TEMPLATE, python_template_version='2', retry=0, template_cache=template_cache, template_cache_key=['tool', '1.0'])
+    assert template_str == 'a a 1'
+    assert template_cache.stats()['disk_hits'] == 1
@@ -1,3 +1,5 @@
+import random
+
 from galaxy.util import rules_dsl
 
 
@@ -28,3 +30,81 @@ def test_rules():
             assert rule_set.has_errors, "rule [%s] does not contain errors" % test_case
         else:
             raise Exception("Problem with test case definition [%s]." % test_case)
+
+
+def _apply(apply, data, sources):
+    try:
+        return apply(data, sources)
+    except Exception as e:
+        return type(e), str(e)
+
+
+def _random_table(num_rows):
+    rng = random.Random(42)
+    data = []
+    sources = []
+    for i in range(num_rows):
+        sample = f"sample{rng.randint(0, 20)}"
+        read = rng.choice(["R1", "R2", "1", "2"])
+        data.append([f"/data/run{i % 7}/{sample}_{read}.fastq.gz", sample, "%d" % rng.randint(0, 100), rng.choice(["", "x", "yz"])])
+        tags = rng.sample(["group:condition:treated", "group:condition:control", "group:batch:1", "name:cell", "farm"], rng.randint(0, 3))
+        sources.append({"identifiers": [sample, read], "tags": tags, "dataset": i})
+    return data, sources
+
+
+RULE_SETS = [
+    [{"type": "add_column_basename", "target_column": 0},
+     {"type": "add_column_regex", "target_column": 4, "expression": r"(sample\d+)_(R?[12])", "group_count": 2},
+     {"type": "add_column_regex", "target_column": 4, "expression": r"_(R?[12])", "replacement": r"read \1"},
+     {"type": "add_column_regex", "target_column": 1, "expression": r"\d+"},
+     {"type": "sort", "target_column": 2, "numeric": True},
+     {"type": "swap_columns", "target_column_0": 0, "target_column_1": 5},
+     {"type": "remove_columns", "target_columns": [1, 3]}],
+    [{"type": "add_column_metadata", "value": "identifier1"},
+     {"type": "add_column_metadata", "value": "tags"},
+     {"type": "add_column_group_tag_value", "value": "condition", "default_value": "none"},
+     {"type": "add_column_concatenate", "target_column_0": 1, "target_column_1": 4},
+     {"type": "add_column_rownum", "start": 1},
+     {"type": "add_column_value", "value": "v"},
+     {"type": "add_column_substr", "target_column": 0, "length": 5, "substr_type": "keep_prefix"},
+     {"type": "add_column_substr", "target_column": 0, "length": 5, "substr_type": "drop_prefix"},
+     {"type": "add_column_substr", "target_column": 0, "length": 40, "substr_type": "keep_suffix"},
+     {"type": "add_column_substr", "target_column": 0, "length": 40, "substr_type": "drop_suffix"},
+     {"type": "sort", "target_column": 1, "numeric": False}],
+    [{"type": "add_filter_regex", "target_column": 1, "expression": "sample1", "invert": False},
+     {"type": "add_filter_count", "count": 3, "which": "first", "invert": False},
+     {"type": "add_filter_count", "count": 2, "which": "last", "invert": True},
+     {"type": "add_filter_empty", "target_column": 3, "invert": False},
+     {"type": "add_filter_matches", "target_column": 3, "value": "x", "invert": True},
+     {"type": "add_filter_compare", "target_column": 2, "value": 30, "compare_type": "greater_than_equal"},
+     {"type": "split_columns", "target_columns_0": [1], "target_columns_1": [2]}],
+    # Uneven splits yield rows of different lengths
+    [{"type": "split_columns", "target_columns_0": [0, 1], "target_columns_1": [2]},
+     {"type": "add_column_value", "value": "v"}],
+    # Filtering every row
+    [{"type": "add_filter_matches", "target_column": 3, "value": "missing", "invert": False},
+     {"type": "swap_columns", "target_column_0": 0, "target_column_1": 10}],
+    # Errors
+    [{"type": "add_column_regex", "target_column": 1, "expression": r"sample1\d"}],
+    [{"type": "add_column_regex", "target_column": 1, "expression": r"(sample)(\d+)", "group_count": 3}],
+    [{"type": "sort", "target_column": 0, "numeric": True}],
+    [{"type": "swap_columns", "target_column_0": 0, "target_column_1": 10}],
+]
+
+
+def test_apply_matches_apply_rows():
+    for test_case in rules_dsl.get_rules_specification():
+        if "initial" in test_case:
+            rule_set = rules_dsl.RuleSet(test_case)
+            initial = test_case["initial"]
+            assert rule_set.apply(initial["data"], initial["sources"]) == rule_set.apply_rows(initial["data"], initial["sources"])
+
+    for num_rows in (0, 1, 500):
+        data, sources = _random_table(num_rows)
+        for rules in RULE_SETS:
+            rule_set = rules_dsl.RuleSet({"rules": rules})
+            assert _apply(rule_set.apply, data, sources) == _apply(rule_set.apply_rows, data, sources), rules
+    # Ragged input rows
+    rule_set = rules_dsl.RuleSet({"rules": RULE_SETS[0]})
+    data = [["/a/b_R1", "sample1"], ["/c/sample2_R2", "sample2", "3"]]
+    assert _apply(rule_set.apply, data, sources[:2]) == _apply(rule_set.apply_rows, data, sources[:2])
@@ -9,6 +9,8 @@ import errno
 import os
 import shutil
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from json import dump, load, loads
 
 from galaxy.datatypes import sniff
@@ -25,22 +27,24 @@ assert sys.version_info[:2] >= (2, 7)
 
 
 _file_sources = None
+_file_sources_lock = threading.Lock()
 
 
 def get_file_sources():
     global _file_sources
-    if _file_sources is None:
-        from galaxy.files import ConfiguredFileSources
-        file_sources = None
-        if os.path.exists("file_sources.json"):
-            file_sources_as_dict = None
-            with open("file_sources.json") as f:
-                file_sources_as_dict = load(f)
-            if file_sources_as_dict is not None:
-                file_sources = ConfiguredFileSources.from_dict(file_sources_as_dict)
-        if file_sources is None:
-            ConfiguredFileSources.from_dict([])
-        _file_sources = file_sources
+    with _file_sources_lock:
+        if _file_sources is None:
+            from galaxy.files import ConfiguredFileSources
+            file_sources = None
+            if os.path.exists("file_sources.json"):
+                file_sources_as_dict = None
+                with open("file_sources.json") as f:
+                    file_sources_as_dict = load(f)
+                if file_sources_as_dict is not None:
+                    file_sources = ConfiguredFileSources.from_dict(file_sources_as_dict)
+            if file_sources is None:
+                ConfiguredFileSources.from_dict([])
+            _file_sources = file_sources
     return _file_sources
 
 
@@ -319,22 +323,31 @@ def __main__():
     except (ValueError, AssertionError):
         datasets = __read_old_paramfile(sys.argv[3])
 
-    metadata = []
+    datasets = [bunch.Bunch(**safe_dict(dataset)) for dataset in datasets]
     for dataset in datasets:
-        dataset = bunch.Bunch(**safe_dict(dataset))
-        try:
-            output_path = output_paths[int(dataset.dataset_id)][0]
-        except Exception:
+        if int(dataset.dataset_id) not in output_paths:
             print('Output path for dataset %s not found on command line' % dataset.dataset_id, file=sys.stderr)
             sys.exit(1)
+
+    def add_dataset(dataset):
+        output_path = output_paths[int(dataset.dataset_id)][0]
         try:
             if dataset.type == 'composite':
                 files_path = output_paths[int(dataset.dataset_id)][1]
-                metadata.append(add_composite_file(dataset, registry, output_path, files_path))
+                return add_composite_file(dataset, registry, output_path, files_path)
             else:
-                metadata.append(add_file(dataset, registry, output_path))
+                return add_file(dataset, registry, output_path)
         except UploadProblemException as e:
-            metadata.append(file_err(unicodify(e), dataset))
+            return file_err(unicodify(e), dataset)
+
+    # Datasets, e.g. the files of a server directory imported into a library,
+    # are copied and sniffed using as many threads as the job has slots.
+    workers = min(int(os.environ.get('GALAXY_SLOTS', 1)), len(datasets))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            metadata = list(executor.map(add_dataset, datasets))
+    else:
+        metadata = [add_dataset(dataset) for dataset in datasets]
     __write_job_metadata(metadata)
 
 